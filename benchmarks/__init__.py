@@ -0,0 +1,4 @@
+"""
+Benchmarks for pyglet_helper. They run on the fake GL backend, so they do not
+need a display or a GPU.
+"""
@@ -0,0 +1,102 @@
+"""
+Measure the time and memory taken to import a pyglet_helper module. Each
+import runs in a fresh interpreter, so nothing is cached between runs. The
+benchmark reports, for each module, the median wall time of the import, the
+peak Python memory allocated during it and the resident set size of the
+process afterwards. Run it from the repository root with:
+
+    python -m benchmarks.import_cost --modules pyglet_helper.common
+"""
+from __future__ import division, print_function
+import argparse
+import json
+import platform
+import subprocess
+import sys
+
+MODULES = ['pyglet_helper', 'pyglet_helper.common']
+
+# Run in the child interpreter; prints the measurements as JSON. Tracing
+# memory slows the import down several times, so the time and the memory are
+# measured by separate interpreters.
+CHILD = """
+import json, resource, sys, time, tracemalloc
+if sys.argv[2] == 'memory':
+    tracemalloc.start()
+start = time.perf_counter()
+__import__(sys.argv[1])
+seconds = time.perf_counter() - start
+_, peak = tracemalloc.get_traced_memory()
+print(json.dumps({'seconds': seconds, 'peak_memory_bytes': peak,
+                  'max_rss_kb': resource.getrusage(
+                      resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def run_child(module, mode):
+    """ Import a module in a fresh interpreter.
+
+    :param module: the name of the module to import
+    :type module: str
+    :param mode: 'time' or 'memory'
+    :type mode: str
+    :return: the measurements made by the interpreter
+    :rtype: dict
+    """
+    output = subprocess.check_output([sys.executable, '-c', CHILD, module,
+                                      mode])
+    return json.loads(output.decode('utf-8'))
+
+
+def measure(module, repeat):
+    """ Import a module in fresh interpreters.
+
+    :param module: the name of the module to import
+    :type module: str
+    :param repeat: the number of times the import is timed
+    :type repeat: int
+    :return: the measurements
+    :rtype: dict
+    """
+    times = sorted(run_child(module, 'time')['seconds']
+                   for _ in range(repeat))
+    memory = run_child(module, 'memory')
+    return {'module': module,
+            'seconds': times[len(times) // 2],
+            'peak_memory_bytes': memory['peak_memory_bytes'],
+            'max_rss_kb': memory['max_rss_kb']}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--modules', nargs='+', default=MODULES,
+                        help='the modules to import')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='the number of times to import each module')
+    parser.add_argument('--output', default=None,
+                        help='write the JSON report to this file instead of '
+                             'standard output')
+    args = parser.parse_args(argv)
+
+    results = []
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        print('%-30s %8.1f ms, %8.1f kB peak, %8d kB RSS' % (
+            module, result['seconds'] * 1e3,
+            result['peak_memory_bytes'] / 1024.0, result['max_rss_kb']),
+            file=sys.stderr)
+        results.append(result)
+    report = {'python': platform.python_version(),
+              'platform': platform.platform(),
+              'repeat': args.repeat,
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+
+if __name__ == '__main__':
+    main()
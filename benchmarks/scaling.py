@@ -0,0 +1,195 @@
+"""
+Measure how the cost of building and rendering a scene grows with the number
+of objects in it. For each primitive type (and a mix of all of them) and each
+object count, the benchmark reports:
+
+    - the time taken to construct the objects
+    - the CPU time taken to render a frame
+    - the number of GL calls made per object in a frame
+    - the peak Python memory used while constructing and rendering
+
+The scenes are rendered through the fake GL backend, so the times are the
+CPU cost of pyglet_helper itself. Run it from the repository root with:
+
+    python -m benchmarks.scaling --counts 10 1000 --output report.json
+"""
+from __future__ import division, print_function
+import argparse
+from collections import Counter
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import pyglet_helper.test.fake_gl
+from pyglet_helper.test.recording_gl import RecordingGL, gl_modules
+
+COUNTS = [10, 1000, 10000, 100000]
+TYPES = ['Arrow', 'Box', 'Cone', 'Cylinder', 'Ellipsoid', 'Pyramid', 'Ring',
+         'Sphere']
+MIXED = 'mixed'
+
+CLOCK = getattr(time, 'perf_counter', time.time)
+CPU_CLOCK = getattr(time, 'process_time', None) or time.clock
+
+
+class CountingGL(RecordingGL):
+    """
+    A recording GL backend that only counts the calls to each function,
+    so that it can be used on scenes with millions of calls.
+    """
+    def __init__(self, backend=pyglet_helper.test.fake_gl):
+        super(CountingGL, self).__init__(backend)
+        self.totals = Counter()
+
+    def wrap(self, name, function):
+        totals = self.totals
+
+        def counted(*args):
+            totals[name] += 1
+            return function(*args)
+        counted.__name__ = function.__name__
+        return counted
+
+
+def use_backend(backend):
+    """ Replace the GL module in every pyglet_helper module.
+
+    :param backend: the GL module to draw through
+    """
+    for module in gl_modules():
+        module.gl = backend
+
+
+def build_scene(kind, count):
+    """ Construct count objects laid out on a grid.
+
+    :param kind: the name of the object class, or MIXED for all of them
+    :type kind: str
+    :param count: the number of objects
+    :type count: int
+    :return: the objects
+    :rtype: list of pyglet_helper.objects.Primitive
+    """
+    import pyglet_helper.objects as objects
+    from pyglet_helper.util import Vector
+    if kind == MIXED:
+        classes = [getattr(objects, name) for name in TYPES]
+    else:
+        classes = [getattr(objects, kind)]
+    side = max(1, int(round(count ** (1 / 3.0))))
+    scene = []
+    for i in range(count):
+        pos = Vector([i % side, (i // side) % side, i // (side * side)])
+        obj = classes[i % len(classes)](pos=pos)
+        if kind == 'Ring' or (kind == MIXED and
+                              isinstance(obj, objects.Ring)):
+            obj.thickness = 0.1
+        scene.append(obj)
+    return scene
+
+
+def render_frame(view, scene):
+    """ Render every object in the scene once.
+
+    :param view: the view to render into
+    :type view: pyglet_helper.objects.View
+    :param scene: the objects to render
+    :type scene: list of pyglet_helper.objects.Renderable
+    """
+    view.setup()
+    view.draw(scene)
+
+
+def measure(kind, count, frames):
+    """ Benchmark one scene.
+
+    :param kind: the name of the object class, or MIXED for all of them
+    :type kind: str
+    :param count: the number of objects
+    :type count: int
+    :param frames: the number of frames to time
+    :type frames: int
+    :return: the measurements
+    :rtype: dict
+    """
+    from pyglet_helper.objects import View
+    use_backend(pyglet_helper.test.fake_gl)
+    view = View()
+
+    start = CLOCK()
+    scene = build_scene(kind, count)
+    construct_seconds = CLOCK() - start
+
+    # The first frame compiles the display lists; time the ones after it.
+    render_frame(view, scene)
+    start = CPU_CLOCK()
+    for _ in range(frames):
+        render_frame(view, scene)
+    frame_seconds = (CPU_CLOCK() - start) / frames
+
+    counter = CountingGL()
+    use_backend(counter)
+    render_frame(view, scene)
+    gl_calls = sum(counter.totals.values())
+    use_backend(pyglet_helper.test.fake_gl)
+    del scene
+
+    tracemalloc.start()
+    scene = build_scene(kind, count)
+    render_frame(View(), scene)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'type': kind,
+            'count': count,
+            'construct_seconds': construct_seconds,
+            'construct_us_per_object': construct_seconds / count * 1e6,
+            'frame_cpu_seconds': frame_seconds,
+            'frame_us_per_object': frame_seconds / count * 1e6,
+            'gl_calls_per_frame': gl_calls,
+            'gl_calls_per_object': gl_calls / count,
+            'gl_calls_by_function': dict(counter.totals),
+            'peak_memory_bytes': peak_memory}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--counts', type=int, nargs='+', default=COUNTS,
+                        help='the object counts to benchmark')
+    parser.add_argument('--types', nargs='+', default=TYPES + [MIXED],
+                        choices=TYPES + [MIXED],
+                        help='the object types to benchmark')
+    parser.add_argument('--frames', type=int, default=3,
+                        help='the number of frames to time per scene')
+    parser.add_argument('--output', default=None,
+                        help='write the JSON report to this file instead of '
+                             'standard output')
+    args = parser.parse_args(argv)
+
+    results = []
+    for kind in args.types:
+        for count in args.counts:
+            result = measure(kind, count, args.frames)
+            print('%-10s %7d objects: %8.1f us/object/frame, %5.1f GL '
+                  'calls/object' % (kind, count,
+                                    result['frame_us_per_object'],
+                                    result['gl_calls_per_object']),
+                  file=sys.stderr)
+            results.append(result)
+    report = {'python': platform.python_version(),
+              'platform': platform.platform(),
+              'backend': 'pyglet_helper.test.fake_gl',
+              'frames': args.frames,
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,9 +7,14 @@ package.
 
 from __future__ import absolute_import
 
-from . import objects
-from . import common
-from . import util
+from pyglet_helper._lazy import attach
+
+# The subpackages are imported when they are first used, so that e.g. the
+# linear algebra in pyglet_helper.util.linear can be used without importing
+# pyglet or building the materials.
+__getattr__, __dir__, __all__ = attach(__name__, [('objects', []),
+                                                  ('common', []),
+                                                  ('util', [])])
 
 __version__ = "0.0.1"
 __author__ = "cholloway"
@@ -0,0 +1,78 @@
+""" pyglet_helper._lazy contains helpers for importing modules only when they
+are first used, so that importing a package does not import every module in
+it (or pyglet) up front
+"""
+from importlib import import_module
+import sys
+
+# Modules can only define __getattr__ from Python 3.7 (PEP 562). Before that,
+# packages import their submodules eagerly.
+LAZY_IMPORTS = sys.version_info >= (3, 7)
+
+
+def attach(package, exports):
+    """ Build the module-level __getattr__ and __dir__ of a package which
+    imports its submodules on first use.
+
+        __getattr__, __dir__, __all__ = attach(__name__, [
+            ('linear', ['Vector', 'Tmatrix']),
+            ('texture', ['Texture'])])
+
+    :param package: the name of the package
+    :type package: str
+    :param exports: (submodule, names) pairs: the names are attributes of the
+    submodule that the package exports. If names is empty, the submodule
+    itself is exported. Without lazy imports, the submodules are imported in
+    this order.
+    :type exports: list of tuple
+    :return: the package's __getattr__, __dir__ and __all__
+    :rtype: tuple
+    """
+    origins = {}
+    for submodule, names in exports:
+        if names:
+            for name in names:
+                origins[name] = (submodule, name)
+        else:
+            origins[submodule] = (submodule, None)
+
+    def __getattr__(name):
+        try:
+            submodule, attribute = origins[name]
+        except KeyError:
+            raise AttributeError("module %r has no attribute %r" %
+                                 (package, name))
+        value = import_module(package + '.' + submodule)
+        if attribute is not None:
+            value = getattr(value, attribute)
+        # Cache the attribute, so __getattr__ is only called once per name.
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(origins) | set(vars(sys.modules[package])))
+
+    if not LAZY_IMPORTS:
+        for submodule, names in exports:
+            for name in names or [submodule]:
+                __getattr__(name)
+    return __getattr__, __dir__, sorted(origins)
+
+
+class LazyModule(object):
+    """
+    Stands in for a module that is only imported when one of its attributes
+    is first used, e.g., pyglet.gl for code that may never draw anything.
+    """
+    def __init__(self, name):
+        """
+        :param name: the name of the module
+        :type name: str
+        """
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, name):
+        if self._module is None:
+            self._module = import_module(self._name)
+        return getattr(self._module, name)
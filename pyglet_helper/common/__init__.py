@@ -1,6 +1,13 @@
 """pyglet_helper.common contains pyglet_helper libraries common to all
 pyglet_helper.objects objects
 """
-from pyglet_helper.common.materials import RawTexture, ShaderMaterial, \
-    convert_data, load_tga, shader, TX_TURB3, TX_WOOD, TX_BRICK, TX_RANDOM, \
-    LIBRARY
+from pyglet_helper._lazy import attach
+
+# The submodules are imported when one of their names is first used.
+__getattr__, __dir__, __all__ = attach(__name__, [
+    ('materials', ['RawTexture', 'ShaderMaterial', 'convert_data',
+                   'decode_rle', 'load_library', 'load_shader_library',
+                   'load_tga', 'load_volume', 'shader', 'TX_TURB3',
+                   'TX_WOOD', 'TX_BRICK', 'TX_RANDOM', 'LIBRARY',
+                   'use_procedural_noise']),
+    ('noise', ['noise_volume', 'turbulence', 'white_noise'])])
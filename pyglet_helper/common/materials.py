@@ -16,7 +16,8 @@ Stable Interfaces:
         See VPython documentation for more details.
     materials.load_tga(file)
 Unstable interfaces:
-    materials.shader( name, shader, version, textures=(), translucent=False )
+    materials.shader( name, shader, version, textures=(), translucent=False,
+                      texture_array=None )
         This is the low level interface for constructing a material based on
         a GLSL shader program.
 
@@ -44,32 +45,150 @@ Unstable interfaces:
     materials.tx_turb3
     materials.tx_wood
         raw 2D textures useful only for filling in the textures parameter of
-        materials.shader().
+        materials.shader().  Their image files are only read when their data
+        is first used.
+    materials.use_procedural_noise( size=64, seed=0 )
+        Generate the noise volumes of materials.tx_turb3 and
+        materials.tx_random at any resolution instead of reading them from
+        their image files.
 """
 
-from numpy import array, reshape, fromstring, ubyte, asarray
+from functools import partial
+from numpy import array, asarray, empty, frombuffer, memmap, reshape, ubyte
 import os.path
 import sys
 
+from pyglet_helper.common.noise import noise_volume
+from pyglet_helper.util.mipmap import cached_mip_chain, update_mip_chain
+from pyglet_helper.util.shader_program import PROGRAMS
+from pyglet_helper.util.shader_source import ShaderLibrary, parse_sections
 from pyglet_helper.util.texture import Texture
 from pyglet_helper.objects.material import Material, UNSHADED, EMISSIVE, \
     DIFFUSE, PLASTIC, ROUGH, SHINY, CHROME, ICE, GLASS, BLAZED, SILVER, \
     WOOD, MARBLE, EARTH, BLUEMARBLE, BRICKS
 
 
+# The length of the header at the start of a targa file
+TGA_HEADER_LENGTH = 18
+# The supported image types: uncompressed true color and grayscale, and run
+# length encoded true color and grayscale
+TGA_IMAGE_TYPES = (2, 3, 10, 11)
+TGA_RLE_TYPES = (10, 11)
+
+
 class RawTexture(Texture):
     """
     An extension of the pyglet_helper.util.Texture object to allow for
     arbitrary input data
     """
-    def __init__(self, **kwargs):
+    # The filter the mip loader computes the levels with, which they are
+    # updated with after part of the texture changes
+    mip_filter = 'box'
+
+    def __init__(self, loader=None, mip_loader=None, **kwargs):
+        """
+        :param loader: a function returning the texture's data, called the
+        first time the data is used (optional)
+        :type loader: callable
+        :param mip_loader: a function taking the texture's data and returning
+        its mip levels, called when the texture is first uploaded (optional)
+        :type mip_loader: callable
+        """
         Texture.__init__(self)
+        self._data = None
+        self._loader = loader
+        self._mip_levels = None
+        self._mip_loader = mip_loader
         for key, value in kwargs.items():
-            if key == 'data' and value is None:
-                raise ValueError("Cannot nullify a texture by assigning its "
-                                   "data to None")
-            else:
-                self.__setattr__(key, value)
+            self.__setattr__(key, value)
+
+    @property
+    def data(self):
+        """
+        Get the texture's data, loading it if it has not been loaded yet
+        :return: the texture's data
+        :rtype: numpy.ndarray
+        """
+        if self._data is None and self._loader is not None:
+            self._data = self._loader()
+            self._loader = None
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        """
+        Set the texture's data
+        :param data: the new data
+        :type data: numpy.ndarray
+        """
+        if data is None:
+            raise ValueError("Cannot nullify a texture by assigning its "
+                             "data to None")
+        self._data = data
+        self._loader = None
+        # Any levels computed for the old data no longer apply.
+        self._mip_levels = None
+        self._mip_loader = None
+
+    @property
+    def mip_levels(self):
+        """
+        Get the texture's mip levels after the base level, computing them
+        with the mip loader the first time they are used
+        :return: the levels, or None if OpenGL should generate them
+        :rtype: list of numpy.ndarray
+        """
+        if self._mip_levels is None and self._mip_loader is not None \
+                and self.data is not None:
+            self._mip_levels = self._mip_loader(self.data)
+            self._mip_loader = None
+        return self._mip_levels
+
+    def damage(self, region=None):
+        """
+        Damage the texture, indicating that it needs to be re-uploaded to
+        OpenGL. If the whole texture changed, its precomputed mip levels are
+        dropped, and OpenGL generates them instead; otherwise only the part
+        of the levels which depends on the region is computed again.
+
+        :param region: the part of the texture that changed, as (x, y, width,
+        height) in texels, or None for the whole texture
+        :type region: tuple of int
+        """
+        Texture.damage(self, region)
+        # The data is only read for a region, as Texture.damage() does, so
+        # that damaging an unloaded texture does not load it.
+        if region is None or self.data is None or len(self.data.shape) != 3:
+            self._mip_levels = None
+            self._mip_loader = None
+        elif self._mip_levels is not None and self.damaged_regions:
+            # The last region holds this one, clipped to the texture.
+            update_mip_chain(self._mip_levels, self.data,
+                             self.damaged_regions[-1], self.mip_filter)
+
+    def set_loader(self, loader, mip_loader=None):
+        """ Replace the functions the texture's data and mip levels are
+        loaded with. The data is loaded again, and the texture uploaded
+        again, the next time it is used.
+
+        :param loader: a function returning the texture's data
+        :type loader: callable
+        :param mip_loader: a function taking the texture's data and returning
+        its mip levels (optional)
+        :type mip_loader: callable
+        """
+        self._data = None
+        self._loader = loader
+        self.damage()
+        self._mip_loader = mip_loader
+
+    @property
+    def loaded(self):
+        """
+        True if the texture's data has been loaded
+        :return:
+        """
+        return self._data is not None
 
 
 class ShaderMaterial(Material):
@@ -99,38 +218,114 @@ def convert_data(data):
     return data
 
 
-def load_tga(fileid):
+def _tga_bytes(fileid):
     """
-    Load a TGA image file to use as a texture
-    :param fileid: the filename of image
-    :type fileid: str
-    :return: image data
+    Memory-map a TGA file, so that only the parts of it which are used are
+    read from disk
+    :param fileid: the filename of image, or a file opened for reading
+    :type fileid: str or file
+    :return: the contents of the file
+    :rtype: numpy.ndarray
     """
-    header_length = 18 # length of header in targa file
     if isinstance(fileid, str):
         if fileid[-4:] != ".tga":
             fileid += ".tga"
-        fileid = open(fileid, "rb")
-    data = fromstring(fileid.read(), ubyte)
-    width = data[12] + 256 * data[13]
-    height = data[14] + 256 * data[15]
-    _bytes = data[16] >> 3
-    image = data[header_length:header_length + width * height * _bytes]
-    if 1 <= _bytes <= 2:
-        image = image.reshape((height, width, _bytes))
-    elif 3 <= _bytes <= 4:
-        # make copy; must reverse byte order bgr -> rgb
-        red = image[0::_bytes].copy()
-        image[0::_bytes] = image[2::_bytes]  # blue
-        image[2::_bytes] = red
-        image = image.reshape((height, width, _bytes))
-    else:
+        return memmap(fileid, dtype=ubyte, mode="r")
+    try:
+        return memmap(fileid, dtype=ubyte, mode="r")
+    except (AttributeError, IOError, ValueError):
+        # e.g., an in-memory file, which cannot be mapped
+        fileid.seek(0)
+        return frombuffer(fileid.read(), ubyte)
+
+
+def decode_rle(data, start, count, pixel_bytes):
+    """
+    Decode run-length encoded TGA pixels, one packet at a time, directly into
+    the output array
+    :param data: the contents of the file
+    :type data: numpy.ndarray
+    :param start: the offset of the first packet
+    :type start: int
+    :param count: the number of pixels in the image
+    :type count: int
+    :param pixel_bytes: the number of bytes per pixel
+    :type pixel_bytes: int
+    :return: the pixels, as a flat array of bytes
+    :rtype: numpy.ndarray
+    """
+    pixels = empty((count, pixel_bytes), ubyte)
+    pixel = 0
+    offset = start
+    while pixel < count:
+        if offset >= len(data):
+            raise IOError("The targa file is truncated.")
+        header = int(data[offset])
+        offset += 1
+        length = (header & 0x7f) + 1
+        if header & 0x80:
+            # A run of one repeated pixel
+            packet_bytes = pixel_bytes
+        else:
+            # length pixels, stored as is
+            packet_bytes = length * pixel_bytes
+        if pixel + length > count or offset + packet_bytes > len(data):
+            raise IOError("The targa file is truncated or corrupt.")
+        pixels[pixel:pixel + length] = data[offset:offset + packet_bytes]\
+            .reshape((-1, pixel_bytes))
+        offset += packet_bytes
+        pixel += length
+    return pixels.reshape(-1)
+
+
+def load_tga(fileid, bgr=False):
+    """
+    Load a TGA image file to use as a texture. Uncompressed and run-length
+    encoded true color and grayscale images are supported. Uncompressed
+    files are memory-mapped, and returned as a view of the file when no
+    channels have to be swapped.
+    :param fileid: the filename of image, or a file opened for reading
+    :type fileid: str or file
+    :param bgr: if True, color images keep the blue, green, red (alpha)
+    channel order of the file, and should be uploaded as GL_BGR or GL_BGRA;
+    otherwise they are converted to red, green, blue (alpha) in one pass
+    :type bgr: bool
+    :return: image data, with shape (height, width, bytes per pixel)
+    :rtype: numpy.ndarray
+    """
+    data = _tga_bytes(fileid)
+    if len(data) < TGA_HEADER_LENGTH:
         raise IOError("%s is not a valid targa file." % fileid)
-    # Photoshop "save as targa" starts the data in lower left;
-    # last byte in header is zero.
-    # Visual and POV-Ray start data in upper left; last header byte is nonzero.
-    if data[header_length - 1] == 0:
+    id_length = int(data[0])
+    has_colormap = int(data[1])
+    image_type = int(data[2])
+    colormap_length = int(data[5]) + 256 * int(data[6])
+    colormap_bytes = (int(data[7]) + 7) // 8
+    width = int(data[12]) + 256 * int(data[13])
+    height = int(data[14]) + 256 * int(data[15])
+    _bytes = int(data[16]) >> 3
+    descriptor = int(data[17])
+    if image_type not in TGA_IMAGE_TYPES or not 1 <= _bytes <= 4:
+        raise IOError("%s is not a valid targa file." % fileid)
+    start = TGA_HEADER_LENGTH + id_length
+    if has_colormap:
+        start += colormap_length * colormap_bytes
+    count = width * height
+    if image_type in TGA_RLE_TYPES:
+        image = decode_rle(data, start, count, _bytes)
+    else:
+        image = data[start:start + count * _bytes]
+        if len(image) < count * _bytes:
+            raise IOError("%s is truncated." % fileid)
+    image = image.reshape((height, width, _bytes))
+    # Photoshop "save as targa" starts the data in lower left; bit 5 of the
+    # last byte in the header is zero.
+    # Visual and POV-Ray start data in upper left; bit 5 is set.
+    if not descriptor & 0x20:
         image = image[::-1]
+    if _bytes >= 3 and not bgr:
+        # bgr(a) -> rgb(a)
+        image = image[:, :, [2, 1, 0, 3][:_bytes]]
     return image
 
 # The following code addresses a problem for those packaging a program using
@@ -145,23 +340,123 @@ if hasattr(sys, 'frozen'):
 else:
     TEXTURE_PATH = os.path.split(__file__)[0] + "/"
 
-TURBULENCE3_DATA = load_tga(str(TEXTURE_PATH) + "turbulence3")  # the targa
-# file is 512*512*3
-TX_TURB3 = RawTexture(data=reshape(TURBULENCE3_DATA, (64, 64, 64, 3)),
-                      interpolate=True,
-                      mipmap=False)
-TX_WOOD = RawTexture(data=load_tga(TEXTURE_PATH + "wood"), interpolate=True)
-TX_BRICK = RawTexture(data=load_tga(TEXTURE_PATH + "brickbump"),
+
+def load_volume(fileid):
+    """
+    Load a TGA image file containing a 64*64*64 volume texture, stored as a
+    512*512 image
+    :param fileid: the filename of image
+    :type fileid: str
+    :return: image data
+    """
+    return reshape(load_tga(fileid), (64, 64, 64, 3))
+
+
+TX_TURB3 = RawTexture(loader=partial(load_volume,
+                                     TEXTURE_PATH + "turbulence3"),
+                      interpolate=True, mipmap=False)
+TX_WOOD = RawTexture(loader=partial(load_tga, TEXTURE_PATH + "wood"),
+                     mip_loader=partial(cached_mip_chain,
+                                        TEXTURE_PATH + "wood"),
+                     interpolate=True)
+TX_BRICK = RawTexture(loader=partial(load_tga, TEXTURE_PATH + "brickbump"),
+                      mip_loader=partial(cached_mip_chain,
+                                         TEXTURE_PATH + "brickbump"),
                       interpolate=True)
-DATA_R = load_tga(TEXTURE_PATH + "random")
-TX_RANDOM = RawTexture(data=reshape(DATA_R, (64, 64, 64, 3)), interpolate=True,
-                       mipmap=False)
+TX_RANDOM = RawTexture(loader=partial(load_volume, TEXTURE_PATH + "random"),
+                       interpolate=True, mipmap=False)
+
+
+def use_procedural_noise(size=64, seed=0):
+    """ Generate the noise volumes of TX_TURB3 and TX_RANDOM, instead of
+    reading them from turbulence3.tga and random.tga. The volumes are
+    generated when they are first used.
+
+    :param size: the number of texels along each side of the volumes
+    :type size: int
+    :param seed: the seed of the random numbers
+    :type seed: int
+    """
+    TX_TURB3.set_loader(partial(noise_volume, "turbulence", size, seed=seed))
+    TX_RANDOM.set_loader(partial(noise_volume, "white", size, seed=seed))
+
+
+# The text of the shader library, read by load_library()
+_LIBRARY = []
+
+
+def load_library():
+    """
+    Read the shader library, the first time it is needed
+    :return: the library's text
+    :rtype: str
+    """
+    if not _LIBRARY:
+        with open(os.path.join(os.path.dirname(__file__), "library.txt"),
+                  "r") as library_file:
+            _LIBRARY.append(library_file.read())
+    return _LIBRARY[0]
 
-LIBRARY = open(os.path.join(os.path.dirname(__file__), "library.txt"),
-               "r").read()
+
+# The shader library parsed into sections, built by load_shader_library()
+_SHADER_LIBRARY = []
+
+
+def load_shader_library():
+    """
+    Parse the shader library into sections, the first time it is needed
+    :return: the parsed library
+    :rtype: pyglet_helper.util.ShaderLibrary
+    """
+    if not _SHADER_LIBRARY:
+        _SHADER_LIBRARY.append(ShaderLibrary(load_library()))
+    return _SHADER_LIBRARY[0]
+
+
+def __getattr__(name):
+    """ Read LIBRARY when it is first used (Python 3.7 and later).
+    """
+    if name == "LIBRARY":
+        return load_library()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+if sys.version_info < (3, 7):
+    # Modules cannot have lazy attributes before Python 3.7
+    LIBRARY = load_library()
+
+
+def texture_array_source(texture_array, textures):
+    """
+    Write the declarations a fragment shader needs to sample textures
+    packed into a texture array: the tex_array sampler, a texN_layer
+    constant for each texture N in the array, and textureLayer(layer, coord).
+    They replace the library's textureLayer(), which samples the texN
+    samplers. The #extension directive is moved after #version when the
+    stages are assembled.
+    :param texture_array: the array the textures are packed into
+    :type texture_array: pyglet_helper.util.TextureArray
+    :param textures: the material's textures
+    :type textures: list of pyglet_helper.util.Texture
+    :return: the declarations, as a [fragment] section
+    :rtype: str
+    """
+    lines = ["[fragment]",
+             "#extension GL_EXT_texture_array : enable",
+             "uniform sampler2DArray tex_array;",
+             "#undef textureLayer",
+             "#define textureLayer(layer, coord) "
+             "texture2DArray(tex_array, vec3(coord, layer))"]
+    for number, texture in enumerate(textures):
+        if texture in texture_array:
+            lines.append("#undef tex%d_layer" % number)
+            lines.append("const float tex%d_layer = %d.0;" %
+                         (number, texture_array.layer(texture)))
+    return "\n".join(lines) + "\n"
 
 
-def shader(name, _shader, version, library=LIBRARY, **kwargs):
+def shader(name, _shader, version, library=None, texture_array=None,
+           **kwargs):
     """
     Create a shader material by reading in from the library
     :param name: the name of the shader program in the library to select
@@ -169,25 +464,49 @@ def shader(name, _shader, version, library=LIBRARY, **kwargs):
     :param _shader: the existing shader to read from, can be empty
     :type _shader: str
     :param version:
-    :param library: the library to draw from
+    :param library: the library to draw from, by default LIBRARY, as text or
+    already parsed
+    :type library: str or pyglet_helper.util.ShaderLibrary
+    :param texture_array: if given, the material's 2D textures with the
+    shape of its layers are packed into this array, and the shader samples
+    texture N with textureLayer(texN_layer, coord) instead of binding it
+    :type texture_array: pyglet_helper.util.TextureArray
     :param kwargs:
     :return:
     """
 
+    if library is None:
+        library = load_shader_library()
+    elif not isinstance(library, ShaderLibrary):
+        library = ShaderLibrary(library)
     if isinstance(version, tuple):
         min_version, max_version = version
     else:
         min_version, max_version = version, version
     if max_version < 5.00 or min_version >= 5.10:
         raise ValueError("shader version " + str(version) + " not supported.")
-    if _shader.find("[vertex]") < 0 and library:
+    _shader = "\n".join([l.strip() for l in _shader.split("\n")])
+    if "vertex" not in parse_sections(_shader) and library.text:
         _shader += """
-            [vertex]
-            void main() {
-                basic();
-            }"""
-    _shader = library + "\n".join([l.strip() for l in _shader.split("\n")])
-    return ShaderMaterial(name=name, shader=_shader, **kwargs)
+[vertex]
+void main() {
+basic();
+}"""
+    if texture_array is not None:
+        textures = kwargs.get("textures", [])
+        for texture in textures:
+            if texture_array.fits(texture):
+                texture_array.add(texture)
+        kwargs["texture_array"] = texture_array
+        # The layer of each texture, or None for those left unpacked
+        kwargs["texture_layers"] = [
+            texture_array.layer(texture) if texture in texture_array
+            else None for texture in textures]
+        _shader = texture_array_source(texture_array, textures) + _shader
+    source, stages = library.assemble(_shader)
+    # Share the assembled stages with every material using the source.
+    PROGRAMS.get(source, stages)
+    return ShaderMaterial(name=name, shader=source, **kwargs)
 
 
 MATERIALS = [UNSHADED, EMISSIVE, DIFFUSE, PLASTIC, ROUGH, SHINY, CHROME, ICE,
@@ -0,0 +1,130 @@
+""" pyglet_helper.common.noise contains functions for generating the noise
+volumes used by the wood and marble shaders, at any resolution, instead of
+reading them from turbulence3.tga and random.tga
+"""
+from numpy import arange, floor, float32, ubyte
+from numpy.random import RandomState
+
+# The number of lattice cells along each side of the volume in the first
+# octave of turbulence; each octave after it has twice as many.
+TURBULENCE_PERIOD = 4
+TURBULENCE_OCTAVES = 4
+
+# The volumes generated so far, by their arguments
+_VOLUMES = {}
+
+
+def white_noise(size=64, channels=3, seed=None):
+    """
+    Generate a volume of independent random texels
+    :param size: the number of texels along each side of the volume
+    :type size: int
+    :param channels: the number of channels of each texel
+    :type channels: int
+    :param seed: the seed of the random numbers, or None for a different
+    volume each time
+    :type seed: int
+    :return: the volume, with shape (size, size, size, channels)
+    :rtype: numpy.ndarray
+    """
+    return RandomState(seed).randint(0, 256, (size, size, size, channels)) \
+        .astype(ubyte)
+
+
+def _upsample_axis(lattice, axis, size):
+    """
+    Interpolate a periodic lattice along one axis, easing between its points
+    so that the noise has no visible creases
+    :param lattice: the values at the lattice points
+    :type lattice: numpy.ndarray
+    :param axis: the axis to interpolate along
+    :type axis: int
+    :param size: the number of samples to take along the axis
+    :type size: int
+    :return: the interpolated values
+    :rtype: numpy.ndarray
+    """
+    period = lattice.shape[axis]
+    position = arange(size) * (float(period) / size)
+    first = floor(position).astype(int)
+    fraction = (position - first).astype(float32)
+    fraction = fraction * fraction * (3 - 2 * fraction)
+    shape = [1] * lattice.ndim
+    shape[axis] = size
+    fraction = fraction.reshape(shape)
+    # The lattice wraps around, so the volume tiles seamlessly.
+    return lattice.take(first, axis) * (1 - fraction) + \
+        lattice.take((first + 1) % period, axis) * fraction
+
+
+def turbulence(size=64, channels=3, octaves=TURBULENCE_OCTAVES, seed=None,
+               period=TURBULENCE_PERIOD):
+    """
+    Generate a volume of turbulence: the sum of the absolute values of
+    several octaves of smoothly interpolated lattice noise, each with twice
+    the frequency and half the amplitude of the one before it
+    :param size: the number of texels along each side of the volume
+    :type size: int
+    :param channels: the number of channels of each texel, each with
+    independent noise
+    :type channels: int
+    :param octaves: the number of octaves of noise
+    :type octaves: int
+    :param seed: the seed of the random numbers, or None for a different
+    volume each time
+    :type seed: int
+    :param period: the number of lattice cells along each side of the volume
+    in the first octave
+    :type period: int
+    :return: the volume, with shape (size, size, size, channels), scaled to
+    use the whole range of a byte
+    :rtype: numpy.ndarray
+    """
+    random = RandomState(seed)
+    volume = 0
+    for octave in range(octaves):
+        cells = min(size, period * 2 ** octave)
+        lattice = random.uniform(-1, 1, (cells, cells, cells, channels)) \
+            .astype(float32)
+        for axis in range(3):
+            lattice = _upsample_axis(lattice, axis, size)
+        volume = volume + abs(lattice) / 2 ** octave
+    low, high = volume.min(), volume.max()
+    volume = (volume - low) * (255 / max(high - low, 1e-6))
+    return volume.round().astype(ubyte)
+
+
+# The volumes noise_volume() can generate, by name
+NOISE_TYPES = {'turbulence': turbulence, 'white': white_noise}
+
+
+def noise_volume(kind, size=64, channels=3, seed=0):
+    """
+    Get a noise volume, generating it the first time it is asked for. The
+    volume is shared between callers, so it is read only.
+    :param kind: 'turbulence' or 'white'
+    :type kind: str
+    :param size: the number of texels along each side of the volume
+    :type size: int
+    :param channels: the number of channels of each texel
+    :type channels: int
+    :param seed: the seed of the random numbers
+    :type seed: int
+    :return: the volume, with shape (size, size, size, channels)
+    :rtype: numpy.ndarray
+    """
+    if kind not in NOISE_TYPES:
+        raise ValueError("Unknown noise type %r, expected one of %s" %
+                         (kind, ", ".join(sorted(NOISE_TYPES))))
+    key = (kind, size, channels, seed)
+    if key not in _VOLUMES:
+        volume = NOISE_TYPES[kind](size=size, channels=channels, seed=seed)
+        volume.flags.writeable = False
+        _VOLUMES[key] = volume
+    return _VOLUMES[key]
+
+
+def clear_cache():
+    """ Forget the volumes generated by noise_volume().
+    """
+    _VOLUMES.clear()
@@ -5,19 +5,25 @@ Module containing renderable objects
 """
 from __future__ import absolute_import
 
-from pyglet_helper.objects.material import Material, UNSHADED, EMISSIVE, \
-    DIFFUSE, PLASTIC, ROUGH, SHINY, CHROME, ICE, GLASS, BLAZED, SILVER, \
-    WOOD, MARBLE, EARTH, BLUEMARBLE, BRICKS
-from pyglet_helper.objects.renderable import Renderable, View
-from pyglet_helper.objects.primitive import Primitive
-from pyglet_helper.objects.rectangular import Rectangular
-from pyglet_helper.objects.box import Box
-from pyglet_helper.objects.pyramid import Pyramid
-from pyglet_helper.objects.arrow import Arrow
-from pyglet_helper.objects.axial import Axial
-from pyglet_helper.objects.cone import Cone
-from pyglet_helper.objects.cylinder import Cylinder
-from pyglet_helper.objects.sphere import Sphere
-from pyglet_helper.objects.ellipsoid import Ellipsoid
-from pyglet_helper.objects.light import Light
-from pyglet_helper.objects.ring import Ring
+from pyglet_helper._lazy import attach
+
+# The submodules are imported when one of their names is first used.
+__getattr__, __dir__, __all__ = attach(__name__, [
+    ('material', ['Material', 'UNSHADED', 'EMISSIVE', 'DIFFUSE', 'PLASTIC',
+                  'ROUGH', 'SHINY', 'CHROME', 'ICE', 'GLASS', 'BLAZED',
+                  'SILVER', 'WOOD', 'MARBLE', 'EARTH', 'BLUEMARBLE',
+                  'BRICKS']),
+    ('renderable', ['Renderable', 'View']),
+    ('scene', ['Scene']),
+    ('primitive', ['Primitive']),
+    ('rectangular', ['Rectangular']),
+    ('box', ['Box']),
+    ('pyramid', ['Pyramid']),
+    ('arrow', ['Arrow']),
+    ('axial', ['Axial']),
+    ('cone', ['Cone']),
+    ('cylinder', ['Cylinder']),
+    ('sphere', ['Sphere']),
+    ('ellipsoid', ['Ellipsoid']),
+    ('light', ['Light']),
+    ('ring', ['Ring'])])
@@ -5,8 +5,8 @@ try:
     from pyglet.gl import gl
 except Exception as error_msg:
     gl = None
-from pyglet_helper.objects import Box, Material, Primitive, Pyramid
-from pyglet_helper.util import Rgb, Tmatrix, Vector
+from pyglet_helper.objects import Box, Primitive, Pyramid
+from pyglet_helper.util import Rgb, Tmatrix, UseShaderProgram, Vector
 
 
 class Arrow(Primitive):
@@ -171,63 +171,63 @@ class Arrow(Primitive):
         :param scene: The view to render the model into.
         :type scene: pyglet_helper.objects.View
         """
-        mat = Material()
         if self.degenerate:
             return
         self.init_model(scene)
         self.color.gl_set(self.opacity)
         _head_width, _shaft_width, _len, _head_length = \
             self.effective_geometry(1.0)
-        if self.mat and self.mat.get_shader_program():
-            model_material_loc = self.mat.get_shader_program().\
-                get_uniform_location(scene, "model_material")
+        program = self.mat.active_program(scene) if self.mat else None
+        if program is not None:
+            model_material_loc = program.uniform_location("model_material")
         else:
             model_material_loc = -1
         # Render the shaft and the head in back to front order (the shaft is in
         # front of the head if axis points away from the camera)
         shaft = self.axis.dot(scene.camera - (self.pos + self.axis *
                                               (1 - _head_length / _len))) < 0
-        gl.glPushMatrix()
-        self.model_world_transform(scene.gcf).gl_mult()
+        with UseShaderProgram(scene, program):
+            gl.glPushMatrix()
+            self.model_world_transform(scene.gcf).gl_mult()
 
-        for part in range(0, 2):
-            if part == shaft:
-                gl.glScaled(_len - _head_length, _shaft_width, _shaft_width)
-                gl.glTranslated(0.5, 0, 0)
-                if model_material_loc >= 0:
-                    model_mat = Tmatrix()
-                    scale = 1.0 / max(_len, _head_width)
-                    _translation_magnitude = (_len - _head_length) * scale *\
-                                             0.5
-                    model_mat.translate(Vector([_translation_magnitude, 0.5,
-                                                0.5]))
-                    model_mat.scale(Vector([(_len - _head_length),
-                                            _shaft_width,
-                                            _shaft_width]) * scale)
-                    mat.get_shader_program().\
-                        set_uniform_matrix(scene, model_material_loc,
-                                           model_mat)
-                scene.box_model.gl_render()
-                gl.glTranslated(-0.5, 0, 0)
-                gl.glScaled(1 / (_len - _head_length), 1 / _shaft_width,
-                         1 / _shaft_width)
-            else:
-                gl.glTranslated(_len - _head_length, 0, 0)
-                gl.glScaled(_head_length, _head_width, _head_width)
-                if model_material_loc >= 0:
-                    model_mat = Tmatrix()
-                    _scale = 1.0 / max(_len, _head_width)
-                    model_mat.translate(Vector([(_len - _head_length) * _scale,
-                                                0.5, 0.5]))
-                    model_mat.scale(Vector([_head_length, _head_width,
-                                            _head_width]) * _scale)
-                    mat.get_shader_program().\
-                        set_uniform_matrix(scene, model_material_loc,
-                                           model_mat)
-                scene.pyramid_model.gl_render()
-                gl.glScaled(1 / _head_length, 1 / _head_width, 1 / _head_width)
-                gl.glTranslated(-_len + _head_length, 0, 0)
-        gl.glPopMatrix()
+            for part in range(0, 2):
+                if part == shaft:
+                    gl.glScaled(_len - _head_length, _shaft_width,
+                                _shaft_width)
+                    gl.glTranslated(0.5, 0, 0)
+                    if model_material_loc >= 0:
+                        model_mat = Tmatrix()
+                        scale = 1.0 / max(_len, _head_width)
+                        _translation_magnitude = (_len - _head_length) * \
+                            scale * 0.5
+                        model_mat.translate(Vector([_translation_magnitude,
+                                                    0.5, 0.5]))
+                        model_mat.scale(Vector([(_len - _head_length),
+                                                _shaft_width,
+                                                _shaft_width]) * scale)
+                        program.set_uniform_matrix(model_material_loc,
+                                                   model_mat)
+                    scene.box_model.gl_render()
+                    gl.glTranslated(-0.5, 0, 0)
+                    gl.glScaled(1 / (_len - _head_length),
+                                1 / _shaft_width, 1 / _shaft_width)
+                else:
+                    gl.glTranslated(_len - _head_length, 0, 0)
+                    gl.glScaled(_head_length, _head_width, _head_width)
+                    if model_material_loc >= 0:
+                        model_mat = Tmatrix()
+                        _scale = 1.0 / max(_len, _head_width)
+                        model_mat.translate(Vector([(_len - _head_length) *
+                                                    _scale, 0.5, 0.5]))
+                        model_mat.scale(Vector([_head_length, _head_width,
+                                                _head_width]) * _scale)
+                        program.set_uniform_matrix(model_material_loc,
+                                                   model_mat)
+                    scene.pyramid_model.gl_render()
+                    gl.glScaled(1 / _head_length, 1 / _head_width,
+                                1 / _head_width)
+                    gl.glTranslated(-_len + _head_length, 0, 0)
+            gl.glPopMatrix()
 
     def init_model(self, scene):
         """Add the arrow head and shaft to the scene.
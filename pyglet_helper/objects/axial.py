@@ -63,6 +63,16 @@ class Axial(Primitive):
         """
         self._radius = new_radius
 
+    @property
+    def bounding_radius(self):
+        """
+        Gets the radius of a sphere around the object's center which encloses
+        the object, used to cull it
+        :return: the radius
+        :rtype: float
+        """
+        return super(Axial, self).bounding_radius + self.radius
+
     @property
     def material_matrix(self):
         """
@@ -6,7 +6,7 @@ try:
 except ImportError:
     gl = None
 from pyglet_helper.objects import Rectangular
-from pyglet_helper.util import Rgb, Vector
+from pyglet_helper.util import COUNTERS, Rgb, Vector
 
 
 class Box(Rectangular):
@@ -41,11 +41,13 @@ class Box(Rectangular):
         """
         # Note that this model is also used by arrow!
         scene.box_model.gl_compile_begin()
-        gl.glEnable(gl.GL_CULL_FACE)
+        scene.gl_state.enable(gl.GL_CULL_FACE)
         gl.glBegin(gl.GL_TRIANGLES)
         self.generate_model()
         gl.glEnd()
-        gl.glDisable(gl.GL_CULL_FACE)
+        # Two triangles per face, inside and outside
+        COUNTERS.add_triangles(4 * (6 - self.skip_right_face))
+        scene.gl_state.disable(gl.GL_CULL_FACE)
         scene.box_model.gl_compile_end()
         self.initialized = True
 
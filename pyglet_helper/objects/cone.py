@@ -39,13 +39,13 @@ class Cone(Axial):
         # The number of faces corresponding to each level of detail.
         n_sides = [8, 16, 32, 46, 68, 90]
         n_stacks = [1, 2, 4, 7, 10, 14]
-        for i in range(0, 6):
-            scene.cone_model[i].gl_compile_begin()
-            _quadric = Quadric()
-            _quadric.render_cylinder(1.0, 1.0, n_sides[i], n_stacks[i],
-                                     top_radius=0.0)
-            _quadric.render_disk(1.0, n_sides[i], n_stacks[i] * 2, -1)
-            scene.cone_model[i].gl_compile_end()
+        with Quadric() as _quadric:
+            for i in range(0, 6):
+                scene.cone_model[i].gl_compile_begin()
+                _quadric.render_cylinder(1.0, 1.0, n_sides[i], n_stacks[i],
+                                         top_radius=0.0)
+                _quadric.render_disk(1.0, n_sides[i], n_stacks[i] * 2, -1)
+                scene.cone_model[i].gl_compile_end()
 
     def render(self, scene):
         """Add the cone to the scene.
@@ -56,7 +56,9 @@ class Cone(Axial):
         if self.radius == 0:
             return
 
-        self.init_model(scene)
+        # The models are compiled once, by the first cone drawn
+        if not scene.cone_model[0].compiled:
+            self.init_model(scene)
 
         coverage_levels = [10, 30, 90, 250, 450]
         lod = self.lod_adjust(scene, coverage_levels, self.pos, self.radius)
@@ -68,14 +70,14 @@ class Cone(Axial):
 
         self.color.gl_set(self.opacity)
         if self.translucent:
-            gl.glEnable(gl.GL_CULL_FACE)
+            scene.gl_state.enable(gl.GL_CULL_FACE)
 
             # Render the back half.
-            gl.glCullFace(gl.GL_FRONT)
+            scene.gl_state.cull_face(gl.GL_FRONT)
             scene.cone_model[lod].gl_render()
 
             # Render the front half.
-            gl.glCullFace(gl.GL_BACK)
+            scene.gl_state.cull_face(gl.GL_BACK)
             scene.cone_model[lod].gl_render()
         else:
             scene.cone_model[lod].gl_render()
@@ -39,15 +39,17 @@ class Cylinder(Axial):
         # The number of faces corresponding to each level of detail.
         n_faces = [8, 16, 32, 64, 96, 188]
         n_stacks = [1, 1, 3, 6, 10, 20]
-        for i in range(0, 6):
-            scene.cylinder_model[i].gl_compile_begin()
-            _quadric = Quadric()
-            _quadric.render_cylinder(1.0, 1.0, n_faces[i], n_stacks[i])
-            gl.glTranslatef(1.0, 0.0, 0.0)
-            _quadric.render_disk(1.0, n_faces[i], 1, 1)  # left end of cylinder
-            gl.glTranslatef(-1.0, 0.0, 0.0)
-            _quadric.render_disk(1.0, n_faces[i], 1, -1)  # right end of
-            scene.cylinder_model[i].gl_compile_end()
+        with Quadric() as _quadric:
+            for i in range(0, 6):
+                scene.cylinder_model[i].gl_compile_begin()
+                _quadric.render_cylinder(1.0, 1.0, n_faces[i], n_stacks[i])
+                gl.glTranslatef(1.0, 0.0, 0.0)
+                # left end of cylinder
+                _quadric.render_disk(1.0, n_faces[i], 1, 1)
+                gl.glTranslatef(-1.0, 0.0, 0.0)
+                # right end of cylinder
+                _quadric.render_disk(1.0, n_faces[i], 1, -1)
+                scene.cylinder_model[i].gl_compile_end()
 
     @property
     def degenerate(self):
@@ -65,7 +67,9 @@ class Cylinder(Axial):
         """
         if self.radius == 0.0:
             return
-        self.init_model(scene)
+        # The models are compiled once, by the first cylinder drawn
+        if not scene.cylinder_model[0].compiled:
+            self.init_model(scene)
 
         coverage_levels = [10, 25, 50, 196, 400]
         lod = self.lod_adjust(scene, coverage_levels, self.pos, self.radius)
@@ -75,15 +79,15 @@ class Cylinder(Axial):
                                                       self.radius])).gl_mult()
 
         if self.translucent:
-            gl.glEnable(gl.GL_CULL_FACE)
+            scene.gl_state.enable(gl.GL_CULL_FACE)
             self.color.gl_set(self.opacity)
 
             # Render the back half.
-            gl.glCullFace(gl.GL_FRONT)
+            scene.gl_state.cull_face(gl.GL_FRONT)
             scene.cylinder_model[lod].gl_render()
 
             # Render the front half.
-            gl.glCullFace(gl.GL_BACK)
+            scene.gl_state.cull_face(gl.GL_BACK)
             scene.cylinder_model[lod].gl_render()
         else:
             self.color.gl_set(self.opacity)
@@ -30,9 +30,77 @@ class Light(Renderable):
         super(Light, self).__init__(color=color)
         self.color = None
         self.rgb = color
-        self.specular = (gl.GLfloat * 4)(*specular)
-        self.diffuse = (gl.GLfloat * 4)(*diffuse)
-        self.position = (gl.GLfloat * 4)(*position)
+        # Incremented whenever the light changes, so that the colors of the
+        # lights are only uploaded to a context if they changed since they
+        # were last uploaded to it.
+        self.version = 0
+        # The arrays passed to glLightfv, updated in place
+        self._specular = (gl.GLfloat * 4)(*specular)
+        self._diffuse = (gl.GLfloat * 4)(*diffuse)
+        self._position = (gl.GLfloat * 4)(*position)
+
+    def changed(self):
+        """ Mark the light as changed, e.g., after modifying the elements of
+        its colors, so that views upload it again.
+        """
+        self.version += 1
+
+    @property
+    def specular(self):
+        """
+        Gets the color of the specular reflections of the light
+        :return: the color
+        :rtype: ctypes array of 4 GLfloat
+        """
+        return self._specular
+
+    @specular.setter
+    def specular(self, new_specular):
+        """
+        Sets the color of the specular reflections of the light
+        :param new_specular: the new color
+        :type new_specular: array_like
+        """
+        self._specular[:] = tuple(new_specular)
+        self.changed()
+
+    @property
+    def diffuse(self):
+        """
+        Gets the color of the diffuse reflections of the light
+        :return: the color
+        :rtype: ctypes array of 4 GLfloat
+        """
+        return self._diffuse
+
+    @diffuse.setter
+    def diffuse(self, new_diffuse):
+        """
+        Sets the color of the diffuse reflections of the light
+        :param new_diffuse: the new color
+        :type new_diffuse: array_like
+        """
+        self._diffuse[:] = tuple(new_diffuse)
+        self.changed()
+
+    @property
+    def position(self):
+        """
+        Gets the light's position, with w=0 for a directional light
+        :return: the position
+        :rtype: ctypes array of 4 GLfloat
+        """
+        return self._position
+
+    @position.setter
+    def position(self, new_position):
+        """
+        Sets the light's position
+        :param new_position: the new position
+        :type new_position: array_like
+        """
+        self._position[:] = tuple(new_position)
+        self.changed()
 
     @property
     def rgb(self):
@@ -93,10 +161,11 @@ class Light(Renderable):
         return True
 
     def render(self, scene):
-        """ Add the light to the scene.
+        """ Add the light to the view, if it is not already in it, and
+        upload the view's lights.
         :param scene: The view to render the model into
         :type scene: pyglet_helper.objects.View
         """
-        scene.lights.append(self)
+        scene.add_light(self)
         scene.draw_lights()
 
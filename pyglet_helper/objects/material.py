@@ -1,7 +1,7 @@
 """ pyglet_helper.material contains an object for describing materials which
 can be applied to objects
 """
-from pyglet_helper.util import ShaderProgram, Texture
+from pyglet_helper.util import PROGRAMS, ShaderProgram, Texture
 
 
 class Material(object):
@@ -49,7 +49,7 @@ class Material(object):
         :return: the shader program
         :rtype: pyglet_helper.util.ShaderProgram
         """
-        if hasattr(self, '_shader') and type(self._shader) == 'shader_program':
+        if isinstance(getattr(self, '_shader', None), ShaderProgram):
             return self._shader
         else:
             return None
@@ -62,7 +62,8 @@ class Material(object):
         :type source: str
         """
         if source is not None:
-            self._shader = ShaderProgram(source)
+            # Materials with the same source share one program.
+            self._shader = PROGRAMS.get(source)
         else:
             self._shader = None
 
@@ -93,6 +94,37 @@ class Material(object):
         else:
             return None
 
+    def active_program(self, view):
+        """
+        Get the program to draw the material with: the permutation of its
+        program the view picks for its lights, see View.program_for()
+        :param view: the view the material is drawn in
+        :type view: pyglet_helper.objects.View
+        :return: the program, or None to use the fixed function pipeline
+        :rtype: pyglet_helper.util.ShaderProgram
+        """
+        return view.program_for(self)
+
+    def fallback_program(self, view):
+        """
+        Get the program to draw the material with until its permutation is
+        ready: its own once it is ready, and until then the cheap unshaded
+        program, so that drawing never waits for a program to compile
+        :param view: the view the material is drawn in
+        :type view: pyglet_helper.objects.View
+        :return: the program, or None to use the fixed function pipeline
+        :rtype: pyglet_helper.util.ShaderProgram
+        """
+        program = self.shader
+        if program is None or program.ready:
+            return program
+        fallback = UNSHADED.shader
+        if fallback is not program:
+            fallback.realize(view)
+            if fallback.ready:
+                return fallback
+        return None
+
 
 UNSHADED = Material(shader_program="""
 [vertex]
@@ -276,7 +308,7 @@ WOOD = Material(shader_program="""
                             -.05 * noise3D(tex1, mat_pos * .5, 1.).xy;   //< turbulence so grain isn't perfectly straight
 
             // Look up the color in the texture
-            vec3 C = texture2D( tex0, wood_pos ).rgb;
+            vec3 C = textureLayer( tex0_layer, wood_pos ).rgb;
 
             // Apply lighting
             material_color = lightAt( normalize(normal), normalize(-position),
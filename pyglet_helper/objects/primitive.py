@@ -3,7 +3,7 @@ pyglet_helper.primitive contains objects and methods related to drawing all
 geometric shapes
 """
 from pyglet_helper.objects import Material, Renderable
-from pyglet_helper.util import Rgb, rotation, Tmatrix, Vector
+from pyglet_helper.util import COUNTERS, Rgb, rotation, Tmatrix, Vector
 
 
 
@@ -36,6 +36,8 @@ class Primitive(Renderable):
         self._up = None
         self._width = None
         self._height = None
+        # The inputs of the last transform computed, and the transform
+        self._transform = None
 
         self.startup = True
         self.obj_initialized = obj_initialized
@@ -57,8 +59,17 @@ class Primitive(Renderable):
         :rtype: pyglet_helper.util.Tmatrix
         :returns:  Returns a tmatrix that performs reorientation of the object
         from model orientation to world
-         (and view) orientation.
-        """
+         (and view) orientation. The tmatrix is reused until the object
+         moves, so it must not be modified.
+        """
+        # The transform is only recomputed when one of its inputs changed,
+        # so an object drawn into several views is transformed once.
+        key = (world_scale,) + tuple(
+            vector[i] for vector in (object_scale, self.pos, self.axis,
+                                     self.up_vector) for i in range(3))
+        if self._transform is not None and self._transform[0] == key:
+            return self._transform[1]
+        COUNTERS.transform()
         ret = Tmatrix()
         # A unit vector along the z_axis.
         z_axis = Vector([0, 0, 1])
@@ -84,6 +95,7 @@ class Primitive(Renderable):
 
         ret.scale(object_scale * world_scale, 1)
 
+        self._transform = (key, ret)
         return ret
 
     def rotate(self, angle, axis, origin):
@@ -118,6 +130,17 @@ class Primitive(Renderable):
         """
         return self.pos
 
+    @property
+    def bounding_radius(self):
+        """
+        Gets the radius of a sphere around the object's center which encloses
+        the object, used to cull it
+        :return: the radius
+        :rtype: float
+        """
+        size = Vector([self.length, self.height or 0.0, self.width or 0.0])
+        return (self.center - self.pos).mag() + size.mag()
+
     @property
     def pos(self):
         """
@@ -6,7 +6,7 @@ try:
 except Exception as error_msg:
     gl = None
 from pyglet_helper.objects import Rectangular
-from pyglet_helper.util import Rgb, Tmatrix, Vector
+from pyglet_helper.util import COUNTERS, Rgb, Tmatrix, Vector
 
 
 class Pyramid(Rectangular):
@@ -58,7 +58,7 @@ class Pyramid(Rectangular):
         normals = [[1, 2, 0], [1, -2, 0], [1, 0, 2], [1, 0, -2], [-1, 0, 0],
                    [-1, 0, 0]]
 
-        gl.glEnable(gl.GL_CULL_FACE)
+        scene.gl_state.enable(gl.GL_CULL_FACE)
         gl.glBegin(gl.GL_TRIANGLES)
 
         # Inside
@@ -79,7 +79,9 @@ class Pyramid(Rectangular):
                                 face][vertex]]])
 
         gl.glEnd()
-        gl.glDisable(gl.GL_CULL_FACE)
+        # Six triangles, inside and outside
+        COUNTERS.add_triangles(12)
+        scene.gl_state.disable(gl.GL_CULL_FACE)
         self.compiled = True
 
         scene.pyramid_model.gl_compile_end()
@@ -1,13 +1,36 @@
 """
 pyglet_helper.renderable contains objects needed to draw all geometric shapes
 """
+import weakref
 try:
     import pyglet.gl as gl
 except ImportError:
     gl = None
 
-from pyglet_helper.util import DisplayList, Rgb, Tmatrix, Vector
+from pyglet_helper.util import COUNTERS, DepthSorter, FrameStats, \
+    FrameTimeHistogram, GEOMETRY, PERMUTATIONS, RenderCounters, Rgb, \
+    ShaderWarmup, Tmatrix, Vector, current_share_group, current_state, \
+    permutation_defines, resources_for
+from pyglet_helper.util.render_stats import CLOCK
 from pyglet_helper.objects import Material
+from pyglet_helper.objects.scene import Scene
+
+# The share groups of the views using shared models, by weak references to
+# the views. The references are kept here, rather than on the views, so that
+# their callbacks run even when a view is collected as part of a reference
+# cycle.
+_GEOMETRY_REFS = {}
+
+
+def _release_geometry(ref):
+    """ Release the models of a view which was garbage collected without
+    gl_free() being called.
+
+    :param ref: the weak reference to the view
+    :type ref: weakref.ref
+    """
+    GEOMETRY.release(_GEOMETRY_REFS.pop(ref))
+
 
 class Renderable(object):
     """
@@ -98,7 +121,9 @@ class View(object):
     def __init__(self, gcf=1.0, view_width=800, view_height=600,
                  anaglyph=False, coloranaglyph=False, forward_changed=False,
                  gcf_changed=False, lod_adjust=0, tan_hfov_x=0, tan_hfov_y=0,
-                 enable_shaders=True, background_color=Rgb()):
+                 enable_shaders=True, background_color=Rgb(),
+                 frame_history=300, share_group=None, viewport=None,
+                 warmup=None):
         """
         :param gcf: The global scaling factor, a coefficient applied to all 
         objects in the view
@@ -129,6 +154,23 @@ class View(object):
         :type enable_shaders: bool
         :param background_color: The scene's background color
         :type background_color: pyglet_helper.util.Rgb
+        :param frame_history: The number of frame times kept for reporting
+        percentiles. If 0, frame times are not kept.
+        :type frame_history: int
+        :param share_group: The share group of the view's OpenGL context. The
+        views of a share group use the same display lists for their models,
+        and the same manager for their OpenGL objects. Defaults to that of
+        the current context, if any.
+        :type share_group: object
+        :param viewport: The x, y, width and height, in pixels, of the part of
+        the window the view is drawn into. If None, the viewport is left as
+        it is.
+        :type viewport: tuple
+        :param warmup: The warmup the permutations of the materials' programs
+        are compiled by, polled each frame. Defaults to one of the view's
+        own, which compiles them in the background if the driver can, and
+        otherwise one per frame.
+        :type warmup: pyglet_helper.util.ShaderWarmup
         """
         # The position of the camera in world space.
         self.camera = Vector()
@@ -140,6 +182,7 @@ class View(object):
         self.up_vector = Vector()
         self.view_width = view_width
         self.view_height = view_height
+        self.viewport = viewport
         self.forward_changed = forward_changed
         self.gcf = gcf
         # The vector version of the Global Scaling Factor, for scene.uniform=0
@@ -151,52 +194,367 @@ class View(object):
         self.tan_hfov_x = tan_hfov_x
         self.tan_hfov_y = tan_hfov_y
 
-        self.box_model = DisplayList()
-        self.sphere_model = [DisplayList()] * 6
-        self.cylinder_model = [DisplayList()] * 6
-        self.cone_model = [DisplayList()] * 6
-        self.pyramid_model = DisplayList()
+        # The built-in models are shared with the other views whose context
+        # shares objects with this one's.
+        if share_group is None:
+            share_group = current_share_group()
+        # The manager of the OpenGL objects of the view's share group, whose
+        # garbage is collected while the view's context is current
+        self.resources = resources_for(share_group)
+        if share_group is None:
+            # Without a context to ask, the view gets models of its own.
+            share_group = object()
+        self.share_group = share_group
+        self.geometry = GEOMETRY.acquire(share_group, self.resources)
+        # Releases the models if the view is garbage collected without
+        # gl_free() being called
+        self._geometry_ref = weakref.ref(self, _release_geometry)
+        _GEOMETRY_REFS[self._geometry_ref] = share_group
+        self.box_model = self.geometry.box
+        self.sphere_model = self.geometry.sphere
+        self.cylinder_model = self.geometry.cylinder
+        self.cone_model = self.geometry.cone
+        self.pyramid_model = self.geometry.pyramid
 
         self.camera_world = Tmatrix()
 
         self.background_color = background_color
+        # The lights added to the view, lit in every frame; only the first
+        # eight of these and the scene's lights are used
         self.lights = []
+        # The lights of the scene being drawn
+        self._scene_lights = []
 
         self.enable_shaders = enable_shaders
+        if warmup is None:
+            warmup = ShaderWarmup(programs=[])
+        self.warmup = warmup
         self.screen_objects = []
+        # The shadowed state of the view's OpenGL context, used to drop
+        # redundant state changes. It is shared with the other views drawn
+        # into the context, and with the objects drawn while it is current.
+        self.gl_state = current_state()
+        # Keeps the back to front order of the translucent objects between
+        # frames.
+        self.depth_sorter = DepthSorter()
+        # The work done while drawing into this view
+        self.counters = RenderCounters()
+        # The scene draw() prepares the objects in, reused every frame
+        self._scene = Scene(cull=False, group_materials=False)
+        # The statistics of the last frame drawn
+        self.stats = FrameStats()
+        # The times of the recent frames
+        if frame_history:
+            self.frame_times = FrameTimeHistogram(frame_history)
+        else:
+            self.frame_times = None
         self.is_setup = False
         self.setup()
+        # The first frame starts when it is drawn, not when the view is made.
+        self._frame_start = None
+
+    def _start_frame(self, now):
+        """ Take the snapshots the statistics of the next frame are measured
+        from.
+
+        :param now: the time the frame starts
+        :type now: float
+        """
+        self._frame_start = now
+        self._frame_counters = self.counters.snapshot()
+        self._frame_state = (self.gl_state.issued, self.gl_state.skipped)
+        self._stage_times = {}
+        self._culled = 0
+
+    def begin_frame(self):
+        """ Start measuring the next frame now. setup() and Scene.draw() call
+        this; otherwise draw() and draw_scene() do, so that the frame leaves
+        out whatever happened since the last one, e.g., the application's
+        own work, or waiting for the buffers to swap.
+        """
+        self._start_frame(CLOCK())
+
+    def _render(self, obj):
+        """ Render an object, counting it as culled if it drew nothing.
+
+        :param obj: The object to render
+        :type obj: pyglet_helper.objects.Renderable
+        """
+        draw_calls = self.counters.draw_calls
+        obj.render(self)
+        if self.counters.draw_calls == draw_calls:
+            self._culled += 1
 
     def setup(self):
-        """ Does some one-time OpenGL setup.
+        """ Does some one-time OpenGL setup. Call it at the start of a frame,
+        before draw(); the frame's statistics are measured from here.
         """
-        gl.glEnable(gl.GL_LIGHTING)
+        self.begin_frame()
+        # The state may have been changed outside of pyglet_helper since the
+        # last frame. The lights' parameters are assumed to be unchanged; see
+        # invalidate_lights().
+        self.gl_state.invalidate()
+        self.gl_state.enable(gl.GL_LIGHTING)
         gl.glClearColor(1, 1, 1, 1)
         gl.glColor3f(1, 0, 0)
-        gl.glEnable(gl.GL_DEPTH_TEST)
-        gl.glEnable(gl.GL_CULL_FACE)
+        self.gl_state.enable(gl.GL_DEPTH_TEST)
+        self.gl_state.enable(gl.GL_CULL_FACE)
         gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
         gl.glLoadIdentity()
         self.is_setup = True
 
+    @property
+    def models(self):
+        """
+        Get the display lists of the view's shared models
+        :return: the display lists
+        :rtype: list of pyglet_helper.util.DisplayList
+        """
+        return self.geometry.lists
+
+    def gl_free(self):
+        """ Stop using the shared models, freeing their display lists if no
+        other view uses them, and delete the OpenGL objects whose owners were
+        garbage collected. Call it before the view's context is destroyed;
+        the view must not be drawn afterwards.
+        """
+        if self.geometry is not None:
+            _GEOMETRY_REFS.pop(self._geometry_ref, None)
+            self._geometry_ref = None
+            GEOMETRY.release(self.share_group)
+            self.geometry = None
+        self.resources.collect()
+        if self.resources.debug:
+            self.resources.report()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.gl_free()
+
+    def add_light(self, light):
+        """ Add a light to the view, if it is not already in it. The view's
+        lights are lit in every frame, along with the scene's.
+
+        :param light: the light to add
+        :type light: pyglet_helper.objects.Light
+        """
+        if light not in self.lights:
+            self.lights.append(light)
+
+    def set_lights(self, lights):
+        """ Make the given lights the view's lights. Lights which are no
+        longer lit have their slots disabled by the next draw_lights().
+
+        :param lights: the lights
+        :type lights: list of pyglet_helper.objects.Light
+        """
+        self.lights = list(lights)
+
+    def remove_light(self, light):
+        """ Remove a light from the view. The lights after it move up a slot,
+        and are uploaded again by the next draw_lights().
+
+        :param light: the light to remove
+        :type light: pyglet_helper.objects.Light
+        """
+        self.lights.remove(light)
+
+    @property
+    def active_lights(self):
+        """
+        Get the lights lit in the current frame: the view's lights, then the
+        lights of the scene being drawn which are not among them
+        :return: the lights
+        :rtype: list of pyglet_helper.objects.Light
+        """
+        lights = self.lights
+        extra = [light for light in self._scene_lights if light not in lights]
+        return lights + extra if extra else lights
+
+    def invalidate_lights(self):
+        """ Forget the lights' parameters uploaded to the view's context, so
+        that the next draw_lights() uploads or disables every slot, e.g.,
+        after the lights were changed outside of pyglet_helper.
+        """
+        self.gl_state.invalidate_lights([gl.GL_LIGHT0, gl.GL_LIGHT1,
+                                         gl.GL_LIGHT2, gl.GL_LIGHT3,
+                                         gl.GL_LIGHT4, gl.GL_LIGHT5,
+                                         gl.GL_LIGHT6, gl.GL_LIGHT7])
+
     def draw_lights(self):
-        """ Render the lights in the scene
+        """ Upload the lights lit in the current frame, and disable the slots
+        no longer used. The positions are uploaded every time, since OpenGL
+        transforms them by the modelview matrix of the view's camera; the
+        colors are only uploaded if they changed, or the light moved to
+        another slot, since they were last uploaded to the view's context.
+        draw() calls this once per frame.
         """
         GL_DEFINED_LIGHTS = [gl.GL_LIGHT0, gl.GL_LIGHT1,
                          gl.GL_LIGHT2, gl.GL_LIGHT3,
                          gl.GL_LIGHT4, gl.GL_LIGHT5,
                          gl.GL_LIGHT6, gl.GL_LIGHT7]
-        max_lights = min(len(self.lights), 8)
+        lights = self.active_lights
+        max_lights = min(len(lights), 8)
         # add all of the lights to the scene
         for i in range(0, max_lights):
+            light = lights[i]
             # enable all of the lights
-            gl.glEnable(GL_DEFINED_LIGHTS[i])
-            gl.glLightfv(GL_DEFINED_LIGHTS[i], gl.GL_POSITION, self.lights[
-                i].position)
-            gl.glLightfv(GL_DEFINED_LIGHTS[i], gl.GL_SPECULAR,
-                      self.lights[i].specular)
-            gl.glLightfv(GL_DEFINED_LIGHTS[i], gl.GL_DIFFUSE,
-                                self.lights[i].diffuse)
+            self.gl_state.enable(GL_DEFINED_LIGHTS[i])
+            gl.glLightfv(GL_DEFINED_LIGHTS[i], gl.GL_POSITION, light.position)
+            self.gl_state.light_v(GL_DEFINED_LIGHTS[i], gl.GL_SPECULAR,
+                                  light.specular, light.version)
+            self.gl_state.light_v(GL_DEFINED_LIGHTS[i], gl.GL_DIFFUSE,
+                                  light.diffuse, light.version)
+        for i in range(max_lights, 8):
+            self.gl_state.disable(GL_DEFINED_LIGHTS[i])
+
+    def shader_features(self, material):
+        """
+        Get the macros selecting the permutation of a material's program for
+        the view's current lights
+        :param material: the material to be drawn
+        :type material: pyglet_helper.objects.Material
+        :return: the values of the macros, by name
+        :rtype: dict
+        """
+        return permutation_defines(light_count=len(self.active_lights))
+
+    def program_for(self, material):
+        """
+        Get the program to draw a material with: the permutation of its
+        program specialised for the view's lights once that is ready, and
+        until then material.fallback_program(). A permutation which is not
+        ready is queued to the view's warmup, so drawing never waits for it
+        to compile. Material.active_program() calls this.
+        :param material: the material to be drawn
+        :type material: pyglet_helper.objects.Material
+        :return: the program, or None to use the fixed function pipeline
+        :rtype: pyglet_helper.util.ShaderProgram
+        """
+        program = material.shader
+        if program is None or not self.enable_shaders:
+            return None
+        permutation = PERMUTATIONS.get(program,
+                                       self.shader_features(material))
+        if permutation.ready:
+            return permutation
+        if self.warmup.mode is None:
+            self.warmup.start(self)
+        self.warmup.add(permutation)
+        return material.fallback_program(self)
+
+    def draw(self, objects):
+        """ Render a frame. The lights among the objects are lit along with
+        the view's lights, and are uploaded. Opaque objects are rendered
+        next, in the order given, then the translucent objects are rendered
+        from back to front.
+        The statistics of the frame are stored in stats; the frame starts
+        at setup(), if it was called since the last frame, and otherwise
+        here.
+
+        :param objects: The objects to render
+        :type objects: list of pyglet_helper.objects.Renderable
+        """
+        if self._frame_start is None:
+            self.begin_frame()
+        scene = self._scene
+        scene.objects = list(objects)
+        scene.prepare()
+        try:
+            self.draw_scene(scene)
+        finally:
+            # The objects are not kept alive until the next frame.
+            scene.clear()
+
+    def draw_scene(self, scene):
+        """ Render a frame of a Scene which has been prepared, e.g., by
+        Scene.draw(). Only the work which depends on the view's camera is
+        done here: the objects outside of the field of view are culled,
+        the objects choose their levels of detail, and the translucent
+        objects are sorted.
+        The statistics of the frame are stored in stats; the frame starts
+        at setup() or Scene.draw(), if either was called since the last
+        frame, and otherwise here. Only the work done while drawing into
+        this view is counted.
+
+        :param scene: The scene to render
+        :type scene: pyglet_helper.objects.Scene
+        """
+        start = CLOCK()
+        if self._frame_start is None:
+            self._start_frame(start)
+        self._stage_times['setup'] = start - self._frame_start
+        drawing = COUNTERS.view_counters
+        COUNTERS.view_counters = self.counters
+        try:
+            self._draw_scene(scene, start)
+        finally:
+            COUNTERS.view_counters = drawing
+
+    def _draw_scene(self, scene, start):
+        """ Render the objects of a frame, and measure it.
+
+        :param scene: The scene to render
+        :type scene: pyglet_helper.objects.Scene
+        :param start: The time drawing started
+        :type start: float
+        """
+        # The objects released by the garbage collector since the last frame
+        self.resources.collect()
+        # The permutations queued by earlier frames which are now compiled
+        if self.warmup.mode is not None:
+            self.warmup.poll()
+        if self.viewport is not None:
+            gl.glViewport(*self.viewport)
+        # The lights are uploaded before the objects they light are drawn.
+        self._scene_lights = scene.lights
+        self.draw_lights()
+        opaque, translucent, centers, culled = scene.visible(self)
+        self._culled += culled
+        for obj in opaque:
+            self._render(obj)
+        self._stage_times['opaque'] = CLOCK() - start
+        self.draw_translucent(translucent, centers)
+
+        end = CLOCK()
+        issued, skipped = self._frame_state
+        self.stats = FrameStats.between(
+            self._frame_counters, self.counters.snapshot(),
+            objects_submitted=len(scene), objects_culled=self._culled,
+            state_changes=self.gl_state.issued - issued,
+            state_changes_skipped=self.gl_state.skipped - skipped,
+            stage_times=self._stage_times)
+        if self.frame_times is not None:
+            self.frame_times.add(end - self._frame_start)
+        self._frame_start = None
+
+    def draw_translucent(self, objects, centers=None):
+        """ Render translucent objects sorted by decreasing distance from
+        the camera, so that each one is blended over the objects behind it.
+
+        :param objects: The translucent objects to render
+        :type objects: list of pyglet_helper.objects.Renderable
+        :param centers: The objects' centers, if they are already known
+        :type centers: array_like
+        """
+        if not objects:
+            return
+        self.gl_state.enable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        # Translucent objects are depth tested against the opaque ones, but
+        # must not hide each other.
+        self.gl_state.depth_mask(gl.GL_FALSE)
+        start = CLOCK()
+        objects = self.depth_sorter.sort(objects, self.camera, centers)
+        sorted_time = CLOCK()
+        for obj in objects:
+            self._render(obj)
+        self.gl_state.depth_mask(gl.GL_TRUE)
+        self.gl_state.disable(gl.GL_BLEND)
+        self._stage_times['sort'] = sorted_time - start
+        self._stage_times['translucent'] = CLOCK() - sorted_time
 
     def pixel_coverage(self, pos, radius):
         """ Compute the apparent diameter, in pixels, of a circle that is
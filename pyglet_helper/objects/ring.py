@@ -4,7 +4,7 @@ try:
 except Exception as error_msg:
     gl = None
 from pyglet_helper.objects import Axial
-from pyglet_helper.util import Rgb, Tmatrix, Vector
+from pyglet_helper.util import COUNTERS, DisplayList, Rgb, Tmatrix, Vector
 from math import pi, sin, cos, sqrt
 
 
@@ -55,6 +55,16 @@ class Ring(Axial):
         """
         self._thickness = new_thickness
 
+    @property
+    def bounding_radius(self):
+        """
+        Gets the radius of a sphere around the ring's center which encloses
+        the ring, used to cull it
+        :return: the radius
+        :rtype: float
+        """
+        return self.radius + (self.thickness or self.radius * 0.1)
+
     @property
     def material_matrix(self):
         """
@@ -147,9 +157,10 @@ class Ring(Axial):
                 indices.extend([pos, pos + inner_slices + 1, pos + 1])
         indices = (gl.GLuint * len(indices))(*indices)
 
-        # Compile a display list
-        self.list = gl.glGenLists(1)
-        gl.glNewList(self.list, gl.GL_COMPILE)
+        # Compile a display list, reusing the ring's list from earlier frames
+        if self.list is None:
+            self.list = DisplayList(resources=scene.resources)
+        self.list.gl_compile_begin()
         self.color.gl_set(self.opacity)
 
         gl.glPushClientAttrib(gl.GL_CLIENT_VERTEX_ARRAY_BIT)
@@ -163,10 +174,18 @@ class Ring(Axial):
         gl.glNormalPointer(gl.GL_FLOAT, 0, normals)
         gl.glDrawElements(gl.GL_TRIANGLES, len(indices), gl.GL_UNSIGNED_INT,
                           indices)
+        COUNTERS.add_triangles(len(indices) // 3)
         gl.glPopClientAttrib()
 
-        gl.glEndList()
-        gl.glCallList(self.list)
+        self.list.gl_compile_end()
+        self.list.gl_render()
+
+    def gl_free(self):
+        """ Give back the ring's display list.
+        """
+        if self.list is not None:
+            self.list.gl_free()
+            self.list = None
 
 
 def clamp(lower, value, upper):
@@ -0,0 +1,255 @@
+"""
+pyglet_helper.scene contains an object for drawing the same objects into
+several views, e.g., an overview, a close-up and a side view, sharing the work
+which does not depend on the camera between them
+
+    scene = Scene([Box(), Sphere(pos=Vector([0, 0, -5]))])
+    scene.draw([overview, close_up])
+"""
+from numpy import array, asarray, cross, inf, ones, sqrt, zeros
+
+
+def material_key(obj):
+    """
+    Get the key the opaque objects of a scene are grouped by, so that the
+    objects drawn with the same program and textures are drawn one after
+    another
+    :param obj: the object
+    :type obj: pyglet_helper.objects.Renderable
+    :return: the ids of the object's program and loaded textures, with the
+    textures packed into a texture array replaced by the array
+    :rtype: tuple
+    """
+    mat = getattr(obj, 'mat', None)
+    if not mat:
+        return 0, ()
+    program = 0 if mat.shader is None else id(mat.shader)
+    packed = getattr(mat, 'texture_array', None)
+    textures = []
+    for texture in mat.textures or []:
+        if packed is not None and texture in packed:
+            # The materials sampling the same array bind the same texture.
+            key = id(packed)
+        elif texture.loaded:
+            key = id(texture)
+        else:
+            # Checking loaded, rather than the data, leaves lazily loaded
+            # textures unread until they are drawn.
+            continue
+        if key not in textures:
+            textures.append(key)
+    return program, tuple(textures)
+
+
+def bounding_sphere(obj):
+    """
+    Get a sphere enclosing an object
+    :param obj: the object
+    :type obj: pyglet_helper.objects.Renderable
+    :return: the sphere's center and radius. The radius is infinite if the
+    object does not know its bounds.
+    :rtype: tuple
+    """
+    center = getattr(obj, 'center', None)
+    radius = getattr(obj, 'bounding_radius', None)
+    if center is None:
+        return (0.0, 0.0, 0.0), inf
+    center = (center[0], center[1], center[2])
+    return center, inf if radius is None else radius
+
+
+def _components(vector):
+    """
+    Copy a vector into an array
+    :param vector: the vector
+    :type vector: pyglet_helper.util.Vector
+    :return: the vector's components
+    :rtype: numpy.ndarray
+    """
+    return array([vector[0], vector[1], vector[2]], dtype=float)
+
+
+def view_space(points, camera, forward, up_vector):
+    """
+    Transform points from world space into the camera's space, where x is to
+    the right, y is up and z is the distance in front of the camera
+    :param points: the points, with shape (n, 3)
+    :type points: array_like
+    :param camera: the position of the camera
+    :type camera: pyglet_helper.util.Vector
+    :param forward: the direction the camera is pointing
+    :type forward: pyglet_helper.util.Vector
+    :param up_vector: the up direction of the scene
+    :type up_vector: pyglet_helper.util.Vector
+    :return: the points, with shape (n, 3)
+    :rtype: numpy.ndarray
+    """
+    forward = _components(forward)
+    right = cross(forward, _components(up_vector))
+    if not right.any():
+        raise ValueError("The camera's space needs a forward direction which "
+                         "is not parallel to the up direction")
+    forward /= sqrt((forward ** 2).sum())
+    right /= sqrt((right ** 2).sum())
+    basis = array([right, cross(right, forward), forward])
+    return (asarray(points, dtype=float).reshape(-1, 3) -
+            _components(camera)).dot(basis.T)
+
+
+def in_view(centers, radii, view):
+    """
+    Test which spheres are at least partly inside a view's field of view
+    :param centers: the centers of the spheres, with shape (n, 3)
+    :type centers: numpy.ndarray
+    :param radii: the radii of the spheres
+    :type radii: numpy.ndarray
+    :param view: the view
+    :type view: pyglet_helper.objects.View
+    :return: True for each sphere which may be seen
+    :rtype: numpy.ndarray
+    """
+    visible = ones(len(radii), dtype=bool)
+    if not len(radii) or not view.forward.nonzero():
+        # Without a direction, nothing can be told to be out of sight.
+        return visible
+    forward = _components(view.forward)
+    forward /= sqrt((forward ** 2).sum())
+    # Objects entirely behind the camera
+    visible &= (centers - _components(view.camera)).dot(forward) + radii > 0
+    if view.tan_hfov_x <= 0 or view.tan_hfov_y <= 0 or \
+            not cross(forward, _components(view.up_vector)).any():
+        return visible
+    points = view_space(centers, view.camera, view.forward, view.up_vector)
+    depth = points[:, 2]
+    for axis, tan_hfov in ((0, view.tan_hfov_x), (1, view.tan_hfov_y)):
+        # The distance of each center outside of the planes on either side
+        # of the view, scaled by the length of the planes' normals
+        reach = radii * sqrt(1.0 + tan_hfov ** 2)
+        outside = abs(points[:, axis]) - tan_hfov * depth
+        visible &= outside <= reach
+    return visible
+
+
+class Scene(object):
+    """
+    The objects drawn into one or more views. Once per frame, prepare()
+    does the work which does not depend on the camera: the lights are picked
+    out, the opaque objects grouped by material, and the bounds of the
+    objects measured. Each view then only culls, sorts, and chooses the
+    levels of detail of the objects for its own camera. The objects'
+    transforms are cached by the objects themselves, so the views after the
+    first, with the same gcf, reuse them.
+    """
+    def __init__(self, objects=None, cull=True, group_materials=True):
+        """
+        :param objects: The objects in the scene, including its lights
+        :type objects: list of pyglet_helper.objects.Renderable
+        :param cull: If True, the objects outside of a view's field of view
+        are not drawn into it
+        :type cull: bool
+        :param group_materials: If True, the opaque objects are drawn grouped
+        by material, rather than in the order given
+        :type group_materials: bool
+        """
+        self.objects = list(objects) if objects is not None else []
+        self.cull = cull
+        self.group_materials = group_materials
+        # The objects, split up by prepare()
+        self.lights = []
+        self.opaque = []
+        self.translucent = []
+        # The bounding spheres of the opaque then the translucent objects;
+        # only the translucent objects' centers are kept if not culling
+        self.centers = zeros((0, 3))
+        self.radii = zeros(0)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def add(self, obj):
+        """ Add an object to the scene, if it is not already in it.
+
+        :param obj: the object to add
+        :type obj: pyglet_helper.objects.Renderable
+        """
+        if obj not in self.objects:
+            self.objects.append(obj)
+
+    def clear(self):
+        """ Remove every object from the scene, keeping its arrays to reuse.
+        """
+        self.objects = []
+        self.lights = []
+        self.opaque = []
+        self.translucent = []
+
+    def remove(self, obj):
+        """ Remove an object from the scene.
+
+        :param obj: the object to remove
+        :type obj: pyglet_helper.objects.Renderable
+        """
+        self.objects.remove(obj)
+
+    def prepare(self):
+        """ Do the work of drawing a frame which is shared by every view:
+        split the objects into lights, opaque and translucent objects, and
+        measure their bounds. draw() calls this once per frame; call it
+        yourself before View.draw_scene() if the objects changed.
+        """
+        lights = []
+        opaque = []
+        translucent = []
+        for obj in self.objects:
+            if getattr(obj, 'is_light', False):
+                lights.append(obj)
+            elif obj.translucent:
+                translucent.append(obj)
+            else:
+                opaque.append(obj)
+        if self.group_materials:
+            # The sort is stable, so each group keeps the order given.
+            opaque.sort(key=material_key)
+        self.lights = lights
+        self.opaque = opaque
+        self.translucent = translucent
+        measured = opaque + translucent if self.cull else translucent
+        if not measured and not len(self.radii):
+            # The empty arrays of the last frame are reused.
+            return
+        bounds = [bounding_sphere(obj) for obj in measured]
+        self.centers = array([center for center, _ in bounds],
+                             dtype=float).reshape(-1, 3)
+        self.radii = array([radius for _, radius in bounds], dtype=float)
+
+    def visible(self, view):
+        """
+        Get the objects to draw into a view
+        :param view: the view
+        :type view: pyglet_helper.objects.View
+        :return: the opaque objects, the translucent objects and their
+        centers, and the number of objects culled
+        :rtype: tuple
+        """
+        if not self.cull:
+            return self.opaque, self.translucent, self.centers, 0
+        shown = in_view(self.centers, self.radii, view)
+        split = len(self.opaque)
+        opaque = [obj for obj, seen in zip(self.opaque, shown[:split])
+                  if seen]
+        translucent = [obj for obj, seen in zip(self.translucent,
+                                                shown[split:]) if seen]
+        centers = self.centers[split:][shown[split:]]
+        return opaque, translucent, centers, len(shown) - int(shown.sum())
+
+    def draw(self, views):
+        """ Render a frame of the scene into each of several views. Each
+        view's statistics only count what was drawn into it.
+
+        :param views: The views, e.g., one for each viewport of a window
+        :type views: list of pyglet_helper.objects.View
+        """
+        self.prepare()
+        for view in views:
+            view.begin_frame()
+            view.draw_scene(self)
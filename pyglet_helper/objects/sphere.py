@@ -96,6 +96,7 @@ class Sphere(Axial):
         scene.sphere_model[5].gl_compile_begin()
         sph.render_sphere(1.0, 140, 69)
         scene.sphere_model[5].gl_compile_end()
+        sph.gl_free()
 
     def render(self, geometry):
         """ Add the sphere to the view.
@@ -106,7 +107,9 @@ class Sphere(Axial):
         # Renders a simple sphere with the #2 level of detail.
         if self.radius == 0.0:
             return
-        self.init_model(geometry)
+        # The models are compiled once, by the first sphere drawn
+        if not geometry.sphere_model[0].compiled:
+            self.init_model(geometry)
 
         coverage_levels = [30, 100, 500, 5000]
         lod = self.lod_adjust(geometry, coverage_levels, self.pos, self.radius)
@@ -117,14 +120,14 @@ class Sphere(Axial):
 
         if self.translucent:
             # Spheres are convex, so we don't need to sort
-            gl.glEnable(gl.GL_CULL_FACE)
+            geometry.gl_state.enable(gl.GL_CULL_FACE)
 
             # Render the back half (inside)
-            gl.glCullFace(gl.GL_FRONT)
+            geometry.gl_state.cull_face(gl.GL_FRONT)
             geometry.sphere_model[lod].gl_render()
 
             # Render the front half (outside)
-            gl.glCullFace(gl.GL_BACK)
+            geometry.gl_state.cull_face(gl.GL_BACK)
             geometry.sphere_model[lod].gl_render()
         else:
             # Render a simple sphere.
@@ -32,4 +32,84 @@ def test_shader():
 @raises(ValueError)
 def test_shader_error():
     from pyglet_helper.common import shader
-    _shader = shader('my_shader', '', 4.01)
\ No newline at end of file
+    _shader = shader('my_shader', '', 4.01)
+
+def test_rawtexture_lazy_data():
+    from pyglet_helper.common import RawTexture
+    from numpy import zeros
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return zeros((2, 2, 3))
+    _raw_texture = RawTexture(loader=loader, interpolate=True)
+    assert not _raw_texture.loaded
+    assert _raw_texture.data.shape == (2, 2, 3)
+    assert _raw_texture.data.shape == (2, 2, 3)
+    assert _raw_texture.loaded
+    assert len(loads) == 1
+
+
+def test_library_text():
+    from pyglet_helper.common import LIBRARY, shader
+    assert "[vertex]" in LIBRARY
+    _shader = shader('my_shader', '', 5.01)
+    assert _shader._shader.source.startswith(LIBRARY)
+
+
+def _tga_header(image_type, width, height, bits, descriptor):
+    from numpy import array, ubyte
+    return array([0, 0, image_type, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+                  width, 0, height, 0, bits, descriptor], ubyte).tobytes()
+
+
+def test_load_tga_uncompressed():
+    import os
+    import tempfile
+    from numpy import arange, array_equal, ubyte
+    from pyglet_helper.common import load_tga
+    # a 3x2 bgr image, stored from the lower left
+    pixels = arange(18, dtype=ubyte).reshape((2, 3, 3))
+    contents = _tga_header(2, 3, 2, 24, 0) + pixels.tobytes()
+    handle, filename = tempfile.mkstemp(suffix=".tga")
+    os.write(handle, contents)
+    os.close(handle)
+    try:
+        image = load_tga(filename)
+        assert array_equal(image, pixels[::-1, :, ::-1])
+        # in bgr order, the image is a view of the memory-mapped file
+        image = load_tga(filename, bgr=True)
+        assert array_equal(image, pixels[::-1])
+        assert not image.flags.writeable
+        del image
+    finally:
+        os.remove(filename)
+
+
+def test_load_tga_rle():
+    from io import BytesIO
+    from numpy import array, array_equal, ubyte
+    from pyglet_helper.common import load_tga
+    # a 4x1 bgra image, stored from the upper left: a run of three pixels,
+    # then one raw pixel
+    contents = _tga_header(10, 4, 1, 32, 0x28) + array(
+        [0x82, 1, 2, 3, 4, 0x00, 5, 6, 7, 8], ubyte).tobytes()
+    image = load_tga(BytesIO(contents))
+    assert image.shape == (1, 4, 4)
+    assert array_equal(image[0], [[3, 2, 1, 4]] * 3 + [[7, 6, 5, 8]])
+
+
+@raises(IOError)
+def test_load_tga_truncated_rle():
+    from io import BytesIO
+    from numpy import array, ubyte
+    from pyglet_helper.common import load_tga
+    contents = _tga_header(11, 4, 1, 8, 0x20) + array([0x83], ubyte).tobytes()
+    load_tga(BytesIO(contents))
+
+
+@raises(IOError)
+def test_load_tga_colormapped():
+    from io import BytesIO
+    from pyglet_helper.common import load_tga
+    load_tga(BytesIO(_tga_header(1, 1, 1, 8, 0) + b"\0"))
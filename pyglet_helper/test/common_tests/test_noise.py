@@ -0,0 +1,62 @@
+from __future__ import print_function
+from nose.tools import raises
+
+
+def test_white_noise():
+    from numpy import array_equal, ubyte
+    from pyglet_helper.common import white_noise
+    volume = white_noise(8, seed=3)
+    assert volume.shape == (8, 8, 8, 3)
+    assert volume.dtype == ubyte
+    assert array_equal(volume, white_noise(8, seed=3))
+    assert not array_equal(volume, white_noise(8, seed=4))
+
+
+def test_turbulence():
+    from numpy import array_equal, ubyte
+    from pyglet_helper.common import turbulence
+    volume = turbulence(16, channels=1, seed=3)
+    assert volume.shape == (16, 16, 16, 1)
+    assert volume.dtype == ubyte
+    assert volume.min() == 0 and volume.max() == 255
+    assert array_equal(volume, turbulence(16, channels=1, seed=3))
+    # the noise is smooth: neighbouring texels differ far less than the range
+    step = abs(volume[1:].astype(int) - volume[:-1]).mean()
+    assert step < 40
+    # and wraps around, so the volume tiles
+    assert abs(volume[0].astype(int) - volume[-1]).mean() < 2 * step
+
+
+def test_noise_volume_cache():
+    from pyglet_helper.common import noise_volume
+    from pyglet_helper.common.noise import clear_cache
+    volume = noise_volume("white", 4, seed=1)
+    assert noise_volume("white", 4, seed=1) is volume
+    assert noise_volume("white", 4, seed=2) is not volume
+    assert not volume.flags.writeable
+    clear_cache()
+    assert noise_volume("white", 4, seed=1) is not volume
+
+
+@raises(ValueError)
+def test_noise_volume_error():
+    from pyglet_helper.common import noise_volume
+    noise_volume("perlin")
+
+
+def test_use_procedural_noise():
+    from functools import partial
+    from pyglet_helper.common import materials, use_procedural_noise
+    turbulence_loader = materials.TX_TURB3._loader
+    random_loader = materials.TX_RANDOM._loader
+    try:
+        use_procedural_noise(size=16, seed=5)
+        assert not materials.TX_TURB3.loaded
+        assert materials.TX_TURB3.damaged
+        assert materials.TX_TURB3.data.shape == (16, 16, 16, 3)
+        assert materials.TX_RANDOM.data.shape == (16, 16, 16, 3)
+    finally:
+        materials.TX_TURB3.set_loader(turbulence_loader or partial(
+            materials.load_volume, materials.TEXTURE_PATH + "turbulence3"))
+        materials.TX_RANDOM.set_loader(random_loader or partial(
+            materials.load_volume, materials.TEXTURE_PATH + "random"))
@@ -2,7 +2,7 @@
 The following file contains definitions for GL functions when pyglet can't
 be used, such as on testing on continuous integration systems.
 """
-from ctypes import c_float, c_double, c_uint
+from ctypes import addressof, c_float, c_double, c_ubyte, c_uint, memmove
 
 
 GLfloat = c_float
@@ -21,20 +21,25 @@ GL_LIGHT4 = 16388
 GL_LIGHT5 = 16389
 GL_LIGHT6 = 16390
 GL_LIGHT7 = 16391
+GL_BLEND = 3042
+GL_SRC_ALPHA = 770
+GL_ONE_MINUS_SRC_ALPHA = 771
+GL_FALSE = 0
+GL_TRUE = 1
 
 
-GL_COMPILE = 0
-GL_FRONT = 0
-GL_BACK = 0
-GL_FLOAT = 0
+GL_COMPILE = 4864
+GL_FRONT = 1028
+GL_BACK = 1029
+GL_FLOAT = 5126
 GL_MODELVIEW_MATRIX = 0
 GL_TEXTURE_MATRIX = 0
 GL_COLOR_MATRIX = 0
 GL_PROJECTION_MATRIX = 0
-GL_FRONT_AND_BACK = 0
-GL_AMBIENT_AND_DIFFUSE = 0
-GL_SPECULAR = 0
-GL_SHININESS = 0
+GL_FRONT_AND_BACK = 1032
+GL_AMBIENT_AND_DIFFUSE = 5634
+GL_SPECULAR = 4610
+GL_SHININESS = 5633
 GL_CLIENT_VERTEX_ARRAY_BIT = 0
 GL_VERTEX_ARRAY = 0
 GL_NORMAL_ARRAY = 0
@@ -42,10 +47,33 @@ GL_TRIANGLES = 0
 GL_UNSIGNED_INT = 0
 GL_VERTEX_SHADER_ARB = 0
 GL_FRAGMENT_SHADER_ARB = 0
-GL_OBJECT_LINK_STATUS_ARB = 0
-GL_OBJECT_INFO_LOG_LENGTH_ARB = 0
-GL_POSITION = 0
-GL_DIFFUSE = 0
+GL_OBJECT_LINK_STATUS_ARB = 35714
+GL_OBJECT_INFO_LOG_LENGTH_ARB = 35716
+GL_OBJECT_ACTIVE_UNIFORMS_ARB = 35718
+GL_OBJECT_ACTIVE_UNIFORM_MAX_LENGTH_ARB = 35719
+GL_PROGRAM_BINARY_LENGTH = 34625
+GL_POSITION = 4611
+GL_DIFFUSE = 4609
+GL_TEXTURE_2D = 3553
+GL_TEXTURE_3D = 32879
+GL_TEXTURE_2D_ARRAY = 35866
+GL_TEXTURE_MAG_FILTER = 10240
+GL_TEXTURE_MIN_FILTER = 10241
+GL_NEAREST = 9728
+GL_LINEAR = 9729
+GL_LINEAR_MIPMAP_LINEAR = 9987
+GL_UNPACK_ROW_LENGTH = 3314
+GL_UNPACK_SKIP_ROWS = 3315
+GL_UNPACK_SKIP_PIXELS = 3316
+GL_UNPACK_ALIGNMENT = 3317
+GL_PIXEL_UNPACK_BUFFER = 35052
+GL_STREAM_DRAW = 35040
+GL_WRITE_ONLY = 35001
+GL_UNSIGNED_BYTE = 5121
+GL_RGB = 6407
+GL_RGBA = 6408
+GL_LUMINANCE = 6409
+GL_LUMINANCE_ALPHA = 6410
 
 class GLException(Exception):
    def __init__(self, value):
@@ -78,6 +106,10 @@ def glGenLists(handle):
     return handle
 
 
+def glDeleteLists(handle, count):
+    pass
+
+
 def glEnable(lighting):
     pass
 
@@ -98,6 +130,10 @@ def glLoadIdentity():
     pass
 
 
+def glViewport(x, y, width, height):
+    pass
+
+
 def glRotatef(x, y, z, w):
     pass
 
@@ -201,19 +237,209 @@ def glLightfv(defined_light, position, light_position):
     pass
 
 
+def glBindTexture(target, handle):
+    pass
+
+
+def glDeleteTextures(count, handles):
+    pass
+
+
+def glUseProgramObjectARB(program):
+    pass
+
+
+def glBlendFunc(source_factor, destination_factor):
+    pass
+
+
+def glDepthMask(flag):
+    pass
+
+
+# The last texture name returned by glGenTextures
+_TEXTURE_NAMES = [0]
+
+
+def glGenTextures(count, handles):
+    # handles is a pointer to a GLuint, made by ctypes.byref
+    _TEXTURE_NAMES[0] += 1
+    handles._obj.value = _TEXTURE_NAMES[0]
+
+
+def glTexParameteri(target, name, value):
+    pass
+
+
+def glPixelStorei(name, value):
+    pass
+
+
+def glTexImage2D(target, level, internal_format, width, height, border,
+                 pixel_format, pixel_type, pixels):
+    pass
+
+
+def glTexImage3D(target, level, internal_format, width, height, depth, border,
+                 pixel_format, pixel_type, pixels):
+    pass
+
+
+def glGenerateMipmap(target):
+    pass
+
+
+def glTexSubImage2D(target, level, x_offset, y_offset, width, height,
+                    pixel_format, pixel_type, pixels):
+    pass
+
+
+# The storage of each buffer object, and the buffer bound to each target
+_BUFFERS = {}
+_BOUND_BUFFERS = {}
+
+
+def glGenBuffers(count, buffers):
+    for i in range(count):
+        buffers[i] = 1000 + len(_BUFFERS) + i
+        _BUFFERS[buffers[i]] = None
+
+
+def glDeleteBuffers(count, buffers):
+    for i in range(count):
+        _BUFFERS.pop(buffers[i], None)
+
+
+def glBindBuffer(target, buffer_name):
+    _BOUND_BUFFERS[target] = buffer_name
+
+
+def glBufferData(target, size, data, usage):
+    _BUFFERS[_BOUND_BUFFERS[target]] = (c_ubyte * size)()
+
+
+def glMapBuffer(target, access):
+    return addressof(_BUFFERS[_BOUND_BUFFERS[target]])
+
+
+def glUnmapBuffer(target):
+    return True
+
+
+# The binary returned by glGetProgramBinary, and its format
+PROGRAM_BINARY = b'linked program'
+PROGRAM_BINARY_FORMAT = 7
+
+
+def glGetProgramiv(program, name, value):
+    if name == GL_PROGRAM_BINARY_LENGTH:
+        value._obj.value = len(PROGRAM_BINARY)
+
+
+def glGetProgramBinary(program, buffer_size, length, binary_format, binary):
+    memmove(binary, PROGRAM_BINARY, len(PROGRAM_BINARY))
+    length._obj.value = len(PROGRAM_BINARY)
+    binary_format._obj.value = PROGRAM_BINARY_FORMAT
+
+
+def glProgramBinary(program, binary_format, binary, length):
+    pass
+
+
+def glFinish():
+    pass
+
+
+class lib(object):
+    class MissingFunctionException(Exception):
+        pass
+
+    # The functions only loaded through link_GL, by name
+    functions = {'glMaxShaderCompilerThreadsKHR': lambda count: None}
+
+    @staticmethod
+    def link_GL(name, restype, argtypes, requires=None, suggestions=None):
+        def missing_function(*args, **kwargs):
+            raise lib.MissingFunctionException(name)
+        return lib.functions.get(name, missing_function)
+
+
+class gl_info(object):
+    # The extensions the fake driver claims to support
+    extensions = set()
+
+    @staticmethod
+    def have_extension(name):
+        return name in gl_info.extensions
+
+    @staticmethod
+    def get_vendor():
+        return 'pyglet_helper'
+
+    @staticmethod
+    def get_renderer():
+        return 'fake_gl'
+
+    @staticmethod
+    def get_version():
+        return '2.1'
+
+
 class glext_arb(object):
     GL_ARB_shader_objects = 1
+    # The link status reported for every program
+    link_status = True
+    # The number of programs created
+    programs = 0
+    # The names of the active uniforms of every program; each is located at
+    # its index
+    active_uniforms = []
 
     @staticmethod
     def glGetUniformLocationARB(program, name):
+        if name in glext_arb.active_uniforms:
+            return glext_arb.active_uniforms.index(name)
         return 0
 
+    @staticmethod
+    def glGetActiveUniformARB(program, index, max_length, length, size,
+                              uniform_type, name):
+        name.value = glext_arb.active_uniforms[index].encode('utf-8')
+
+    @staticmethod
+    def glUniform1fARB(location, x):
+        pass
+
+    @staticmethod
+    def glUniform2fARB(location, x, y):
+        pass
+
+    @staticmethod
+    def glUniform3fARB(location, x, y, z):
+        pass
+
+    @staticmethod
+    def glUniform4fARB(location, x, y, z, w):
+        pass
+
+    @staticmethod
+    def glUniform1iARB(location, x):
+        pass
+
+    @staticmethod
+    def glUniform4fvARB(location, count, values):
+        pass
+
+    @staticmethod
+    def glUniformMatrix4fvARB(location, count, transpose, values):
+        pass
+
     @staticmethod
     def glCreateShaderObjectARB(shader_type):
         return 1
 
     @staticmethod
-    def glShaderSourceARB(shader, handle):
+    def glShaderSourceARB(shader, count, sources, lengths):
         pass
 
     @staticmethod
@@ -230,20 +456,38 @@ class glext_arb(object):
 
     @staticmethod
     def glCreateProgramObjectARB():
-        pass
+        glext_arb.programs += 1
+        return glext_arb.programs
 
     @staticmethod
     def glLinkProgramARB(program):
         pass
 
+    # The programs still being linked in the background
+    linking = set()
+
     @staticmethod
-    def glGetObjectParameterivARB(program, link_status):
-        return False
+    def glGetObjectParameterivARB(program, name):
+        # GL_COMPLETION_STATUS_KHR
+        if name == 0x91B1:
+            return program not in glext_arb.linking
+        if name == GL_OBJECT_LINK_STATUS_ARB:
+            return glext_arb.link_status
+        if name == GL_OBJECT_ACTIVE_UNIFORMS_ARB:
+            return len(glext_arb.active_uniforms)
+        if name == GL_OBJECT_ACTIVE_UNIFORM_MAX_LENGTH_ARB:
+            return max([len(uniform) for uniform in
+                        glext_arb.active_uniforms] + [0]) + 1
+        return 0
 
     @staticmethod
     def glGetInfoLogARB(program, length):
         return (0.0, 0.0)
 
+    @staticmethod
+    def glUseProgramObjectARB(program):
+        pass
+
 class glu(object):
     GLU_FILL = 1
     GLU_SMOOTH = 1
@@ -253,6 +497,8 @@ class glu(object):
     GLU_LINE = 1
     GLU_FILL = 1
     GLU_SILHOUETTE = 1
+    GLU_FLAT = 1
+    GLU_NONE = 1
 
     @staticmethod
     def gluDisk(quadric, thickness, radius, slices, rings):
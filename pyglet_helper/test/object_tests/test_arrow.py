@@ -83,6 +83,7 @@ def test_arrow_effective_geometry():
 
 
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.arrow.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.box.gl', new=pyglet_helper.test.fake_gl)
@@ -90,9 +91,36 @@ def test_arrow_effective_geometry():
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.box.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_arrow_render():
     from pyglet_helper.objects import Arrow
     from pyglet_helper.objects import View
     _arrow = Arrow()
     _view = View()
     _arrow.render(_view)
+
+
+def test_arrow_model_material_uniform():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    from pyglet_helper.test import fake_gl
+    with patch.object(fake_gl.glext_arb, 'active_uniforms',
+                      ['model_material']), RecordingGL() as recorder:
+        from pyglet_helper.objects import Arrow, Material, View
+        scene = View()
+        arrow = Arrow()
+        arrow.mat = Material(shader_program="[fragment] void arrow() {}")
+        arrow.mat.shader.realize(scene)
+        recorder.clear()
+        arrow.render(scene)
+        counts = recorder.counts()
+        calls = [(call.name, call.args) for call in recorder.calls
+                 if call.name.startswith('glext_arb.glU')]
+    # the shaft and the head each set the material matrix, and the location
+    # was found when the program was linked
+    assert counts['glext_arb.glUniformMatrix4fvARB'] == 2
+    assert 'glext_arb.glGetUniformLocationARB' not in counts
+    # the uniforms are set while the arrow's program is bound
+    assert calls[0] == ('glext_arb.glUseProgramObjectARB',
+                        (arrow.mat.shader.program,))
+    assert calls[-1] == ('glext_arb.glUseProgramObjectARB', (0,))
+    assert len(calls) == 4
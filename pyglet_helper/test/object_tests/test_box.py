@@ -10,10 +10,12 @@ def test_box_generate_model():
 
 
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.box.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_sphere_render():
     from pyglet_helper.objects import Box
     from pyglet_helper.objects import View
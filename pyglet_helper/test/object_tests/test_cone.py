@@ -5,9 +5,11 @@ import pyglet_helper.test.fake_gl
 @patch('pyglet_helper.objects.cone.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.quadric.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_cone_render():
     from pyglet_helper.objects import Cone
     from pyglet_helper.objects import View
@@ -24,9 +26,11 @@ def test_cone_render():
 @patch('pyglet_helper.objects.cone.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.quadric.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_cone_center():
     from pyglet_helper.objects import Cone
     from pyglet_helper.util import Vector
@@ -38,9 +42,11 @@ def test_cone_center():
 @patch('pyglet_helper.objects.cone.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.quadric.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_cone_degenerate():
     from pyglet_helper.objects import Cone
     _cone = Cone()
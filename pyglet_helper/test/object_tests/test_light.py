@@ -6,9 +6,11 @@ import pyglet_helper.test.fake_gl
 
 @patch('pyglet_helper.objects.light.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_light_is_light():
     from pyglet_helper.objects import Light
     _light = Light()
@@ -18,9 +20,11 @@ def test_light_is_light():
 @raises(ValueError)
 @patch('pyglet_helper.objects.light.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_light_material_get_error():
     from pyglet_helper.objects import Light
     _light = Light()
@@ -30,9 +34,11 @@ def test_light_material_get_error():
 @raises(ValueError)
 @patch('pyglet_helper.objects.light.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_light_material_set_error():
     from pyglet_helper.objects import Light
     _light = Light()
@@ -41,9 +47,11 @@ def test_light_material_set_error():
 
 @patch('pyglet_helper.objects.light.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_light_render():
     from pyglet_helper.objects import Light
     from pyglet_helper.objects import View
@@ -53,9 +61,11 @@ def test_light_render():
 
 @patch('pyglet_helper.objects.light.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_light_center():
     from pyglet_helper.objects import Light
     from pyglet_helper.util import Vector
@@ -65,9 +75,11 @@ def test_light_center():
 
 @patch('pyglet_helper.objects.light.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_light_center():
     from pyglet_helper.objects import Light
     from pyglet_helper.util import Rgba
@@ -76,4 +88,99 @@ def test_light_center():
     _light.rgb = _my_col
     assert _light.rgb[0] == 0.2
     assert _light.rgb[1] == 0.3
-    assert _light.rgb[2] == 0.4
\ No newline at end of file
+    assert _light.rgb[2] == 0.4
+
+def test_light_registry_uploads_changes():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL() as recorder:
+        from pyglet_helper.objects import Light, View
+        view = View()
+        first, second = Light(), Light()
+        diffuse = first.diffuse
+        view.draw([first, second])
+        assert view.active_lights == [first, second]
+        assert recorder.counts()['glLightfv'] == 6
+        # only the positions of unchanged lights are uploaded again
+        recorder.clear()
+        view.draw([first, second])
+        assert recorder.counts()['glLightfv'] == 2
+        # a changed light is updated in place, and its colors uploaded
+        first.diffuse = (0, 1, 0, 1)
+        assert first.diffuse is diffuse and diffuse[1] == 1.0
+        view.setup()
+        recorder.clear()
+        view.draw([first, second])
+        assert recorder.counts()['glLightfv'] == 4
+        # dropping a light moves the next one up, and frees its slot
+        recorder.clear()
+        view.draw([second])
+        counts = recorder.counts()
+        assert view.active_lights == [second]
+        assert counts['glLightfv'] == 3
+        assert counts['glDisable'] == 1
+        # after the lights were changed elsewhere, every slot is sent again
+        recorder.clear()
+        view.invalidate_lights()
+        view.draw([second])
+        counts = recorder.counts()
+        assert counts['glLightfv'] == 3
+        assert counts['glDisable'] == 7
+
+
+def test_light_registry_kept_across_frames():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL():
+        from pyglet_helper.objects import Box, Light, View
+        view = View()
+        added, drawn = Light(), Light()
+        view.add_light(added)
+        view.draw([drawn, Box()])
+        # the view's lights are lit before the scene's, in every frame
+        assert view.active_lights == [added, drawn]
+        view.draw([Box()])
+        assert view.lights == [added]
+        assert view.active_lights == [added]
+        view.remove_light(added)
+        view.draw([Box()])
+        assert view.active_lights == []
+
+
+def test_light_positions_per_view():
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL() as recorder:
+        from pyglet_helper.objects import Box, Light, View
+        first, second = View(), View()
+        assert first.gl_state is second.gl_state
+        lights = {first: Light(position=(1, 0, 0, 0)),
+                  second: Light(position=(0, 1, 0, 0))}
+        for frame in range(2):
+            for view in [first, second]:
+                recorder.clear()
+                view.draw([lights[view], Box()])
+                uploads = [call.args for call in recorder.calls
+                           if call.name == 'glLightfv']
+                # each view lights the frame with its own light, uploaded
+                # for its own camera
+                assert (fake_gl.GL_LIGHT0, fake_gl.GL_POSITION,
+                        lights[view].position) in uploads
+                assert (fake_gl.GL_LIGHT0, fake_gl.GL_DIFFUSE,
+                        lights[view].diffuse) in uploads
+                assert len(uploads) == 3
+
+
+def test_light_render_uploads():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL() as recorder:
+        from pyglet_helper.objects import Light, View
+        view = View()
+        light = Light()
+        # drawing without View.draw() still lights the scene
+        light.render(view)
+        assert recorder.counts()['glLightfv'] == 3
+        recorder.clear()
+        light.render(view)
+        assert recorder.counts()['glLightfv'] == 1
+        light.diffuse = (1, 0, 0, 1)
+        light.render(view)
+        assert recorder.counts()['glLightfv'] == 4
@@ -58,4 +58,20 @@ def test_primitive_size_z_error():
     from pyglet_helper.objects import Primitive
     from pyglet_helper.util import Vector
     _primitive = Primitive()
-    _primitive.size = Vector([0, 0, -1])
\ No newline at end of file
+    _primitive.size = Vector([0, 0, -1])
+
+def test_primitive_transform_reused():
+    from pyglet_helper.objects import Primitive
+    from pyglet_helper.util import COUNTERS, Vector
+    _primitive = Primitive()
+    transform = _primitive.model_world_transform(1.0, Vector([2, 2, 2]))
+    transforms = COUNTERS.transforms
+    assert _primitive.model_world_transform(
+        1.0, Vector([2, 2, 2])) is transform
+    assert COUNTERS.transforms == transforms
+    # moving the object computes its transform again
+    _primitive.pos = Vector([1, 0, 0])
+    moved = _primitive.model_world_transform(1.0, Vector([2, 2, 2]))
+    assert moved is not transform
+    assert moved[3, 0] == 1
+    assert COUNTERS.transforms == transforms + 1
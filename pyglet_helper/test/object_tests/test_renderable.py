@@ -4,6 +4,7 @@ import pyglet_helper.test.fake_gl
 
 
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_renderable_material():
     from pyglet_helper.objects import Renderable
     from pyglet_helper.objects import Material
@@ -14,7 +15,9 @@ def test_renderable_material():
 
 
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_renderable_lod():
     from pyglet_helper.objects import Renderable, View
     from pyglet_helper.util import Vector
@@ -26,11 +29,41 @@ def test_renderable_lod():
 
 
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_view_pixel_coverage():
     from pyglet_helper.objects import View
     from pyglet_helper.util import Vector
     scene = View()
     pix_coverage = scene.pixel_coverage(pos=Vector([10, 0, 0]), radius=0.2)
     print(pix_coverage)
-    assert(pix_coverage == 800.0)
\ No newline at end of file
+    assert(pix_coverage == 800.0)
+
+
+@patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.sphere.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.quadric.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
+def test_view_draw():
+    from pyglet_helper.objects import Sphere, View
+    from pyglet_helper.util import Vector
+    scene = View()
+    rendered = []
+
+    class RecordedSphere(Sphere):
+        def render(self, geometry):
+            rendered.append(self)
+            super(RecordedSphere, self).render(geometry)
+
+    opaque = RecordedSphere(pos=Vector([0, 0, 1]))
+    near = RecordedSphere(pos=Vector([0, 0, 2]))
+    near.opacity = 0.5
+    far = RecordedSphere(pos=Vector([0, 0, 20]))
+    far.opacity = 0.5
+    scene.draw([near, opaque, far])
+    assert rendered == [opaque, far, near]
\ No newline at end of file
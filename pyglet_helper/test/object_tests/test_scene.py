@@ -0,0 +1,180 @@
+from __future__ import print_function
+from mock import patch
+from nose.tools import raises
+import pyglet_helper.test.fake_gl
+
+
+def make_view(camera, forward):
+    from pyglet_helper.objects import View
+    from pyglet_helper.util import Vector
+    view = View(tan_hfov_x=1.0, tan_hfov_y=1.0, viewport=(0, 0, 400, 300))
+    view.camera = Vector(camera)
+    view.forward = Vector(forward)
+    view.up_vector = Vector([0, 1, 0])
+    return view
+
+
+def test_view_space():
+    from numpy import allclose
+    from pyglet_helper.objects.scene import view_space
+    from pyglet_helper.util import Vector
+    points = view_space([[1, 2, -5], [0, 0, 0]], camera=Vector([0, 0, 0]),
+                        forward=Vector([0, 0, -1]),
+                        up_vector=Vector([0, 1, 0]))
+    assert allclose(points, [[1, 2, 5], [0, 0, 0]])
+
+
+@raises(ValueError)
+def test_view_space_degenerate():
+    from pyglet_helper.objects.scene import view_space
+    from pyglet_helper.util import Vector
+    view_space([[0, 0, 0]], camera=Vector([0, 0, 0]),
+               forward=Vector([0, 1, 0]), up_vector=Vector([0, 1, 0]))
+
+
+def test_scene_shares_work_between_views():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL() as recorder:
+        from pyglet_helper.objects import Box, Scene
+        from pyglet_helper.util import COUNTERS, Vector
+        front = make_view([0, 0, 0], [0, 0, -1])
+        back = make_view([0, 0, 0], [0, 0, 1])
+        close_up = make_view([0, 0, -5], [0, 0, -1])
+        ahead = Box(pos=Vector([0, 0, -10]))
+        behind = Box(pos=Vector([0, 0, 10]))
+        # outside of the 90 degree field of view of every view
+        aside = Box(pos=Vector([30, 0, -10]))
+        scene = Scene([ahead, behind, aside])
+        transforms = COUNTERS.transforms
+        scene.draw([front, back, close_up])
+        # each box in sight is transformed once, whichever view draws it
+        assert COUNTERS.transforms - transforms == 2
+        for view in [front, back, close_up]:
+            assert view.stats.objects_submitted == 3
+            assert view.stats.objects_culled == 2
+            assert view.stats.draw_calls == 1
+        assert close_up.stats.transforms == 0
+        counts = recorder.counts()
+    assert counts['glViewport'] == 3
+
+
+def test_scene_sorts_per_view():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL():
+        from pyglet_helper.objects import Scene, Sphere
+        from pyglet_helper.util import Vector
+        rendered = []
+
+        class RecordedSphere(Sphere):
+            def render(self, geometry):
+                rendered.append(self)
+
+        near = RecordedSphere(pos=Vector([0, 0, 5]))
+        far = RecordedSphere(pos=Vector([0, 0, -5]))
+        for sphere in [near, far]:
+            sphere.opacity = 0.5
+        scene = Scene([near, far])
+        scene.draw([make_view([0, 0, 20], [0, 0, -1]),
+                    make_view([0, 0, -20], [0, 0, 1])])
+    # each view blends the spheres from its own back to front
+    assert rendered == [far, near, near, far]
+
+
+@patch('pyglet_helper.objects.light.gl', new=pyglet_helper.test.fake_gl)
+def test_scene_groups_materials():
+    from pyglet_helper.objects import Box, Light, Material, Scene
+    from pyglet_helper.objects.scene import material_key
+    shaded = Material()
+    shaded.shader = '[vertex]\nvoid main() {}\n'
+    boxes = [Box() for _ in range(4)]
+    for box in boxes[1::2]:
+        box.material = shaded
+    light = Light()
+    scene = Scene(boxes + [light])
+    scene.prepare()
+    assert scene.lights == [light]
+    keys = [material_key(box) for box in scene.opaque]
+    # each material's boxes are drawn together, in the order given
+    assert keys[0] == keys[1] != keys[2] == keys[3]
+    assert scene.opaque.index(boxes[0]) < scene.opaque.index(boxes[2])
+    assert scene.radii.shape == (4,)
+
+
+def test_material_key_leaves_textures_unloaded():
+    from pyglet_helper.common.materials import RawTexture
+    from pyglet_helper.objects import Box, Material
+    from pyglet_helper.objects.scene import material_key
+    loads = []
+    texture = RawTexture(loader=lambda: loads.append(1))
+    material = Material()
+    material.textures = [texture]
+    box = Box()
+    box.material = material
+    assert material_key(box) == (0, ())
+    assert loads == []
+
+
+def test_material_key_texture_array():
+    from numpy import zeros, ubyte
+    from pyglet_helper.common.materials import RawTexture
+    from pyglet_helper.objects import Box, Material
+    from pyglet_helper.objects.scene import material_key
+    from pyglet_helper.util import TextureArray
+    textures = [RawTexture(data=zeros((4, 4, 3), ubyte)) for _ in range(2)]
+    array = TextureArray(textures)
+    boxes = []
+    for texture in textures:
+        material = Material()
+        material.textures = [texture]
+        material.texture_array = array
+        box = Box()
+        box.material = material
+        boxes.append(box)
+    # the materials sampling one array are grouped together
+    assert material_key(boxes[0]) == material_key(boxes[1]) == \
+        (0, (id(array),))
+
+
+def test_view_reuses_scene():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL():
+        from pyglet_helper.objects import Box, View
+        view = make_view([0, 0, 0], [0, 0, -1])
+        box = Box()
+        view.draw([box])
+        scene, centers = view._scene, view._scene.centers
+        view.draw([box])
+        # the view's scene, and its empty arrays, are drawn again
+        assert view._scene is scene and scene.centers is centers
+        # without keeping the objects alive between frames
+        assert scene.objects == [] and scene.opaque == []
+        assert view.stats.objects_submitted == 1
+
+
+def test_scene_lights_each_view():
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL() as recorder:
+        from pyglet_helper.objects import Box, Light, Scene
+        light = Light(position=(0, 0, -5, 1))
+        scene = Scene([light, Box()])
+        views = [make_view([0, 0, 0], [0, 0, -1]),
+                 make_view([0, 0, -10], [0, 0, 1])]
+        for frame in range(2):
+            recorder.clear()
+            scene.draw(views)
+            # the calls made while drawing into each view
+            drawn = []
+            for call in recorder.calls:
+                if call.name == 'glViewport':
+                    drawn.append([])
+                elif drawn:
+                    drawn[-1].append(call)
+            assert len(drawn) == 2
+            for calls in drawn:
+                # the light's position is uploaded for each view's camera
+                assert [call.args for call in calls
+                        if call.name == 'glLightfv' and
+                        call.args[1] == fake_gl.GL_POSITION] == \
+                    [(fake_gl.GL_LIGHT0, fake_gl.GL_POSITION,
+                      light.position)]
@@ -0,0 +1,220 @@
+"""
+The following file contains an OpenGL backend which records every GL call
+made by pyglet_helper, with its arguments, call site and timing. It forwards
+the calls to another backend (by default, the fake_gl module), so it can be
+used to profile and regression-test the CPU cost of rendering a scene on
+machines without a GPU.
+
+    recorder = RecordingGL()
+    with recorder:
+        scene = View()
+        _ball = Sphere()
+        _ball.render(scene)
+    print(recorder.counts())
+    recorder.export_trace("trace.json")
+"""
+from __future__ import print_function
+from collections import Counter, namedtuple
+from importlib import import_module
+import json
+import pkgutil
+import sys
+import time
+
+import pyglet_helper.test.fake_gl
+
+# The packages searched for modules which draw through a module-level ``gl``
+# attribute
+GL_PACKAGES = ['pyglet_helper.util',
+               'pyglet_helper.objects',
+               'pyglet_helper.common']
+
+# The namespaces within the GL module that contain functions
+GL_NAMESPACES = ['glu', 'glext_arb', 'gl_info']
+
+CLOCK = getattr(time, 'perf_counter', time.time)
+
+# A single recorded call. site is a (filename, line number, function name)
+# tuple describing the pyglet_helper code that made the call. start and
+# duration are in seconds.
+GlCall = namedtuple('GlCall', ['name', 'args', 'site', 'start', 'duration'])
+
+
+def gl_modules():
+    """
+    Find every pyglet_helper module that draws through a module-level ``gl``
+    attribute, importing the modules of GL_PACKAGES
+    :return: the modules
+    :rtype: list of module
+    """
+    modules = []
+    for package_name in GL_PACKAGES:
+        package = import_module(package_name)
+        for _, name, _ in pkgutil.iter_modules(package.__path__,
+                                               package_name + '.'):
+            module = import_module(name)
+            if hasattr(module, 'gl'):
+                modules.append(module)
+    return modules
+
+
+class _RecordingNamespace(object):
+    """
+    Wraps the GL functions in a module or class, so that they record their
+    calls to a RecordingGL.
+    """
+    def __init__(self, recorder, backend, prefix=''):
+        """
+        :param recorder: the object the calls are recorded to
+        :type recorder: RecordingGL
+        :param backend: the module or class containing the real functions
+        :param prefix: prepended to the names of the functions
+        :type prefix: str
+        """
+        self._recorder = recorder
+        self._backend = backend
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        value = getattr(self._backend, name)
+        if name in GL_NAMESPACES and not self._prefix:
+            value = _RecordingNamespace(self._recorder, value, name + '.')
+        elif name.startswith('gl') and callable(value):
+            value = self._recorder.wrap(self._prefix + name, value)
+        # Cache the attribute, so __getattr__ is only called once per name.
+        # The current context changes, so it is looked up every time.
+        if name != 'current_context':
+            setattr(self, name, value)
+        return value
+
+
+class RecordingGL(_RecordingNamespace):
+    """
+    A GL backend that records every call before forwarding it to another
+    backend. Use it as a context manager (or call install() and uninstall())
+    to swap it in for pyglet.gl in every pyglet_helper module.
+    """
+    def __init__(self, backend=pyglet_helper.test.fake_gl, clock=CLOCK):
+        """
+        :param backend: the GL module the calls are forwarded to, e.g.,
+        pyglet.gl or pyglet_helper.test.fake_gl
+        :param clock: a function returning the current time, in seconds
+        :type clock: callable
+        """
+        super(RecordingGL, self).__init__(self, backend)
+        self.clock = clock
+        # The recorded calls, in order
+        self.calls = []
+        # If False, calls are forwarded but not recorded
+        self.recording = True
+        self._replaced = []
+
+    def wrap(self, name, function):
+        """ Wrap a GL function so that its calls are recorded.
+
+        :param name: the name of the function
+        :type name: str
+        :param function: the function to wrap
+        :type function: callable
+        :return: the wrapped function
+        :rtype: callable
+        """
+        def recorded(*args):
+            if not self.recording:
+                return function(*args)
+            caller = sys._getframe(1)
+            start = self.clock()
+            try:
+                return function(*args)
+            finally:
+                self.calls.append(GlCall(
+                    name, args, (caller.f_code.co_filename, caller.f_lineno,
+                                 caller.f_code.co_name),
+                    start, self.clock() - start))
+        recorded.__name__ = function.__name__
+        return recorded
+
+    def install(self):
+        """ Replace the GL module in every pyglet_helper module with this
+        recorder.
+        """
+        for module in gl_modules():
+            self._replaced.append((module, getattr(module, 'gl', None)))
+            module.gl = self
+
+    def uninstall(self):
+        """ Restore the GL modules replaced by install().
+        """
+        while self._replaced:
+            module, previous = self._replaced.pop()
+            module.gl = previous
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, _type, value, traceback):
+        self.uninstall()
+
+    def clear(self):
+        """ Forget all of the recorded calls.
+        """
+        self.calls = []
+
+    def counts(self):
+        """
+        Count the calls made to each GL function
+        :return: the number of calls, by function name
+        :rtype: collections.Counter
+        """
+        return Counter(call.name for call in self.calls)
+
+    def call_sites(self):
+        """
+        Count the calls made from each line of pyglet_helper
+        :return: the number of calls, by (function name, filename,
+        line number, calling function)
+        :rtype: collections.Counter
+        """
+        return Counter((call.name,) + call.site for call in self.calls)
+
+    def total_time(self):
+        """
+        Get the time spent inside the GL functions
+        :return: the total time, in seconds
+        :rtype: float
+        """
+        return sum(call.duration for call in self.calls)
+
+    def trace(self):
+        """
+        Convert the recorded calls to the Trace Event format, which can be
+        loaded into chrome://tracing or Perfetto.
+        :return: the trace
+        :rtype: dict
+        """
+        if self.calls:
+            origin = self.calls[0].start
+        else:
+            origin = 0
+        events = []
+        for call in self.calls:
+            events.append({
+                'name': call.name, 'cat': 'gl', 'ph': 'X', 'pid': 0,
+                'tid': 0, 'ts': (call.start - origin) * 1e6,
+                'dur': call.duration * 1e6,
+                'args': {'args': [repr(arg) for arg in call.args],
+                         'site': '%s:%d %s' % call.site}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_trace(self, fileid):
+        """ Write the recorded calls to a JSON file in the Trace Event format.
+
+        :param fileid: the filename, or a file opened for writing
+        :type fileid: str or file
+        """
+        if isinstance(fileid, str):
+            with open(fileid, 'w') as trace_file:
+                json.dump(self.trace(), trace_file)
+        else:
+            json.dump(self.trace(), fileid)
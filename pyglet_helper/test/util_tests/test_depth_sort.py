@@ -0,0 +1,49 @@
+from __future__ import print_function
+
+
+def test_camera_distances():
+    from pyglet_helper.util import Vector
+    from pyglet_helper.util.depth_sort import camera_distances
+    distances = camera_distances([[1, 0, 0], [0, 3, 0]], Vector([0, 1, 0]))
+    assert distances[0] == 2.0
+    assert distances[1] == 4.0
+
+
+def test_insertion_sort():
+    from pyglet_helper.util.depth_sort import insertion_sort
+    keys = [0.5, 3.0, 1.0, 2.0]
+    assert insertion_sort([0, 1, 2, 3], keys) == [1, 3, 2, 0]
+    assert insertion_sort([0, 1, 2, 3], keys, max_shifts=1) is None
+
+
+def test_radix_sort():
+    from numpy import array
+    from pyglet_helper.util.depth_sort import radix_sort
+    keys = array([0.5, 3.0, 1.0, 2.0, 3.0])
+    assert radix_sort([0, 1, 2, 3, 4], keys) == [1, 4, 3, 2, 0]
+    # ties keep the order they were given in
+    assert radix_sort([4, 3, 2, 1, 0], keys) == [4, 1, 3, 2, 0]
+    assert radix_sort([], keys) == []
+
+
+def test_depth_sorter_sort():
+    from pyglet_helper.objects import Primitive
+    from pyglet_helper.util import DepthSorter, Vector
+    near = Primitive(pos=Vector([0, 0, 1]))
+    far = Primitive(pos=Vector([0, 0, 10]))
+    middle = Primitive(pos=Vector([0, 0, 5]))
+    sorter = DepthSorter()
+    assert sorter.sort([near, far, middle], Vector()) == [far, middle, near]
+    # the previous order is kept for objects that are still present
+    newcomer = Primitive(pos=Vector([0, 0, 7]))
+    assert sorter.seed([near, newcomer, far]) == [2, 0, 1]
+    far.pos = Vector([0, 0, 0.5])
+    assert sorter.sort([near, far, middle], Vector()) == [middle, near, far]
+
+
+def test_depth_sorter_radix():
+    from pyglet_helper.objects import Primitive
+    from pyglet_helper.util import DepthSorter, Vector
+    objects = [Primitive(pos=Vector([i, 0, 0])) for i in range(10)]
+    sorter = DepthSorter(radix_threshold=4)
+    assert sorter.sort(objects, Vector()) == objects[::-1]
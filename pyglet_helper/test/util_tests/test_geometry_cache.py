@@ -0,0 +1,86 @@
+from __future__ import print_function
+import gc
+from mock import patch
+import pyglet_helper.test.fake_gl
+
+
+@patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
+def test_geometry_cache_references():
+    from pyglet_helper.util import GeometryCache
+    cache = GeometryCache()
+    group = object()
+    models = cache.acquire(group)
+    assert cache.acquire(group) is models
+    assert cache.acquire(object()) is not models
+    assert cache.references(group) == 2
+    cache.release(group)
+    assert models.box.handle != 0
+    # the last view using the models frees them
+    cache.release(group)
+    assert models.box.handle == 0
+    assert cache.references(group) == 0
+    assert len(cache) == 1
+
+
+def test_views_share_models():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL():
+        from pyglet_helper.objects import Sphere, View
+        from pyglet_helper.util import COUNTERS, GEOMETRY
+        group = object()
+        panes = [View(share_group=group) for _ in range(3)]
+        other = View()
+        assert panes[0].sphere_model is panes[2].sphere_model
+        assert other.sphere_model is not panes[0].sphere_model
+        compiled = COUNTERS.lists_compiled
+        for pane in panes:
+            pane.draw([Sphere()])
+            pane.draw([Sphere()])
+        # the sphere's levels of detail are only compiled once
+        assert COUNTERS.lists_compiled - compiled == 6
+        for pane in panes[:2]:
+            pane.gl_free()
+            pane.gl_free()
+        assert GEOMETRY.references(group) == 1
+        # a view which is garbage collected releases the models too
+        del pane, panes
+        gc.collect()
+        assert GEOMETRY.references(group) == 0
+        other.gl_free()
+
+
+def test_view_in_cycle_releases_models():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL():
+        from pyglet_helper.objects import View
+        from pyglet_helper.util import GEOMETRY
+        group = object()
+        view = View(share_group=group)
+        # the warmup refers back to the view
+        view.warmup.start(view)
+        assert GEOMETRY.references(group) == 1
+        del view
+        gc.collect()
+        assert GEOMETRY.references(group) == 0
+
+
+def test_models_per_share_group():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL():
+        from pyglet_helper.objects import View
+        from pyglet_helper.util import resources_for
+        first, second = object(), object()
+        with View(share_group=first) as view, \
+                View(share_group=second) as other:
+            # each share group's models draw their names from its own pool
+            assert view.geometry.resources is resources_for(first)
+            assert other.geometry.resources is resources_for(second)
+            assert all(model.resources is resources_for(first)
+                       for model in view.models)
+            assert all(model.resources is resources_for(second)
+                       for model in other.models)
+            assert resources_for(first).stats['owned'] == 20
+        # the models are freed into their own share groups' pools
+        assert resources_for(first).stats['owned'] == 0
+        assert resources_for(second).stats['owned'] == 0
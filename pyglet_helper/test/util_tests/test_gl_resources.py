@@ -0,0 +1,120 @@
+from __future__ import print_function
+import gc
+from mock import Mock, patch
+import pyglet_helper.test.fake_gl
+
+
+class Owner(object):
+    """ An object owning OpenGL objects """
+
+
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
+def test_resource_manager_list_blocks():
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.util import ResourceManager
+    manager = ResourceManager(block_size=4)
+    with patch.object(fake_gl, 'glGenLists', return_value=10) as gen_lists:
+        names = [manager.gen_list() for _ in range(5)]
+    assert names == [10, 11, 12, 13, 10]
+    assert gen_lists.call_count == 2
+    # a name given back is only reused after collect()
+    manager.free_list(12)
+    assert manager.gen_list() == 11
+    with patch.object(fake_gl, 'glNewList') as new_list:
+        manager.collect()
+    new_list.assert_called_once_with(12, fake_gl.GL_COMPILE)
+    assert manager.gen_list() == 12
+
+
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
+def test_resource_manager_release():
+    from pyglet_helper.util import ResourceManager
+    manager = ResourceManager()
+    release = Mock()
+    owner = Owner()
+    token = manager.track(owner, 'texture', 3, release)
+    assert manager.leaks()[0][:2] == ('texture', 3)
+    manager.release(token)
+    manager.release(token)
+    release.assert_called_once_with(3)
+    assert manager.leaks() == []
+    assert manager.stats == {'owned': 0, 'free_lists': 0, 'allocated': 1,
+                             'released': 1, 'leaked': 0}
+
+
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
+def test_resource_manager_collects_leaks():
+    from pyglet_helper.util import ResourceManager
+    manager = ResourceManager(debug=True)
+    release = Mock()
+    owner = Owner()
+    manager.track(owner, 'texture', 3, release)
+    del owner
+    gc.collect()
+    # the owner is gone, but the texture waits for the context
+    assert not release.called
+    with patch('sys.stdout') as stdout:
+        manager.collect()
+    release.assert_called_once_with(3)
+    assert manager.leaked == 1
+    assert 'test_gl_resources.py' in ''.join(
+        str(call) for call in stdout.write.call_args_list)
+
+
+def test_display_list_context_manager():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL():
+        from pyglet_helper.util import DisplayList, RESOURCES
+        # give back the lists of the garbage left by other tests
+        gc.collect()
+        RESOURCES.collect()
+        with DisplayList() as model:
+            handle = model.handle
+            assert handle
+        assert model.handle == 0
+        RESOURCES.collect()
+        assert DisplayList().handle == handle
+
+
+def test_view_lists_are_pooled():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL() as recorder:
+        from pyglet_helper.objects import Ring, View
+        with View() as view:
+            ring = Ring(thickness=0.1)
+            ring.render(view)
+            handle = ring.list.handle
+            ring.render(view)
+            # the ring compiles its geometry into the same list every frame
+            assert ring.list.handle == handle
+            models = view.models
+        # the view's model lists are given back
+        assert len(models) == 20
+        assert all(model.handle == 0 for model in models)
+        ring.gl_free()
+        assert ring.list is None
+        counts = recorder.counts()
+    assert counts['glGenLists'] <= 1
+
+
+def test_resources_per_share_group():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL():
+        from pyglet_helper.objects import View
+        from pyglet_helper.util import DisplayList, RESOURCES, resources_for
+        first, second = object(), object()
+        assert resources_for(first) is resources_for(first)
+        assert resources_for(first) is not resources_for(second)
+        assert resources_for(None) is RESOURCES
+        other = resources_for(second)
+        free_lists = other.stats['free_lists']
+        with View(share_group=first) as view:
+            assert view.resources is resources_for(first)
+            model = DisplayList(resources=view.resources)
+            handle = model.handle
+            model.gl_free()
+            view.resources.collect()
+            # a name given back in one share group is only handed out again
+            # in that share group
+            assert other.stats['free_lists'] == free_lists
+            assert DisplayList(resources=view.resources).handle == handle
@@ -0,0 +1,149 @@
+from __future__ import print_function
+from mock import patch
+import pyglet_helper.test.fake_gl
+
+
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
+def test_gl_state_skips_redundant_calls():
+    from pyglet_helper.util import GlState
+    from pyglet_helper.test import fake_gl
+    state = GlState()
+    with patch.object(fake_gl, 'glEnable') as gl_enable:
+        state.enable(fake_gl.GL_CULL_FACE)
+        state.enable(fake_gl.GL_CULL_FACE)
+        assert gl_enable.call_count == 1
+    state.disable(fake_gl.GL_CULL_FACE)
+    state.cull_face(fake_gl.GL_FRONT)
+    state.cull_face(fake_gl.GL_FRONT)
+    state.cull_face(fake_gl.GL_BACK)
+    state.material(fake_gl.GL_FRONT_AND_BACK, fake_gl.GL_SHININESS, 50)
+    state.material(fake_gl.GL_FRONT_AND_BACK, fake_gl.GL_SHININESS, 50)
+    assert state.counters == {'issued': 5, 'skipped': 3}
+    state.reset_counters()
+    assert state.counters == {'issued': 0, 'skipped': 0}
+
+
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
+def test_gl_state_invalidate():
+    from pyglet_helper.util import GlState
+    from pyglet_helper.test import fake_gl
+    state = GlState()
+    state.depth_mask(fake_gl.GL_FALSE)
+    state.invalidate()
+    state.depth_mask(fake_gl.GL_FALSE)
+    assert state.skipped == 0
+
+
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
+def test_gl_state_display_list():
+    from pyglet_helper.util import GlState
+    from pyglet_helper.test import fake_gl
+    state = GlState()
+    state.enable(fake_gl.GL_CULL_FACE)
+    state.begin_compile()
+    # the list is compiled, not executed, so nothing can be skipped
+    state.enable(fake_gl.GL_CULL_FACE)
+    state.disable(fake_gl.GL_CULL_FACE)
+    effects = state.end_compile()
+    assert state.skipped == 0
+    state.enable(fake_gl.GL_CULL_FACE)
+    assert state.skipped == 1
+    # calling the list leaves culling disabled
+    state.call_list(effects)
+    state.enable(fake_gl.GL_CULL_FACE)
+    assert state.skipped == 1
+
+
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.sphere.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.box.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.quadric.gl', new=pyglet_helper.test.fake_gl)
+def test_gl_state_scene():
+    from pyglet_helper.objects import Box, Sphere, View
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.util import Vector
+    scene = View()
+    spheres = [Sphere(pos=Vector([i, 0, 0])) for i in range(10)]
+    for sphere in spheres:
+        sphere.opacity = 0.5
+    with patch.object(fake_gl, 'glEnable') as gl_enable, \
+            patch.object(fake_gl, 'glMaterialf') as gl_material:
+        scene.gl_state.reset_counters()
+        for sphere in spheres:
+            sphere.render(scene)
+        # culling was enabled by View.setup(), the shininess and the
+        # (shared, default) color are set once
+        assert gl_enable.call_count == 0
+        assert gl_material.call_count == 1
+        assert scene.gl_state.skipped == 37
+        # the box's display list disables culling when it is called
+        Box().render(scene)
+        spheres[0].render(scene)
+        assert gl_enable.call_count == 2
+
+
+class Context(object):
+    """ A stand-in for a pyglet context """
+
+
+def test_gl_state_per_context():
+    import gc
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.test.recording_gl import RecordingGL
+    from pyglet_helper.util import gl_state
+    first, second = Context(), Context()
+    with RecordingGL():
+        from pyglet_helper.objects import View
+        from pyglet_helper.util import Rgb, STATE
+        color = Rgb(1, 0, 0)
+        with patch.object(fake_gl, 'current_context', first, create=True):
+            view = View()
+            assert View().gl_state is view.gl_state
+            color.gl_set(1.0)
+        with patch.object(fake_gl, 'current_context', second, create=True):
+            other = View()
+            issued = other.gl_state.issued
+            # the color set in the first context is not known in this one
+            color.gl_set(1.0)
+            assert other.gl_state.issued - issued == 3
+    assert view.gl_state is not other.gl_state
+    assert STATE not in (view.gl_state, other.gl_state)
+    contexts = len(gl_state._CONTEXTS)
+    del first
+    gc.collect()
+    assert len(gl_state._CONTEXTS) == contexts - 1
+
+
+def test_gl_state_material_keys():
+    from pyglet_helper.util.gl_state import _material_key
+    from pyglet_helper.test import fake_gl
+    key = _material_key(fake_gl.GL_FRONT_AND_BACK, fake_gl.GL_SPECULAR)
+    # the same key is returned each time, rather than a new tuple
+    assert _material_key(fake_gl.GL_FRONT_AND_BACK,
+                         fake_gl.GL_SPECULAR) is key
+    assert key == ('material', fake_gl.GL_FRONT_AND_BACK, fake_gl.GL_SPECULAR)
+
+
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
+def test_gl_state_lights():
+    from pyglet_helper.util import GlState
+    from pyglet_helper.test import fake_gl
+    state = GlState()
+    diffuse = (fake_gl.GLfloat * 4)(1, 1, 1, 1)
+    with patch.object(fake_gl, 'glLightfv') as gl_light:
+        state.light_v(fake_gl.GL_LIGHT0, fake_gl.GL_DIFFUSE, diffuse, 0)
+        state.light_v(fake_gl.GL_LIGHT0, fake_gl.GL_DIFFUSE, diffuse, 0)
+        # a new version of the same array is uploaded
+        state.light_v(fake_gl.GL_LIGHT0, fake_gl.GL_DIFFUSE, diffuse, 1)
+        # the lights are kept by invalidate(), only forgotten on request
+        state.invalidate()
+        state.light_v(fake_gl.GL_LIGHT0, fake_gl.GL_DIFFUSE, diffuse, 1)
+        assert gl_light.call_count == 2
+        state.invalidate_lights([fake_gl.GL_LIGHT0])
+        state.light_v(fake_gl.GL_LIGHT0, fake_gl.GL_DIFFUSE, diffuse, 1)
+        assert gl_light.call_count == 3
@@ -0,0 +1,61 @@
+from __future__ import print_function
+import os
+import subprocess
+import sys
+from nose.plugins.skip import SkipTest
+
+# The most time, in microseconds, pyglet_helper's own modules may take to
+# import the linear algebra, excluding numpy. Wall time depends on the load
+# of the machine, so the budget is only checked if this variable is set.
+IMPORT_BUDGET = 20000
+IMPORT_BUDGET_VARIABLE = 'PYGLET_HELPER_IMPORT_BUDGET'
+
+# The only modules of pyglet_helper importing the linear algebra imports
+LINEAR_MODULES = set(['pyglet_helper', 'pyglet_helper._lazy',
+                      'pyglet_helper.util', 'pyglet_helper.util.linear'])
+
+
+def import_times(statement):
+    """ Run statement in a fresh interpreter with python -X importtime.
+
+    :param statement: the import statement
+    :type statement: str
+    :return: the time spent importing each module, excluding the modules it
+    imported, in microseconds
+    :rtype: dict
+    """
+    if sys.version_info < (3, 7):
+        raise SkipTest("python -X importtime and lazy imports need Python "
+                       "3.7 or later")
+    process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c',
+                                statement], stderr=subprocess.PIPE)
+    _, output = process.communicate()
+    assert process.returncode == 0, output
+    times = {}
+    for line in output.decode('utf-8').splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_time)
+    return times
+
+
+def test_import_package():
+    times = import_times('import pyglet_helper')
+    imported = set(name for name in times if name.startswith('pyglet'))
+    assert imported == set(['pyglet_helper', 'pyglet_helper._lazy'])
+
+
+def test_import_linear_modules():
+    times = import_times('from pyglet_helper.util.linear import Vector')
+    imported = set(name for name in times if name.startswith('pyglet'))
+    # neither pyglet, nor the objects and materials, nor the rest of util
+    assert imported == LINEAR_MODULES
+
+
+def test_import_linear_budget():
+    if not os.environ.get(IMPORT_BUDGET_VARIABLE):
+        raise SkipTest("set %s=1 to check the import time" %
+                       IMPORT_BUDGET_VARIABLE)
+    times = import_times('from pyglet_helper.util.linear import Vector')
+    assert sum(times[name] for name in LINEAR_MODULES) < IMPORT_BUDGET
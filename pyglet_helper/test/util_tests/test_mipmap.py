@@ -0,0 +1,138 @@
+from __future__ import print_function
+from mock import patch
+from nose.tools import raises
+import pyglet_helper.test.fake_gl
+
+
+def test_mip_chain_box():
+    from numpy import arange, array_equal, ubyte
+    from pyglet_helper.util import mip_chain
+    data = arange(16, dtype=ubyte).reshape((2, 8, 1)) * 2
+    levels = mip_chain(data)
+    assert [level.shape for level in levels] == [(1, 4, 1), (1, 2, 1),
+                                                 (1, 1, 1)]
+    assert all(level.dtype == ubyte for level in levels)
+    # each texel is the average of a 2x2 block of the level above it
+    assert array_equal(levels[0][0, :, 0], [9, 13, 17, 21])
+    assert array_equal(levels[-1][0, :, 0], [15])
+
+
+def test_mip_chain_volume():
+    from numpy import full, ubyte
+    from pyglet_helper.util import mip_chain
+    from pyglet_helper.util.texture import mip_level_sizes
+    data = full((8, 8, 8, 3), 100, ubyte)
+    for mip_filter in ('box', 'kaiser'):
+        levels = mip_chain(data, mip_filter)
+        assert [level.shape for level in levels] == [
+            (4, 4, 4, 3), (2, 2, 2, 3), (1, 1, 1, 3)]
+        assert [level.nbytes for level in levels] == \
+            mip_level_sizes(data.shape)[1:]
+        # a constant texture stays constant
+        assert all((level == 100).all() for level in levels)
+
+
+def test_kaiser_weights():
+    from pyglet_helper.util.mipmap import kaiser_weights
+    weights = kaiser_weights(3)
+    assert len(weights) == 6
+    assert abs(weights.sum() - 1) < 1e-6
+    assert (weights == weights[::-1]).all()
+
+
+@raises(ValueError)
+def test_mip_chain_filter_error():
+    from numpy import zeros
+    from pyglet_helper.util import mip_chain
+    mip_chain(zeros((4, 4, 1)), 'gaussian')
+
+
+def test_cached_mip_chain():
+    import os
+    import shutil
+    import tempfile
+    from numpy import arange, array_equal, ubyte
+    from pyglet_helper.util import cached_mip_chain
+    from pyglet_helper.util.mipmap import mip_cache_path
+    directory = tempfile.mkdtemp()
+    try:
+        image = os.path.join(directory, "noise.tga")
+        open(image, 'wb').close()
+        data = arange(64, dtype=ubyte).reshape((8, 8, 1))
+        levels = cached_mip_chain(image[:-4], data, 'kaiser')
+        assert os.path.exists(mip_cache_path(image, 'kaiser'))
+        # the second call reads the levels from the cache
+        with patch('pyglet_helper.util.mipmap.mip_chain') as compute:
+            cached = cached_mip_chain(image[:-4], data, 'kaiser')
+            assert not compute.called
+        assert all(array_equal(a, b) for a, b in zip(levels, cached))
+        # a cache holding levels for a texture of another shape is ignored
+        other = arange(16, dtype=ubyte).reshape((4, 4, 1))
+        assert len(cached_mip_chain(image[:-4], other, 'kaiser')) == 2
+    finally:
+        shutil.rmtree(directory)
+
+
+@patch('pyglet_helper.util.texture.gl', new=pyglet_helper.test.fake_gl)
+def test_texture_uploads_mip_chain():
+    from numpy import zeros, ubyte
+    from pyglet_helper.common.materials import RawTexture
+    from pyglet_helper.util import TextureManager, mip_chain
+    from pyglet_helper.test import fake_gl
+    manager = TextureManager()
+    texture = RawTexture(loader=lambda: zeros((4, 8, 3), ubyte),
+                         mip_loader=mip_chain, manager=manager)
+    with patch.object(fake_gl, 'glTexImage2D') as tex_image_2d, \
+            patch.object(fake_gl, 'glGenerateMipmap') as generate:
+        texture.gl_activate()
+        assert [call[0][1] for call in tex_image_2d.call_args_list] == \
+            [0, 1, 2, 3]
+        assert not generate.called
+        # once the data changes, OpenGL generates the levels
+        texture.damage()
+        texture.gl_activate()
+        assert generate.call_count == 1
+    assert manager.stats['bytes_uploaded'] == texture.nbytes + 96
+
+
+def test_update_mip_chain():
+    from numpy import array_equal, ubyte
+    from numpy.random import RandomState
+    from pyglet_helper.util import mip_chain
+    from pyglet_helper.util.mipmap import update_mip_chain
+    random = RandomState(0)
+    for mip_filter in ('box', 'kaiser'):
+        data = random.randint(0, 256, (16, 16, 3)).astype(ubyte)
+        levels = mip_chain(data, mip_filter)
+        data[5:7, 9:12] = 255
+        update_mip_chain(levels, data, (9, 5, 3, 2), mip_filter)
+        # the updated levels match the levels of the new data, up to the
+        # rounding of the levels in between
+        for level, expected in zip(levels, mip_chain(data, mip_filter)):
+            assert abs(level.astype(int) - expected).max() <= 1
+        # the levels away from the region are left as they were
+        assert array_equal(levels[0][:1], mip_chain(data, mip_filter)[0][:1])
+
+
+@patch('pyglet_helper.util.texture.gl', new=pyglet_helper.test.fake_gl)
+def test_texture_damage_region_keeps_mip_chain():
+    from numpy import zeros, ubyte
+    from pyglet_helper.common.materials import RawTexture
+    from pyglet_helper.util import TextureManager, mip_chain
+    from pyglet_helper.test import fake_gl
+    texture = RawTexture(loader=lambda: zeros((8, 8, 3), ubyte),
+                         mip_loader=mip_chain, manager=TextureManager())
+    texture.gl_activate()
+    levels = texture.mip_levels
+    texture.data[0:2, 0:2] = 200
+    with patch.object(fake_gl, 'glTexSubImage2D') as tex_sub_image, \
+            patch.object(fake_gl, 'glGenerateMipmap') as generate:
+        texture.damage((0, 0, 2, 2))
+        texture.gl_activate()
+        # the region of every level is uploaded from the updated chain
+        assert [call[0][1] for call in tex_sub_image.call_args_list] == \
+            [0, 1, 2, 3]
+        assert not generate.called
+    assert texture.mip_levels is levels
+    assert (levels[0][0, 0] == 200).all() and (levels[1][0, 0] == 50).all()
+    assert (levels[0][1:, 1:] == 0).all()
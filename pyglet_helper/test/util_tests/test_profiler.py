@@ -0,0 +1,63 @@
+from __future__ import print_function
+from mock import patch
+import pyglet_helper.test.fake_gl
+
+
+class FakeClock(object):
+    """ A clock which advances by one microsecond each time it is read """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1e-6
+        return self.now
+
+
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.sphere.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.box.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.quadric.gl', new=pyglet_helper.test.fake_gl)
+def test_profiler_scene():
+    from pyglet_helper.objects import Box, Ellipsoid, Sphere, View
+    from pyglet_helper.util import Profiler
+    render = Sphere.__dict__['render']
+    scene = View()
+    stacks = []
+    with Profiler(clock=FakeClock()) as profiler:
+        profiler.add_callback(lambda stack, elapsed: stacks.append(stack))
+        scene.draw([Box(), Ellipsoid(), Sphere()])
+    # the methods are restored afterwards
+    assert Sphere.__dict__['render'] is render
+    assert Profiler.active is None
+    assert profiler.calls[('View.draw', 'Sphere.render', 'draw')] == 1
+    # inherited methods are named after the class of the object
+    assert profiler.calls[('View.draw', 'Ellipsoid.render',
+                           'Ellipsoid.init_model')] == 1
+    assert profiler.calls[('View.draw', 'Box.render', 'transform')] == 1
+    assert profiler.calls[('View.draw', 'Box.render', 'color')] == 1
+    assert stacks[-1] == ('View.draw',)
+    # each timed call reads the clock twice, so the whole frame took
+    # twice as many microseconds as there were calls
+    assert round(profiler.total_times[('View.draw',)] * 1e6) == \
+        2 * sum(profiler.calls.values()) - 1
+    lines = profiler.collapsed().splitlines()
+    assert 'View.draw;Box.render;Box.init_model 1' in lines
+    assert len(lines) == len(profiler.self_times)
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) == \
+        round(profiler.total_times[('View.draw',)] * 1e6)
+
+
+def test_profiler_single_install():
+    from pyglet_helper.util import Profiler
+    with Profiler():
+        try:
+            Profiler().install()
+        except ValueError:
+            pass
+        else:
+            assert False, "a second profiler was installed"
@@ -0,0 +1,74 @@
+from __future__ import print_function
+import json
+from io import StringIO
+
+
+def test_recording_gl_forwards_calls():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    from pyglet_helper.test import fake_gl
+    recorder = RecordingGL()
+    assert recorder.GL_CULL_FACE == fake_gl.GL_CULL_FACE
+    assert recorder.GLfloat is fake_gl.GLfloat
+    assert recorder.glu.gluNewQuadric() == -1
+    recorder.glEnable(fake_gl.GL_CULL_FACE)
+    assert recorder.counts() == {'glu.gluNewQuadric': 1, 'glEnable': 1}
+    call = recorder.calls[1]
+    assert call.args == (fake_gl.GL_CULL_FACE,)
+    assert call.site[2] == 'test_recording_gl_forwards_calls'
+    assert call.duration >= 0
+    recorder.recording = False
+    recorder.glEnable(fake_gl.GL_CULL_FACE)
+    assert len(recorder.calls) == 2
+    recorder.clear()
+    assert recorder.calls == []
+
+
+def test_recording_gl_install():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    import pyglet_helper.util.rgba
+    previous = pyglet_helper.util.rgba.gl
+    with RecordingGL() as recorder:
+        assert pyglet_helper.util.rgba.gl is recorder
+    assert pyglet_helper.util.rgba.gl is previous
+
+
+def test_recording_gl_scene():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL() as recorder:
+        from pyglet_helper.objects import Arrow, Ring, Sphere, View
+        scene = View()
+        recorder.clear()
+        for obj in [Sphere(), Arrow(), Ring(thickness=0.1)]:
+            obj.render(scene)
+        counts = recorder.counts()
+        sites = recorder.call_sites()
+    assert counts['glPushMatrix'] == counts['glPopMatrix']
+    assert counts['glu.gluSphere'] == 6
+    assert sum(sites.values()) == len(recorder.calls)
+    assert any(site[3] == 'material_v' for site in sites)
+
+
+def test_recording_gl_export_trace():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    recorder = RecordingGL()
+    recorder.glClear(0)
+    recorder.glLoadIdentity()
+    trace_file = StringIO()
+    recorder.export_trace(trace_file)
+    trace = json.loads(trace_file.getvalue())
+    events = trace['traceEvents']
+    assert [event['name'] for event in events] == ['glClear',
+                                                   'glLoadIdentity']
+    assert events[0]['ph'] == 'X'
+    assert events[0]['args']['args'] == ['0']
+
+
+def test_recording_gl_finds_modules():
+    from pyglet_helper.test.recording_gl import RecordingGL, gl_modules
+    names = [module.__name__ for module in gl_modules()]
+    assert 'pyglet_helper.util.texture_array' in names
+    assert 'pyglet_helper.util.geometry_cache' in names
+    assert 'pyglet_helper.objects.renderable' in names
+    with RecordingGL() as recorder:
+        from pyglet_helper.util import texture_array
+        assert texture_array.gl is recorder
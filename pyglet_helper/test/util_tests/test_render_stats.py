@@ -0,0 +1,126 @@
+from __future__ import print_function
+import json
+from mock import patch
+import pyglet_helper.test.fake_gl
+
+
+def test_render_counters():
+    from pyglet_helper.util import FrameStats, RenderCounters
+    counters = RenderCounters()
+    before = counters.snapshot()
+    counters.begin_compile()
+    counters.add_triangles(10)
+    counters.add_triangles(2)
+    # triangles compiled into a list are only drawn when it is called
+    assert counters.triangles == {}
+    triangles = counters.end_compile()
+    assert triangles == 12
+    counters.draw(triangles, lod=3)
+    counters.draw(triangles, lod=3)
+    counters.transform()
+    stats = FrameStats.between(before, counters.snapshot(),
+                               objects_submitted=2)
+    assert stats.draw_calls == 2
+    assert stats.lists_compiled == 1
+    assert stats.transforms == 1
+    assert stats.triangles == {3: 24}
+    assert stats.total_triangles == 24
+
+
+def test_frame_stats_export():
+    from pyglet_helper.util import FrameStats
+    stats = FrameStats(objects_submitted=3, draw_calls=2, triangles={0: 12},
+                       stage_times={'opaque': 0.25, 'setup': 0.5})
+    assert stats.frame_time == 0.75
+    report = json.loads(stats.to_json())
+    assert report['objects_submitted'] == 3
+    assert report['triangles'] == {'0': 12}
+    assert report['stage_times']['sort'] == 0.0
+    text = stats.to_prometheus()
+    assert 'pyglet_helper_frame_draw_calls 2\n' in text
+    assert 'pyglet_helper_frame_triangles{lod="0"} 12\n' in text
+    assert 'pyglet_helper_frame_stage_seconds{stage="opaque"} 0.25\n' in text
+
+
+def test_frame_time_histogram():
+    from pyglet_helper.util import FrameTimeHistogram
+    histogram = FrameTimeHistogram(size=100)
+    assert histogram.percentile(50) == 0.0
+    for i in range(200):
+        histogram.add(i / 1000.0)
+    # only the last 100 frames are kept
+    assert len(histogram) == 100
+    summary = histogram.summary()
+    assert summary['count'] == 200
+    assert summary['max'] == 0.199
+    assert abs(summary['p50'] - 0.1495) < 1e-9
+    assert summary['p50'] < summary['p95'] < summary['p99']
+    text = histogram.to_prometheus(prefix='viz')
+    assert '# TYPE viz_frame_seconds summary\n' in text
+    assert 'viz_frame_seconds{quantile="0.95"}' in text
+    assert 'viz_frame_seconds_count 100\n' in text
+    assert json.loads(histogram.to_json())['count'] == 200
+
+
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.sphere.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.box.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.linear.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.quadric.gl', new=pyglet_helper.test.fake_gl)
+def test_view_frame_stats():
+    from pyglet_helper.objects import Box, Sphere, View
+    from pyglet_helper.util import Vector
+    scene = View(frame_history=10)
+    translucent = Sphere(pos=Vector([0, 0, 5]))
+    translucent.opacity = 0.5
+    empty = Sphere(radius=0.0)
+    objects = [Box(), Sphere(), translucent, empty]
+    scene.draw(objects)
+    stats = scene.stats
+    assert stats.objects_submitted == 4
+    # the zero radius sphere draws nothing
+    assert stats.objects_culled == 1
+    # the translucent sphere is drawn twice, inside then outside
+    assert stats.draw_calls == 4
+    # the box list, and the six sphere lists, compiled by the first sphere
+    assert stats.lists_compiled == 7
+    assert stats.transforms == 3
+    # the box has no levels of detail; the spheres cover 800 pixels, so are
+    # drawn with 55 slices and 29 stacks
+    assert stats.triangles == {0: 24, 3: 3 * 2 * 55 * 28}
+    assert stats.state_changes > 0
+    assert set(stats.stage_times) == set(['setup', 'opaque', 'sort',
+                                          'translucent'])
+    scene.draw(objects)
+    assert scene.stats.objects_submitted == 4
+    assert len(scene.frame_times) == 2
+    assert View(frame_history=0).frame_times is None
+
+
+def test_view_frame_measured_from_setup():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL():
+        from pyglet_helper.objects import Box, Sphere, View
+        first, second = View(), View()
+        clock = iter(range(100)).__next__
+        with patch('pyglet_helper.objects.renderable.CLOCK', new=clock):
+            first.draw([Box()])
+            # the time between frames is not part of either of them
+            clock()
+            clock()
+            first.setup()
+            # the work of another view drawn meanwhile is not counted
+            second.draw([Box(), Sphere()])
+            first.draw([Box()])
+        # each read of the clock advances it a second: the first frame runs
+        # from 0 to 3, and the second from setup(), at 6, to 13, leaving out
+        # the two reads in between
+        assert list(first.frame_times.times) == [3, 7]
+        assert first.stats.stage_times['setup'] == 5
+        assert first.stats.draw_calls == 1
+        assert second.stats.draw_calls == 2
+        assert second.counters.draw_calls == 2
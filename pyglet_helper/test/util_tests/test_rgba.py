@@ -23,6 +23,7 @@ def test_rgba_init():
     assert blo[3] == 0.5
 
 @patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_rgba_gl():
     from pyglet_helper.util import Rgba
     blo = Rgba()
@@ -144,3 +145,50 @@ def test_rgb_rgb():
     assert(tup[0]==0.1)
     assert(tup[1]==0.2)
     assert(tup[2]==0.3)
+
+
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
+def test_rgb_gl_set_payload():
+    from pyglet_helper.util import Rgb
+    blo = Rgb(red=0.5, green=0.25, blue=0.125)
+    blo.gl_set(0.5)
+    payload = blo._payload
+    assert list(payload) == [0.5, 0.25, 0.125, 0.5]
+    blo.gl_set(0.5)
+    assert blo._payload is payload
+    blo.gl_set(1.0)
+    assert blo._payload[3] == 1.0
+    payload = blo._payload
+    blo.green = 1.0
+    blo.gl_set(1.0)
+    assert blo._payload is not payload
+    assert blo._payload[1] == 1.0
+
+
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.rgba.gl', new=pyglet_helper.test.fake_gl)
+def test_rgba_gl_set_payload():
+    from pyglet_helper.util import Rgba
+    blo = Rgba(red=0.5, green=0.25, blue=0.125, opacity=0.5)
+    blo.gl_set()
+    payload = blo._payload
+    blo.gl_set()
+    assert blo._payload is payload
+    blo[3] = 1.0
+    blo.gl_set()
+    assert list(blo._payload) == [0.5, 0.25, 0.125, 1.0]
+
+
+@raises(ValueError)
+def test_rgb_frozen():
+    from pyglet_helper.util import color
+    assert color.RED.frozen
+    color.RED.green = 1.0
+
+
+@raises(ValueError)
+def test_rgba_frozen():
+    from pyglet_helper.util import Rgba
+    blo = Rgba().freeze()
+    blo.opacity = 0.5
@@ -0,0 +1,84 @@
+from __future__ import print_function
+from mock import patch
+import pyglet_helper.test.fake_gl
+
+
+class FakeView(object):
+    """ The part of a View that realizing a shader program reads """
+    enable_shaders = True
+
+
+def test_insert_defines():
+    from pyglet_helper.util.shader_source import insert_defines
+    assert insert_defines("#version 110\nvoid main() {}\n",
+                          {'TEXTURED': 1, 'LIGHT_COUNT': 2}) == \
+        "#version 110\n#define LIGHT_COUNT 2\n#define TEXTURED 1\n" \
+        "void main() {}\n"
+    assert insert_defines("void main() {}\n", {'A': 1}) == \
+        "#define A 1\nvoid main() {}\n"
+
+
+def test_permutation_defines():
+    from pyglet_helper.util import permutation_defines
+    assert permutation_defines() == {}
+    assert permutation_defines(light_count=12) == {'LIGHT_COUNT': 8}
+
+
+def test_permutation_cache():
+    from pyglet_helper.util import PermutationCache, ShaderProgram
+    cache = PermutationCache(size=2)
+    program = ShaderProgram("[varying]\n#version 110\n[fragment]\n"
+                            "void permuted() {}\n")
+    assert cache.get(program, {}) is program
+    two = cache.get(program, {'LIGHT_COUNT': 2})
+    assert two.stages['fragment'].startswith("#version 110\n"
+                                             "#define LIGHT_COUNT 2\n")
+    assert two.source != program.source
+    assert cache.get(program, {'LIGHT_COUNT': 2}) is two
+    three = cache.get(program, {'LIGHT_COUNT': 3})
+    cache.get(program, {'LIGHT_COUNT': 2})
+    # the least recently used permutation is dropped
+    cache.get(program, {'LIGHT_COUNT': 4})
+    assert cache.get(program, {'LIGHT_COUNT': 3}) is not three
+    assert cache.stats == {'permutations': 2, 'size': 2, 'hits': 2,
+                           'misses': 4, 'evictions': 2}
+
+
+@patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
+def test_permutation_cache_frees_evicted():
+    from mock import Mock
+    from pyglet_helper.util import PermutationCache, ShaderProgram
+    cache = PermutationCache(size=1)
+    program = ShaderProgram("[fragment] void evicted() {}")
+    first = cache.get(program, {'LIGHT_COUNT': 1})
+    first.realize(FakeView())
+    first.gl_free = Mock()
+    cache.get(program, {'LIGHT_COUNT': 2})
+    first.gl_free.assert_called_once_with()
+
+
+def test_view_program_for_lights():
+    from pyglet_helper.test.recording_gl import RecordingGL
+    with RecordingGL():
+        from pyglet_helper.objects import Material, UNSHADED, View
+        view = View()
+        material = Material(shader_program="[fragment] void lit() {}")
+        assert view.shader_features(material) == {'LIGHT_COUNT': 0}
+        view.lights = [object(), object()]
+        # the permutation is queued, and the material drawn unshaded
+        # meanwhile
+        assert view.program_for(material) is UNSHADED.shader
+        assert view.warmup.remaining == 1
+        view.warmup.poll()
+        program = view.program_for(material)
+        assert program is not material.shader
+        assert program.ready
+        assert "#define LIGHT_COUNT 2\n" in program.stages['fragment']
+        # the same lights pick the same permutation
+        assert material.active_program(view) is program
+        view.lights.append(object())
+        assert view.program_for(material) is UNSHADED.shader
+        view.warmup.poll()
+        assert view.program_for(material) is not program
+        view.enable_shaders = False
+        assert view.program_for(material) is None
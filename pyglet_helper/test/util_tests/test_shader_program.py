@@ -21,6 +21,8 @@ def test_shader_program_uniform_location():
 @patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
 @patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
 def test_shader_program_realize():
     from pyglet_helper.util.shader_program import ShaderProgram
     from pyglet_helper.objects.renderable import View
@@ -43,3 +45,134 @@ def test_shader_program_gl_free():
     blo = ShaderProgram()
     blo.gl_free()
 
+
+
+def test_program_cache_shares_programs():
+    from pyglet_helper.util import ProgramCache
+    cache = ProgramCache()
+    program = cache.get("[fragment] void main() {}")
+    assert cache.get("[fragment] void main() {}") is program
+    assert cache.get("[fragment] void main() { }") is not program
+    assert program.cache is cache
+    assert cache.stats == {'programs': 2, 'hits': 1, 'misses': 2,
+                           'binaries_loaded': 0, 'binaries_saved': 0}
+
+
+def test_materials_share_programs():
+    from pyglet_helper.objects import Material
+    first = Material(shader_program="[fragment] void material_main() {}")
+    second = Material(shader_program="[fragment] void material_main() {}")
+    assert first._shader is second._shader
+
+
+def test_program_cache_binaries():
+    import shutil
+    import tempfile
+    from mock import patch
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.test.recording_gl import RecordingGL
+    from pyglet_helper.util import ProgramCache
+    source = "[fragment] void main() {}"
+    directory = tempfile.mkdtemp()
+    try:
+        with patch.object(fake_gl.gl_info, 'extensions',
+                          {ProgramCache.BINARY_EXTENSION}), \
+                RecordingGL() as recorder:
+            from pyglet_helper.objects import View
+            view = View()
+            recorder.clear()
+            cache = ProgramCache(binary_path=directory)
+            cache.get(source).realize(view)
+            assert recorder.counts()['glext_arb.glCompileShaderARB'] == 2
+            assert recorder.counts()['glGetProgramBinary'] == 1
+            assert cache.binaries_saved == 1
+            # a later run loads the binary instead of compiling
+            recorder.clear()
+            cache = ProgramCache(binary_path=directory)
+            program = cache.get(source)
+            program.realize(view)
+            counts = recorder.counts()
+            assert counts['glProgramBinary'] == 1
+            assert 'glext_arb.glCompileShaderARB' not in counts
+            assert cache.binaries_loaded == 1
+            assert program.program > 0
+    finally:
+        shutil.rmtree(directory)
+
+
+@patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
+def test_program_cache_rejected_binary():
+    import shutil
+    import tempfile
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.util import ProgramCache
+    directory = tempfile.mkdtemp()
+    try:
+        with patch.object(fake_gl.gl_info, 'extensions',
+                          {ProgramCache.BINARY_EXTENSION}):
+            cache = ProgramCache(binary_path=directory)
+            program = cache.get("[fragment] void main() {}")
+            program.program = 1
+            cache.save_binary(program)
+            # the driver reports that the binary did not link
+            with patch.object(fake_gl.glext_arb, 'link_status', False):
+                assert not cache.load_binary(program)
+            assert cache.load_binary(program)
+            assert cache.binaries_loaded == 1
+            # binaries made by another driver are not used
+            with patch.object(fake_gl.gl_info, 'get_version',
+                              return_value='3.0'):
+                assert not cache.load_binary(program)
+    finally:
+        shutil.rmtree(directory)
+
+
+@patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.objects.renderable.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.display_list.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_resources.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.gl_state.gl', new=pyglet_helper.test.fake_gl)
+def test_shader_program_register_uniforms():
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.util.shader_program import ShaderProgram
+    from pyglet_helper.objects.renderable import View
+    shader = ShaderProgram("[fragment] void main() {}")
+    with patch.object(fake_gl.glext_arb, 'active_uniforms',
+                      ['model_material', 'light_pos[0]', 'light_count']):
+        shader.realize(View())
+    assert shader.uniforms == {'model_material': 0, 'light_pos[0]': 1,
+                               'light_pos': 1, 'light_count': 2}
+    with patch.object(fake_gl.glext_arb, 'glGetUniformLocationARB') as query:
+        assert shader.uniform_location('light_pos') == 1
+        # inactive uniforms are known not to exist
+        assert shader.uniform_location('light_color') == -1
+        assert not query.called
+
+
+@patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
+def test_shader_program_uniform_shadowing():
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.util import Tmatrix, Vector
+    from pyglet_helper.util.shader_program import ShaderProgram
+    shader = ShaderProgram()
+    shader.program = 1
+    matrix = Tmatrix()
+    matrix.translate(Vector([1, 2, 3]))
+    with patch.object(fake_gl.glext_arb, 'glUniformMatrix4fvARB') as upload, \
+            patch.object(fake_gl.glext_arb, 'glUniform4fvARB') as upload_4fv, \
+            patch.object(fake_gl.glext_arb, 'glUniform1iARB') as upload_1i:
+        shader.set_uniform_matrix(0, matrix)
+        shader.set_uniform_matrix(0, Tmatrix(matrix))
+        assert upload.call_count == 1
+        shader.set_uniform_array(1, [(0, 0, 1, 0), (1, 1, 1, 1)])
+        shader.set_uniform_array(1, [(0, 0, 1, 0), (1, 1, 1, 1)])
+        shader.set_uniform_array(1, [(0, 0, 1, 0)])
+        assert upload_4fv.call_count == 2
+        assert upload_4fv.call_args[0][1] == 1
+        shader.set_uniform_int(2, 3)
+        shader.set_uniform_int(2, 3)
+        # uniforms the program does not have are ignored
+        shader.set_uniform_int(-1, 3)
+        assert upload_1i.call_count == 1
+    assert shader.uniform_uploads == 4
+    assert shader.uniform_skips == 3
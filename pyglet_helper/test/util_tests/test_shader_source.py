@@ -0,0 +1,71 @@
+from __future__ import print_function
+from mock import patch
+import pyglet_helper.test.fake_gl
+
+LIBRARY = """[vertex]
+void basic() {}
+[varying]
+#version 110
+varying vec3 normal;
+[fragment]
+void main() { material_main(); }
+"""
+
+
+def test_parse_sections():
+    from pyglet_helper.util.shader_source import parse_sections
+    sections = parse_sections("ignored\n  [fragment]\nvoid a() {}\n"
+                              "[vertex]\nvoid b() {}\n[fragment]\n"
+                              "void c() {}")
+    assert sections == {'fragment': 'void a() {}\nvoid c() {}\n',
+                        'vertex': 'void b() {}\n'}
+    assert parse_sections("void main() {}") == {}
+
+
+def test_shader_library_assemble():
+    from pyglet_helper.util import ShaderLibrary
+    library = ShaderLibrary(LIBRARY)
+    assert 'varying' in library
+    material = "[fragment]\nvoid material_main() {}\n"
+    source, stages = library.assemble(material)
+    assert source == LIBRARY + material
+    # the varying section, with the #version directive, comes first
+    assert stages['vertex'] == ("#version 110\nvarying vec3 normal;\n"
+                                "void basic() {}\n")
+    assert stages['fragment'] == ("#version 110\nvarying vec3 normal;\n"
+                                  "void main() { material_main(); }\n"
+                                  "void material_main() {}\n")
+    # each material is only assembled once
+    assert library.assemble(material)[1] is stages
+
+
+@patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
+def test_shader_program_compiles_stages():
+    from ctypes import cast, c_char_p, POINTER
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.util import ShaderProgram
+
+    class FakeView(object):
+        enable_shaders = True
+    program = ShaderProgram(LIBRARY)
+    assert program.stages['vertex'].endswith("void basic() {}\n")
+    compiled = []
+
+    def shader_source(shader, count, sources, lengths):
+        compiled.append(cast(sources, POINTER(c_char_p))[0].decode('utf-8'))
+    with patch.object(fake_gl.glext_arb, 'glShaderSourceARB',
+                      side_effect=shader_source):
+        program.realize(FakeView())
+    assert compiled == [program.stages['vertex'], program.stages['fragment']]
+
+
+def test_shader_uses_parsed_library():
+    from pyglet_helper.common import shader
+    from pyglet_helper.common.materials import load_shader_library
+    library = load_shader_library()
+    assert load_shader_library() is library
+    material = shader('parsed', '[fragment]\nvoid material_main() {}', 5.01)
+    assert material._shader._stages is not None
+    assert "basic();" in material._shader.stages['vertex']
+    assert material._shader.stages['vertex'].startswith(
+        library.sections['varying'])
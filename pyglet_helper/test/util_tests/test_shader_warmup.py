@@ -0,0 +1,121 @@
+from __future__ import print_function
+from mock import Mock, patch
+import pyglet_helper.test.fake_gl
+
+
+class FakeView(object):
+    """ The part of a View that realizing a shader program reads """
+    enable_shaders = True
+
+
+def programs(count):
+    """ Build programs that are not in the process-wide cache """
+    from pyglet_helper.util import ShaderProgram
+    return [ShaderProgram("[fragment] void warmup%d() {}" % i)
+            for i in range(count)]
+
+
+@patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.shader_warmup.gl', new=pyglet_helper.test.fake_gl)
+def test_shader_warmup_parallel():
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.util import ShaderWarmup
+    first, second = programs(2)
+    warmup = ShaderWarmup([first, second])
+    with patch.object(fake_gl.gl_info, 'extensions',
+                      {'GL_KHR_parallel_shader_compile'}), \
+            patch.object(fake_gl.glext_arb, 'linking', set()):
+        warmup.start(FakeView())
+        assert warmup.mode == 'parallel'
+        # the driver is still linking the first program
+        fake_gl.glext_arb.linking.add(first.program)
+        assert not warmup.poll()
+        assert not first.ready and first.linking
+        assert second.ready
+        fake_gl.glext_arb.linking.clear()
+        assert warmup.poll()
+    assert first.ready
+    assert warmup.remaining == 0
+
+
+@patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.shader_warmup.gl', new=pyglet_helper.test.fake_gl)
+def test_shader_warmup_incremental():
+    from pyglet_helper.util import ShaderWarmup
+    warmup = ShaderWarmup(programs(3), per_poll=2)
+    assert not warmup.done
+    warmup.start(FakeView())
+    assert warmup.mode == 'incremental'
+    assert not any(program.ready for program in warmup.programs)
+    assert not warmup.poll()
+    assert warmup.remaining == 1
+    assert warmup.poll()
+    assert all(program.ready for program in warmup.programs)
+
+
+@patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.shader_warmup.gl', new=pyglet_helper.test.fake_gl)
+def test_shader_warmup_thread():
+    from pyglet_helper.util import ShaderWarmup
+    context = Mock()
+    from pyglet_helper.util import RESOURCES
+    warmup = ShaderWarmup(programs(2), context_factory=lambda: context)
+    owned = len(RESOURCES)
+    warmup.start(FakeView())
+    assert warmup.mode == 'thread'
+    warmup._thread.join()
+    assert context.set_current.called
+    # linked, but neither tracked nor used until the render thread adopts
+    # them
+    assert not any(program.ready or program.program != -1
+                   for program in warmup.programs)
+    assert len(RESOURCES) == owned
+    assert warmup.poll()
+    assert all(program.ready for program in warmup.programs)
+    assert len(RESOURCES) == owned + 2
+
+
+@patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
+def test_material_fallback_program():
+    from pyglet_helper.objects import Material, UNSHADED
+    material = Material(shader_program="[fragment] void warmup() {}")
+    view = FakeView()
+    # until its program is ready, the material is drawn unshaded
+    assert material.fallback_program(view) is UNSHADED.shader
+    assert not material.shader.ready
+    material.shader.realize(view)
+    assert material.fallback_program(view) is material.shader
+    assert Material().fallback_program(view) is None
+
+
+@patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.shader_warmup.gl', new=pyglet_helper.test.fake_gl)
+def test_shader_warmup_missing_function():
+    from pyglet_helper.test import fake_gl
+    from pyglet_helper.util import ShaderWarmup
+    warmup = ShaderWarmup(programs(1))
+    # the extension is advertised, but its function cannot be loaded
+    with patch.object(fake_gl.gl_info, 'extensions',
+                      {'GL_ARB_parallel_shader_compile'}), \
+            patch.object(fake_gl.lib, 'functions', {}):
+        warmup.start(FakeView())
+    assert warmup.mode == 'incremental'
+
+
+@patch('pyglet_helper.util.shader_program.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.shader_warmup.gl', new=pyglet_helper.test.fake_gl)
+def test_shader_warmup_add():
+    from pyglet_helper.util import ShaderWarmup
+    first, second = programs(2)
+    warmup = ShaderWarmup([first], per_poll=2)
+    warmup.start(FakeView())
+    warmup.add(second)
+    warmup.add(second)
+    assert warmup.remaining == 2
+    assert warmup.poll()
+    assert first.ready and second.ready
+    # a program already realized needs no compiling
+    third = programs(1)[0]
+    third.realize(FakeView())
+    warmup.add(third)
+    assert warmup.done
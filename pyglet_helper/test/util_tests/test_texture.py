@@ -0,0 +1,165 @@
+from __future__ import print_function
+from mock import patch
+import pyglet_helper.test.fake_gl
+
+
+def data_texture(shape, **kwargs):
+    """ Build a texture holding an array of zeros """
+    from numpy import zeros, ubyte
+    from pyglet_helper.util import Texture
+    texture = Texture(**kwargs)
+    texture.data = zeros(shape, ubyte)
+    return texture
+
+
+def test_mip_level_sizes():
+    from pyglet_helper.util.texture import mip_level_sizes
+    assert mip_level_sizes((4, 8, 3)) == [96, 24, 6, 3]
+    assert mip_level_sizes((4, 8, 3), mipmap=False) == [96]
+    assert mip_level_sizes((4, 4, 4, 1)) == [64, 8, 1]
+
+
+@patch('pyglet_helper.util.texture.gl', new=pyglet_helper.test.fake_gl)
+def test_texture_without_data():
+    from pyglet_helper.util import Texture, TextureManager
+    manager = TextureManager()
+    texture = Texture(manager=manager)
+    texture.damage()
+    texture.gl_activate()
+    assert not texture.damaged
+    assert texture.handle == 0
+    assert manager.stats['uploads'] == 0
+
+
+@patch('pyglet_helper.util.texture.gl', new=pyglet_helper.test.fake_gl)
+def test_texture_lazy_upload():
+    from pyglet_helper.util import TextureManager
+    from pyglet_helper.test import fake_gl
+    manager = TextureManager()
+    texture = data_texture((64, 64, 3), manager=manager)
+    volume = data_texture((8, 8, 8, 1), mipmap=False, manager=manager)
+    assert texture.handle == 0
+    with patch.object(fake_gl, 'glTexImage2D') as tex_image_2d, \
+            patch.object(fake_gl, 'glTexImage3D') as tex_image_3d:
+        texture.gl_activate()
+        texture.gl_activate()
+        volume.gl_activate()
+        assert tex_image_2d.call_count == 1
+        assert tex_image_3d.call_count == 1
+    assert texture.handle != 0
+    assert manager.is_resident(texture)
+    # 64x64 RGB, with mip levels down to 1x1
+    assert texture.nbytes == 3 * (4096 + 1024 + 256 + 64 + 16 + 4 + 1)
+    assert manager.stats == {'resident_textures': 2,
+                             'resident_bytes': texture.nbytes + 512,
+                             'budget': None, 'uploads': 2, 'updates': 0,
+                             'evictions': 0, 'hits': 1, 'misses': 2,
+                             'bytes_uploaded': 64 * 64 * 3 + 512}
+    # damaged textures are uploaded again
+    texture.damage()
+    texture.gl_activate()
+    assert not texture.damaged
+    assert manager.stats['uploads'] == 3
+    manager.clear()
+    assert texture.handle == 0
+    assert manager.resident_bytes == 0
+
+
+@patch('pyglet_helper.util.texture.gl', new=pyglet_helper.test.fake_gl)
+def test_texture_lru_eviction():
+    from pyglet_helper.util import TextureManager
+    manager = TextureManager(budget=250)
+    first, second, third = [data_texture((10, 10, 1), mipmap=False,
+                                         manager=manager) for _ in range(3)]
+    first.gl_activate()
+    second.gl_activate()
+    # first is now more recently used than second
+    first.gl_activate()
+    third.gl_activate()
+    assert manager.is_resident(first)
+    assert not manager.is_resident(second)
+    assert second.handle == 0
+    assert manager.resident_bytes == 200
+    # second is uploaded again, evicting the least recently used (first)
+    second.gl_activate()
+    assert second.handle != 0
+    assert not manager.is_resident(first)
+    assert manager.stats['evictions'] == 2
+    assert manager.stats['uploads'] == 4
+
+
+@patch('pyglet_helper.util.texture.gl', new=pyglet_helper.test.fake_gl)
+def test_texture_damage_regions():
+    from pyglet_helper.util import TextureManager
+    from pyglet_helper.util.texture import MAX_DAMAGE_REGIONS
+    from pyglet_helper.test import fake_gl
+    manager = TextureManager()
+    texture = data_texture((64, 32, 4), manager=manager)
+    texture.gl_activate()
+    # regions are clipped to the texture
+    texture.damage((30, 60, 8, 8))
+    texture.damage((40, 0, 8, 8))
+    assert texture.damaged_regions == [(30, 60, 2, 4)]
+    with patch.object(fake_gl, 'glTexSubImage2D') as tex_sub_image, \
+            patch.object(fake_gl, 'glPixelStorei') as pixel_store:
+        texture.gl_activate()
+        # the region is read in place from the texture's data
+        tex_sub_image.assert_called_once_with(
+            fake_gl.GL_TEXTURE_2D, 0, 30, 60, 2, 4, fake_gl.GL_RGBA,
+            fake_gl.GL_UNSIGNED_BYTE, texture.data.ctypes.data)
+        pixel_store.assert_any_call(fake_gl.GL_UNPACK_ROW_LENGTH, 32)
+        pixel_store.assert_any_call(fake_gl.GL_UNPACK_SKIP_PIXELS, 30)
+        pixel_store.assert_any_call(fake_gl.GL_UNPACK_SKIP_ROWS, 60)
+    assert texture.damaged_regions == []
+    assert manager.stats['uploads'] == 1
+    assert manager.stats['updates'] == 1
+    assert manager.stats['bytes_uploaded'] == 64 * 32 * 4 + 2 * 4 * 4
+    # many small regions are merged into their bounding box
+    for i in range(MAX_DAMAGE_REGIONS + 1):
+        texture.damage((i, 2 * i, 1, 1))
+    assert texture.damaged_regions == [(0, 0, MAX_DAMAGE_REGIONS + 1,
+                                        2 * MAX_DAMAGE_REGIONS + 1)]
+
+
+@patch('pyglet_helper.util.texture.gl', new=pyglet_helper.test.fake_gl)
+def test_texture_pixel_buffers():
+    from numpy import arange, ubyte
+    from pyglet_helper.util import TextureManager
+    from pyglet_helper.test import fake_gl
+    manager = TextureManager()
+    texture = data_texture((16, 16, 1), manager=manager, pixel_buffers=True)
+    texture.data[...] = arange(256, dtype=ubyte).reshape((16, 16, 1))
+    texture.gl_activate()
+    with patch.object(fake_gl, 'glTexSubImage2D') as tex_sub_image:
+        for region in [(2, 3, 4, 5), (0, 0, 2, 2)]:
+            texture.damage(region)
+            texture.gl_activate()
+        assert tex_sub_image.call_count == 2
+        # with a buffer bound, the data is read from offset 0 of the buffer
+        assert tex_sub_image.call_args[0][-1] == 0
+    first, second = texture._buffers
+    assert first != second
+    # the buffers are used in turn, and hold the last region copied to them
+    assert list(bytearray(fake_gl._BUFFERS[first])) == \
+        [16 * row + column for row in range(3, 8) for column in range(2, 6)]
+    assert list(bytearray(fake_gl._BUFFERS[second])) == [0, 1, 16, 17]
+    texture.gl_free()
+    assert first not in fake_gl._BUFFERS
+
+
+@patch('pyglet_helper.util.texture.gl', new=pyglet_helper.test.fake_gl)
+def test_texture_pixel_buffer_map_fails():
+    from pyglet_helper.util import TextureManager
+    from pyglet_helper.test import fake_gl
+    manager = TextureManager()
+    texture = data_texture((16, 16, 1), manager=manager, pixel_buffers=True)
+    texture.gl_activate()
+    texture.damage((2, 3, 4, 5))
+    with patch.object(fake_gl, 'glMapBuffer', return_value=0), \
+            patch.object(fake_gl, 'glTexSubImage2D') as tex_sub_image:
+        texture.gl_activate()
+    # the region is uploaded from the texture's data instead
+    tex_sub_image.assert_called_once()
+    assert tex_sub_image.call_args[0][-1] == texture.data.ctypes.data
+    assert texture.damaged_regions == []
+    texture.gl_free()
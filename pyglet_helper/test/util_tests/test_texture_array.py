@@ -0,0 +1,109 @@
+from __future__ import print_function
+from mock import patch
+from nose.tools import raises
+import pyglet_helper.test.fake_gl
+
+
+def layer_texture(value, shape=(4, 4, 3)):
+    """ Build a texture filled with one value """
+    from numpy import full, ubyte
+    from pyglet_helper.common.materials import RawTexture
+    return RawTexture(loader=lambda: full(shape, value, ubyte))
+
+
+def test_texture_array_layers():
+    from pyglet_helper.util import TextureArray
+    first, second = layer_texture(1), layer_texture(2)
+    array = TextureArray([first])
+    assert array.add(second) == 1
+    # a texture already in the array keeps its layer
+    assert array.add(first) == 0
+    assert len(array) == 2
+    assert array.layer(second) == 1
+    assert array.data.shape == (2, 4, 4, 3)
+    assert (array.data[1] == 2).all()
+    # both layers, with 4x4, 2x2 and 1x1 levels
+    assert array.nbytes == 2 * 3 * (16 + 4 + 1)
+
+
+@raises(ValueError)
+def test_texture_array_shape_error():
+    from pyglet_helper.util import TextureArray
+    TextureArray([layer_texture(1), layer_texture(2, (8, 8, 3))])
+
+
+@raises(ValueError)
+def test_texture_array_layer_error():
+    from pyglet_helper.util import TextureArray
+    TextureArray([layer_texture(1)]).layer(layer_texture(2))
+
+
+@patch('pyglet_helper.util.texture.gl', new=pyglet_helper.test.fake_gl)
+@patch('pyglet_helper.util.texture_array.gl', new=pyglet_helper.test.fake_gl)
+def test_texture_array_upload():
+    from pyglet_helper.util import TextureArray, TextureManager, mip_chain
+    from pyglet_helper.test import fake_gl
+    textures = [layer_texture(i) for i in range(3)]
+    for texture in textures:
+        texture._mip_loader = mip_chain
+    array = TextureArray(textures, manager=TextureManager())
+    with patch.object(fake_gl, 'glTexImage3D') as tex_image_3d:
+        array.gl_activate()
+        # every layer of each level is uploaded at once
+        assert [call[0][:6] for call in tex_image_3d.call_args_list] == [
+            (fake_gl.GL_TEXTURE_2D_ARRAY, level, fake_gl.GL_RGB, size, size,
+             3) for level, size in enumerate([4, 2, 1])]
+    assert array.manager.resident_bytes == array.nbytes
+    # adding a layer uploads the array again
+    array.add(layer_texture(3))
+    assert array.damaged
+
+
+def test_shader_texture_array():
+    from pyglet_helper.common import shader
+    from pyglet_helper.util import TextureArray
+    volume = layer_texture(1, (4, 4, 4, 3))
+    wood, bricks = layer_texture(2), layer_texture(3)
+    array = TextureArray([bricks])
+    material = shader("wood", "[fragment]", 5.0, library="",
+                      textures=[wood, volume], texture_array=array)
+    assert material.texture_array is array
+    # the 3D texture is not packed
+    assert material.texture_layers == [1, None]
+    assert "const float tex0_layer = 1.0;" in material._shader.source
+    assert "tex1_layer" not in material._shader.source
+
+
+def test_shader_texture_array_other_shape():
+    from pyglet_helper.common import shader
+    from pyglet_helper.util import TextureArray
+    small, large = layer_texture(1), layer_texture(2, (8, 8, 3))
+    array = TextureArray()
+    shader("a", "[fragment]", 5.0, library="", textures=[small],
+           texture_array=array)
+    material = shader("b", "[fragment]", 5.0, library="", textures=[large],
+                      texture_array=array)
+    # a texture with another shape than the layers is left unpacked
+    assert material.texture_layers == [None]
+    assert array.textures == [small]
+    assert not array.fits(large)
+
+
+def test_shader_texture_array_extension():
+    from pyglet_helper.common import shader
+    from pyglet_helper.objects.material import WOOD
+    from pyglet_helper.util import TextureArray
+    wood = layer_texture(1)
+    library = "[varying]\n#version 110\nvarying vec3 mat_pos;\n" \
+              "[fragment]\n#define textureLayer(layer, coord) " \
+              "texture2D(layer, coord)\n#define tex0_layer tex0\n"
+    material = shader("wood", WOOD.shader.source, 5.0, library=library,
+                      textures=[wood], texture_array=TextureArray())
+    fragment = material._shader.stages['fragment'].split("\n")
+    # the extension is enabled before any declaration
+    assert fragment[:2] == ["#version 110",
+                            "#extension GL_EXT_texture_array : enable"]
+    assert fragment.count("#extension GL_EXT_texture_array : enable") == 1
+    assert "const float tex0_layer = 0.0;" in fragment
+    assert "textureLayer( tex0_layer, wood_pos )" in \
+        material._shader.stages['fragment']
@@ -1,13 +1,30 @@
 """ pyglet_helper.util contains objects useful to creating materials and
 geometric shapes
 """
-from pyglet_helper.util.color import BLUE, RED, GREEN, GRAY, MAGENTA, YELLOW, \
-    CYAN, ORANGE, BLACK, PURPLE, WHITE
-from pyglet_helper.util.display_list import DisplayList
-from pyglet_helper.util.quadric import DrawingStyle, NormalStyle, \
-    Orientation, Quadric
-from pyglet_helper.util.rgba import Rgba, Rgb
-from pyglet_helper.util.shader_program import ShaderProgram, UseShaderProgram
-from pyglet_helper.util.texture import Texture
-from pyglet_helper.util.linear import Vector, Vertex, Tmatrix, rotation
+from pyglet_helper._lazy import attach
 
+# The submodules are imported when one of their names is first used.
+__getattr__, __dir__, __all__ = attach(__name__, [
+    ('color', ['BLUE', 'RED', 'GREEN', 'GRAY', 'MAGENTA', 'YELLOW', 'CYAN',
+               'ORANGE', 'BLACK', 'PURPLE', 'WHITE']),
+    ('geometry_cache', ['GEOMETRY', 'GeometryCache']),
+    ('gl_resources', ['RESOURCES', 'ResourceManager', 'current_resources',
+                      'current_share_group', 'resources_for']),
+    ('gl_state', ['GlState', 'STATE', 'current_state', 'state_for']),
+    ('render_stats', ['COUNTERS', 'FrameStats', 'FrameTimeHistogram',
+                      'RenderCounters']),
+    ('display_list', ['DisplayList']),
+    ('quadric', ['DrawingStyle', 'NormalStyle', 'Orientation', 'Quadric']),
+    ('rgba', ['Rgba', 'Rgb']),
+    ('shader_program', ['PROGRAMS', 'ProgramCache', 'ShaderProgram',
+                        'UseShaderProgram']),
+    ('mipmap', ['cached_mip_chain', 'mip_chain']),
+    ('shader_permutations', ['PERMUTATIONS', 'PermutationCache',
+                             'permutation_defines']),
+    ('shader_source', ['ShaderLibrary']),
+    ('shader_warmup', ['ShaderWarmup']),
+    ('texture', ['Texture', 'TextureManager', 'TEXTURES']),
+    ('texture_array', ['TextureArray']),
+    ('linear', ['Vector', 'Vertex', 'Tmatrix', 'rotation']),
+    ('depth_sort', ['DepthSorter']),
+    ('profiler', ['Profiler'])])
@@ -1,15 +1,17 @@
-""" pyglet_helper.util.color defines a few standard colors
+""" pyglet_helper.util.color defines a few standard colors. The colors are
+frozen, so they can be shared by any number of objects; copy one with
+Rgb(color=BLUE.rgb) to get a color that can be changed.
 """
 from pyglet_helper.util.rgba import Rgb
 
-BLUE = Rgb(red=0.0, green=0.0, blue=1.0)
-RED = Rgb(red=1.0, green=0.0, blue=0.0)
-YELLOW = Rgb(red=1.0, green=1.0, blue=0.0)
-ORANGE = Rgb(red=1.0, green=0.5, blue=0.0)
-BLACK = Rgb(red=0.0, green=0.0, blue=0.0)
-GREEN = Rgb(red=0.0, green=1.0, blue=0.0)
-CYAN = Rgb(red=0.0, green=1.0, blue=1.0)
-MAGENTA = Rgb(red=1.0, green=0.0, blue=1.0)
-WHITE = Rgb(red=1.0, green=1.0, blue=1.0)
-PURPLE = Rgb(red=0.5, green=0.0, blue=0.5)
-GRAY = Rgb(red=0.1, green=0.1, blue=0.1)
+BLUE = Rgb(red=0.0, green=0.0, blue=1.0).freeze()
+RED = Rgb(red=1.0, green=0.0, blue=0.0).freeze()
+YELLOW = Rgb(red=1.0, green=1.0, blue=0.0).freeze()
+ORANGE = Rgb(red=1.0, green=0.5, blue=0.0).freeze()
+BLACK = Rgb(red=0.0, green=0.0, blue=0.0).freeze()
+GREEN = Rgb(red=0.0, green=1.0, blue=0.0).freeze()
+CYAN = Rgb(red=0.0, green=1.0, blue=1.0).freeze()
+MAGENTA = Rgb(red=1.0, green=0.0, blue=1.0).freeze()
+WHITE = Rgb(red=1.0, green=1.0, blue=1.0).freeze()
+PURPLE = Rgb(red=0.5, green=0.0, blue=0.5).freeze()
+GRAY = Rgb(red=0.1, green=0.1, blue=0.1).freeze()
@@ -0,0 +1,161 @@
+""" pyglet_helper.util.depth_sort contains objects for ordering translucent
+objects from back to front before they are blended into the view
+"""
+from numpy import argsort, array, asarray, uint16
+
+
+# Above this many objects, the radix sort on quantized depth is used instead
+# of the incremental insertion sort.
+RADIX_THRESHOLD = 256
+
+# The insertion sort gives up (and the radix sort is used instead) once it has
+# shifted more than this many elements per object - i.e., when the order
+# changed too much since the last frame to be worth repairing.
+MAX_SHIFTS_PER_OBJECT = 8
+
+
+def camera_distances(positions, camera):
+    """ Compute the squared distance from the camera to each position.
+
+    :param positions: an array_like of shape (n, 3) containing the positions
+    :type positions: array_like
+    :param camera: The position of the camera
+    :type camera: pyglet_helper.util.Vector
+    :return: the squared distances
+    :rtype: numpy.ndarray
+    """
+    positions = asarray(positions, dtype=float).reshape(-1, 3)
+    offsets = positions - array([camera.x_component, camera.y_component,
+                                 camera.z_component], dtype=float)
+    return (offsets * offsets).sum(axis=1)
+
+
+def insertion_sort(order, keys, max_shifts=None):
+    """ Sort a list of indices in place so that their keys are in descending
+    order. The sort is stable and runs in linear time on an order that is
+    already nearly sorted, such as the order from the previous frame.
+
+    :param order: indices into keys, the initial guess at the order
+    :type order: list of int
+    :param keys: the sort key of each index
+    :type keys: list of float
+    :param max_shifts: if not None, the sort is abandoned after this many
+    elements have been moved
+    :type max_shifts: int
+    :return: the sorted order, or None if the sort was abandoned
+    :rtype: list of int
+    """
+    shifts = 0
+    for i in range(1, len(order)):
+        current = order[i]
+        key = keys[current]
+        j = i - 1
+        while j >= 0 and keys[order[j]] < key:
+            order[j + 1] = order[j]
+            j -= 1
+        shifts += i - 1 - j
+        if max_shifts is not None and shifts > max_shifts:
+            return None
+        order[j + 1] = current
+    return order
+
+
+def radix_sort(order, keys):
+    """ Sort a list of indices so that their keys are in descending order, by
+    quantizing the keys to 16 bits. Numpy's stable sort is a radix sort for
+    16 bit integers, so this runs in linear time regardless of the initial
+    order. Ties keep the initial order.
+
+    :param order: indices into keys, the initial guess at the order
+    :type order: list of int
+    :param keys: the sort key of each index
+    :type keys: numpy.ndarray
+    :return: the sorted order
+    :rtype: list of int
+    """
+    order = asarray(order, dtype=int)
+    if len(order) == 0:
+        return []
+    seeded_keys = asarray(keys, dtype=float)[order]
+    low = seeded_keys.min()
+    high = seeded_keys.max()
+    if high <= low:
+        return order.tolist()
+    # Quantize so that the farthest object gets the smallest key.
+    quantized = ((high - seeded_keys) * (65535.0 / (high - low))).astype(
+        uint16)
+    return order[argsort(quantized, kind='stable')].tolist()
+
+
+class DepthSorter(object):
+    """
+    Orders objects from back to front, reusing the order from the previous
+    call so that a slowly moving scene can be sorted in close to linear time.
+    """
+    def __init__(self, radix_threshold=RADIX_THRESHOLD):
+        """
+        :param radix_threshold: The number of objects above which the radix
+        sort is used instead of the insertion sort.
+        :type radix_threshold: int
+        """
+        self.radix_threshold = radix_threshold
+        # The objects, back to front, as of the last call to sort()
+        self._order = []
+
+    def seed(self, objects):
+        """ Build the initial guess at the order of objects: the objects that
+        were sorted last time, in the same order, followed by any new ones.
+
+        :param objects: the objects to sort
+        :type objects: list
+        :return: indices into objects
+        :rtype: list of int
+        """
+        index = dict((id(obj), i) for i, obj in enumerate(objects))
+        order = []
+        for obj in self._order:
+            i = index.pop(id(obj), None)
+            if i is not None:
+                order.append(i)
+        order.extend(sorted(index.values()))
+        return order
+
+    def sort(self, objects, camera, centers=None):
+        """ Sort objects by decreasing distance from the camera.
+
+        :param objects: the objects to sort; each must have a center
+        :type objects: list of pyglet_helper.objects.Renderable
+        :param camera: The position of the camera
+        :type camera: pyglet_helper.util.Vector
+        :param centers: The objects' centers, with shape (n, 3), if they are
+        already known, e.g., from Scene.prepare()
+        :type centers: array_like
+        :return: the objects, farthest first
+        :rtype: list
+        """
+        objects = list(objects)
+        if len(objects) < 2:
+            self._order = objects
+            return list(objects)
+        if centers is None:
+            centers = [[center.x_component, center.y_component,
+                        center.z_component]
+                       for center in (obj.center for obj in objects)]
+        distances = camera_distances(centers, camera)
+        order = self.seed(objects)
+        sorted_order = None
+        if len(objects) <= self.radix_threshold:
+            sorted_order = insertion_sort(
+                order, distances.tolist(),
+                max_shifts=MAX_SHIFTS_PER_OBJECT * len(objects))
+            if sorted_order is None:
+                order = self.seed(objects)
+        if sorted_order is None:
+            sorted_order = radix_sort(order, distances)
+        self._order = [objects[i] for i in sorted_order]
+        return list(self._order)
+
+    def clear(self):
+        """ Forget the order from the previous frame.
+        """
+        self._order = []
@@ -6,28 +6,52 @@ try:
     import pyglet.gl as gl
 except ImportError:
     gl = None
+from pyglet_helper.util.gl_resources import current_resources
+from pyglet_helper.util.gl_state import current_state
+from pyglet_helper.util.render_stats import COUNTERS
 
 class DisplayList(object):
     """
     A class for storing the OpenGl commands for rendering an object.
     """
-    def __init__(self, built=False):
+    def __init__(self, built=False, lod=0, resources=None):
         """
         :param built: If True, the commands have been executed
         :type built: bool
+        :param lod: The level of detail of the geometry in the list, used when
+        counting the triangles drawn
+        :type lod: int
+        :param resources: The manager of the share group the list is called
+        in. Defaults to that of the current context.
+        :type resources: pyglet_helper.util.ResourceManager
         """
         self.built = built
-        self.handle = gl.glGenLists(1)
+        self.lod = lod
+        if resources is None:
+            resources = current_resources()
+        self.resources = resources
+        self.handle = resources.gen_list()
+        # The token the list's name is given back with
+        self._resource = resources.track(self, 'display list', self.handle,
+                                         resources.free_list)
+        # The OpenGL state left behind by calling this list
+        self.state_effects = {}
+        # The number of triangles drawn by calling this list
+        self.triangles = 0
 
     def gl_compile_begin(self):
         """ Generates the beginning of the list.
         """
         gl.glNewList(self.handle, gl.GL_COMPILE)
+        current_state().begin_compile()
+        COUNTERS.begin_compile()
 
     def gl_compile_end(self):
         """ Generates the end of the list.
         """
         gl.glEndList(self.handle)
+        self.state_effects = current_state().end_compile()
+        self.triangles = COUNTERS.end_compile()
         self.built = True
 
     def gl_render(self):
@@ -37,8 +61,25 @@ class DisplayList(object):
             gl.glCallList(self.handle)
         except gl.GLException as e_msg:
             print("Got GL Exception on call list: " + str(e_msg))
+        current_state().call_list(self.state_effects)
+        COUNTERS.draw(self.triangles, self.lod)
         self.built = True
 
+    def gl_free(self):
+        """ Give the list's name back, so that another list can use it. The
+        list must not be called afterwards.
+        """
+        self.resources.release(self._resource)
+        self._resource = 0
+        self.handle = 0
+        self.built = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.gl_free()
+
     @property
     def compiled(self):
         """ Returns whether the current list has beein completed.
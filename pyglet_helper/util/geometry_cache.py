@@ -0,0 +1,121 @@
+""" pyglet_helper.util.geometry_cache contains objects for sharing the display
+lists of the built-in models (box, pyramid, and the levels of detail of the
+sphere, cylinder and cone) between every View whose OpenGL context is in the
+same share group, so that each model is only tessellated and compiled once
+"""
+try:
+    import pyglet.gl as gl
+except ImportError:
+    gl = None
+
+from pyglet_helper.util.display_list import DisplayList
+from pyglet_helper.util.gl_resources import current_resources
+
+# The number of levels of detail of the sphere, cylinder and cone models
+MODEL_LODS = 6
+
+
+class Models(object):
+    """
+    The display lists of the built-in models, compiled by the first object of
+    each shape drawn
+    """
+    def __init__(self, resources=None):
+        """
+        :param resources: The manager of the share group the models are
+        drawn in, whose pool the lists' names are drawn from. Defaults to
+        that of the current context.
+        :type resources: pyglet_helper.util.ResourceManager
+        """
+        if resources is None:
+            resources = current_resources()
+        self.resources = resources
+        self.box = DisplayList(resources=resources)
+        self.pyramid = DisplayList(resources=resources)
+        self.sphere = [DisplayList(lod=i, resources=resources)
+                       for i in range(MODEL_LODS)]
+        self.cylinder = [DisplayList(lod=i, resources=resources)
+                         for i in range(MODEL_LODS)]
+        self.cone = [DisplayList(lod=i, resources=resources)
+                     for i in range(MODEL_LODS)]
+
+    @property
+    def lists(self):
+        """
+        Get every display list of the models
+        :return: the display lists
+        :rtype: list of pyglet_helper.util.DisplayList
+        """
+        return [self.box, self.pyramid] + self.sphere + self.cylinder + \
+            self.cone
+
+    def gl_free(self):
+        """ Give back the display lists of the models.
+        """
+        for model in self.lists:
+            model.gl_free()
+
+
+class GeometryCache(object):
+    """
+    Shares one set of Models between the views of each share group, freeing
+    it once the last of them has released it
+    """
+    def __init__(self):
+        # The models, and the number of views using them, by share group
+        self._models = {}
+
+    def __len__(self):
+        return len(self._models)
+
+    def acquire(self, share_group, resources=None):
+        """
+        Get the models of a share group, creating them the first time
+        :param share_group: the share group of the view's context, e.g.,
+        from current_share_group()
+        :type share_group: object
+        :param resources: the manager of the share group, e.g., from
+        resources_for(). Defaults to that of the current context.
+        :type resources: pyglet_helper.util.ResourceManager
+        :return: the models
+        :rtype: pyglet_helper.util.geometry_cache.Models
+        """
+        # Share groups need not be hashable, so they are told apart by
+        # identity, and kept alive while their models are used, so that
+        # their ids are not reused.
+        key = id(share_group)
+        if key not in self._models:
+            self._models[key] = [Models(resources), 0, share_group]
+        entry = self._models[key]
+        entry[1] += 1
+        return entry[0]
+
+    def release(self, share_group):
+        """ Stop using the models of a share group, freeing them once no view
+        uses them.
+
+        :param share_group: the share group passed to acquire()
+        :type share_group: object
+        """
+        entry = self._models.get(id(share_group))
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            entry[0].gl_free()
+            del self._models[id(share_group)]
+
+    def references(self, share_group):
+        """
+        Get the number of views using the models of a share group
+        :param share_group: the share group
+        :type share_group: object
+        :return: the number of views
+        :rtype: int
+        """
+        entry = self._models.get(id(share_group))
+        return entry[1] if entry is not None else 0
+
+
+# The models of every share group in the process
+GEOMETRY = GeometryCache()
@@ -0,0 +1,239 @@
+""" pyglet_helper.util.gl_resources contains an object for tracking the OpenGL
+objects owned by pyglet_helper objects, so that each is released exactly
+once: explicitly, when its owner is freed or used as a context manager, or
+otherwise once its owner is garbage collected. OpenGL object names are only
+valid in the contexts of one share group, so each share group has its own.
+
+    with DisplayList() as model:
+        ...
+    # the list's name is released here
+"""
+from __future__ import print_function
+import traceback
+import weakref
+try:
+    import pyglet.gl as gl
+except ImportError:
+    gl = None
+
+# The number of display list names allocated by each call to glGenLists
+LIST_BLOCK = 64
+
+
+def current_share_group():
+    """
+    Get the share group of the current OpenGL context: the object space
+    pyglet gives every context sharing objects with it
+    :return: the share group, or None if no context is current
+    :rtype: object
+    """
+    context = getattr(gl, 'current_context', None)
+    return getattr(context, 'object_space', None)
+
+
+class ResourceManager(object):
+    """
+    Tracks the OpenGL objects owned by other objects in one share group, and
+    pools display list names, allocating them from OpenGL in blocks. Objects
+    released by the garbage collector are only deleted by the next collect(),
+    since the collector may run on any thread, and the context must be
+    current.
+    """
+    def __init__(self, block_size=LIST_BLOCK, debug=False):
+        """
+        :param block_size: The number of display list names allocated at a
+        time
+        :type block_size: int
+        :param debug: If True, where each object was allocated is recorded,
+        and objects released by the garbage collector are reported as leaks
+        :type debug: bool
+        """
+        self.block_size = block_size
+        self.debug = debug
+        # The tracked objects, by token: their kind, name, owner and the
+        # function deleting them
+        self._resources = {}
+        # The weak references to the owners, by token
+        self._owners = {}
+        self._next_token = 1
+        # The display list names which may be handed out again
+        self._free_lists = []
+        # The display list names released since the last collect()
+        self._released_lists = []
+        # The tokens of objects whose owners were garbage collected
+        self._collected = []
+        # The number of objects allocated, released, and released by the
+        # garbage collector rather than by their owners
+        self.allocated = 0
+        self.released = 0
+        self.leaked = 0
+
+    def __len__(self):
+        return len(self._resources)
+
+    def gen_list(self):
+        """
+        Get an unused display list name
+        :return: the name
+        :rtype: int
+        """
+        if not self._free_lists:
+            base = gl.glGenLists(self.block_size)
+            # Hand out the lowest names first.
+            self._free_lists = list(range(base + self.block_size - 1,
+                                          base - 1, -1))
+        return self._free_lists.pop()
+
+    def free_list(self, name):
+        """ Give a display list name back. Its contents are dropped, and the
+        name reused, by the next collect().
+
+        :param name: the name
+        :type name: int
+        """
+        self._released_lists.append(name)
+
+    def track(self, owner, kind, name, release):
+        """
+        Record that an object owns an OpenGL object
+        :param owner: the owner, which must support weak references
+        :type owner: object
+        :param kind: the kind of OpenGL object, e.g., 'texture'
+        :type kind: str
+        :param name: the OpenGL object's name
+        :type name: int
+        :param release: the function deleting the OpenGL object, which is
+        passed its name. It must not refer to the owner.
+        :type release: callable
+        :return: the token the OpenGL object is released with
+        :rtype: int
+        """
+        token = self._next_token
+        self._next_token += 1
+        description = "%s at 0x%x" % (type(owner).__name__, id(owner))
+        if self.debug:
+            description += ", allocated at:\n" + \
+                ''.join(traceback.format_stack()[:-1])
+        self._resources[token] = (kind, name, description, release)
+        self._owners[token] = weakref.ref(
+            owner, lambda ref, token=token: self._collected.append(token))
+        self.allocated += 1
+        return token
+
+    def release(self, token):
+        """ Delete an OpenGL object now. Releasing a token twice, or the
+        token 0, does nothing.
+
+        :param token: the token returned by track()
+        :type token: int
+        """
+        resource = self._resources.pop(token, None)
+        self._owners.pop(token, None)
+        if resource is None:
+            return
+        _, name, _, release = resource
+        release(name)
+        self.released += 1
+
+    def collect(self):
+        """ Delete the objects whose owners were garbage collected, and reuse
+        the display list names given back. Call it with the context current,
+        outside of compiling a display list, with a context of the manager's
+        share group current; View.draw() does so each frame.
+        """
+        while self._collected:
+            token = self._collected.pop()
+            if token not in self._resources:
+                continue
+            self.leaked += 1
+            if self.debug:
+                kind, name, description, _ = self._resources[token]
+                print("pyglet_helper WARNING: %s %s was never freed by its "
+                      "owner, %s" % (kind, name, description))
+            self.release(token)
+        for name in self._released_lists:
+            # Compiling an empty list frees the memory of its old contents.
+            gl.glNewList(name, gl.GL_COMPILE)
+            gl.glEndList()
+            self._free_lists.append(name)
+        self._released_lists = []
+
+    def leaks(self):
+        """
+        Get the OpenGL objects which are still owned, e.g., before the
+        context is destroyed
+        :return: the kind, name and owner of each object
+        :rtype: list of tuple
+        """
+        return [resource[:3] for _, resource in
+                sorted(self._resources.items())]
+
+    def report(self):
+        """ Print the OpenGL objects which are still owned.
+        """
+        for kind, name, description in self.leaks():
+            print("pyglet_helper WARNING: %s %s is still owned by %s" %
+                  (kind, name, description))
+
+    def clear(self):
+        """ Delete every tracked object and every pooled display list name,
+        e.g., before the context is destroyed.
+        """
+        for token in sorted(self._resources):
+            self.release(token)
+        self._collected = []
+        self.collect()
+        for name in self._free_lists:
+            gl.glDeleteLists(name, 1)
+        self._free_lists = []
+
+    @property
+    def stats(self):
+        """
+        Get the manager's counters
+        :return: the number of owned objects and pooled list names, and the
+        allocated, released and leaked counters
+        :rtype: dict
+        """
+        return {'owned': len(self._resources),
+                'free_lists': len(self._free_lists),
+                'allocated': self.allocated,
+                'released': self.released,
+                'leaked': self.leaked}
+
+
+# The OpenGL objects created while no context is current, e.g., in tests
+RESOURCES = ResourceManager()
+
+# The managers of the other share groups, and the share groups, by the
+# share groups' ids. Share groups need not be hashable, and are kept alive
+# so that their ids are not reused.
+_SHARE_GROUPS = {}
+
+
+def resources_for(share_group):
+    """
+    Get the ResourceManager of a share group, creating it the first time
+    :param share_group: the share group, e.g., from current_share_group(). If
+    None, RESOURCES is returned.
+    :type share_group: object
+    :return: the manager
+    :rtype: pyglet_helper.util.ResourceManager
+    """
+    if share_group is None:
+        return RESOURCES
+    entry = _SHARE_GROUPS.get(id(share_group))
+    if entry is None:
+        entry = (ResourceManager(block_size=RESOURCES.block_size,
+                                 debug=RESOURCES.debug), share_group)
+        _SHARE_GROUPS[id(share_group)] = entry
+    return entry[0]
+
+
+def current_resources():
+    """
+    Get the ResourceManager of the current context's share group
+    :return: the manager, or RESOURCES if no context is current
+    :rtype: pyglet_helper.util.ResourceManager
+    """
+    return resources_for(current_share_group())
@@ -0,0 +1,269 @@
+""" pyglet_helper.util.gl_state contains an object for shadowing OpenGL state,
+so that calls which would not change it are never sent to the driver. Each
+OpenGL context has its own state, so each has its own shadow.
+"""
+import weakref
+try:
+    import pyglet.gl as gl
+except ImportError:
+    gl = None
+
+# The keys of the material parameters, by face then by parameter. The keys
+# are built once, so that setting a material allocates nothing once its
+# parameters have been set before.
+_MATERIAL_KEYS = {}
+
+
+def _material_key(face, name):
+    """
+    Get the key a material parameter is shadowed under
+    :param face: GL_FRONT, GL_BACK or GL_FRONT_AND_BACK
+    :type face: int
+    :param name: the material parameter, e.g., GL_SPECULAR
+    :type name: int
+    :return: the key
+    :rtype: tuple
+    """
+    keys = _MATERIAL_KEYS.get(face)
+    if keys is None:
+        keys = _MATERIAL_KEYS[face] = {}
+    key = keys.get(name)
+    if key is None:
+        key = keys[name] = ('material', face, name)
+    return key
+
+
+class GlState(object):
+    """
+    A shadow copy of the OpenGL state set by pyglet_helper. Each setter only
+    issues the OpenGL call if it would change the current state, and counts
+    the calls that were issued and skipped.
+    """
+    def __init__(self):
+        # The number of OpenGL calls sent to the driver
+        self.issued = 0
+        # The number of OpenGL calls dropped because they were redundant
+        self.skipped = 0
+        # The known state, keyed by the call and its non-value arguments.
+        # Missing keys are unknown, so the next call setting them is issued.
+        self._state = {}
+        # The state outside of the display list being compiled, if any
+        self._saved = None
+        # The array, and its version, last uploaded to each parameter of
+        # each light, by light then parameter
+        self._lights = {}
+
+    @property
+    def counters(self):
+        """
+        Get the number of issued and skipped calls
+        :return: the counters
+        :rtype: dict
+        """
+        return {'issued': self.issued, 'skipped': self.skipped}
+
+    def reset_counters(self):
+        """ Set the issued and skipped counters back to zero.
+        """
+        self.issued = 0
+        self.skipped = 0
+
+    def invalidate(self, capabilities=None):
+        """ Forget the shadowed state, e.g., after OpenGL calls were made
+        without going through this object. The next call of each kind will be
+        issued. The parameters of the lights are kept; see
+        invalidate_lights().
+
+        :param capabilities: If given, only whether these capabilities are
+        enabled is forgotten
+        :type capabilities: list of int
+        """
+        if capabilities is None:
+            self._state = {}
+            return
+        for capability in capabilities:
+            self._state.pop(('enable', capability), None)
+
+    def invalidate_lights(self, lights):
+        """ Forget the parameters uploaded to some lights, and whether they
+        are enabled, e.g., after they were changed without going through this
+        object. invalidate() keeps the lights' parameters, which only change
+        when they are uploaded again.
+
+        :param lights: the lights, e.g., GL_LIGHT0
+        :type lights: list of int
+        """
+        for light in lights:
+            self._lights.pop(light, None)
+        self.invalidate(lights)
+
+    def _changes(self, key, value):
+        """
+        Update the shadowed state and the counters
+        :param key: the piece of state being set
+        :type key: tuple
+        :param value: its new value
+        :return: True if the OpenGL call must be issued
+        :rtype: bool
+        """
+        if key in self._state and self._state[key] == value:
+            self.skipped += 1
+            return False
+        self._state[key] = value
+        self.issued += 1
+        return True
+
+    def enable(self, capability):
+        """ glEnable, if the capability is not already enabled.
+
+        :param capability: the capability, e.g., GL_CULL_FACE
+        :type capability: int
+        """
+        if self._changes(('enable', capability), True):
+            gl.glEnable(capability)
+
+    def disable(self, capability):
+        """ glDisable, if the capability is not already disabled.
+
+        :param capability: the capability, e.g., GL_CULL_FACE
+        :type capability: int
+        """
+        if self._changes(('enable', capability), False):
+            gl.glDisable(capability)
+
+    def cull_face(self, mode):
+        """ glCullFace, if mode is not already the culled face.
+
+        :param mode: GL_FRONT, GL_BACK or GL_FRONT_AND_BACK
+        :type mode: int
+        """
+        if self._changes(('cull_face',), mode):
+            gl.glCullFace(mode)
+
+    def depth_mask(self, flag):
+        """ glDepthMask, if the depth mask is not already flag.
+
+        :param flag: GL_TRUE or GL_FALSE
+        :type flag: int
+        """
+        if self._changes(('depth_mask',), flag):
+            gl.glDepthMask(flag)
+
+    def material(self, face, name, value):
+        """ glMaterialf, if the parameter does not already have value.
+
+        :param face: GL_FRONT, GL_BACK or GL_FRONT_AND_BACK
+        :type face: int
+        :param name: the material parameter, e.g., GL_SHININESS
+        :type name: int
+        :param value: the new value
+        :type value: float
+        """
+        if self._changes(_material_key(face, name), value):
+            gl.glMaterialf(face, name, value)
+
+    def material_v(self, face, name, values):
+        """ glMaterialfv, unless values is the array that was last set.
+        Arrays are compared by identity, so an array must not be modified
+        after it has been passed in.
+
+        :param face: GL_FRONT, GL_BACK or GL_FRONT_AND_BACK
+        :type face: int
+        :param name: the material parameter, e.g., GL_SPECULAR
+        :type name: int
+        :param values: the new values
+        :type values: ctypes array
+        """
+        if self._changes(_material_key(face, name), values):
+            gl.glMaterialfv(face, name, values)
+
+    def light_v(self, light, name, values, version):
+        """ glLightfv, unless values is the array that was last set, with the
+        same version. Lights update their arrays in place, so the version
+        tells whether an array changed since it was uploaded.
+
+        :param light: the light, e.g., GL_LIGHT0
+        :type light: int
+        :param name: the light parameter, e.g., GL_DIFFUSE
+        :type name: int
+        :param values: the new values
+        :type values: ctypes array
+        :param version: the version of the values
+        :type version: int
+        """
+        parameters = self._lights.get(light)
+        if parameters is None:
+            parameters = self._lights[light] = {}
+        uploaded = parameters.get(name)
+        if uploaded is not None and uploaded[0] is values and \
+                uploaded[1] == version:
+            self.skipped += 1
+            return
+        parameters[name] = (values, version)
+        self.issued += 1
+        gl.glLightfv(light, name, values)
+
+    def begin_compile(self):
+        """ Start recording the state changes made inside a display list.
+        Commands compiled into a list are not executed, so the state outside
+        of the list is put aside until end_compile() is called.
+        """
+        self._saved = self._state
+        self._state = {}
+
+    def end_compile(self):
+        """ Stop recording the state changes made inside a display list.
+
+        :return: the state the list leaves behind when it is called
+        :rtype: dict
+        """
+        effects = self._state
+        self._state = self._saved
+        self._saved = None
+        return effects
+
+    def call_list(self, effects):
+        """ Update the shadowed state after a display list was called.
+
+        :param effects: the state changes returned by end_compile()
+        :type effects: dict
+        """
+        self._state.update(effects)
+
+
+# The state of the OpenGL context pyglet_helper draws into while no pyglet
+# context is current, e.g., in tests
+STATE = GlState()
+
+# The states of the other contexts, and references to the contexts, by the
+# contexts' ids. An entry is removed once its context is garbage collected.
+_CONTEXTS = {}
+
+
+def state_for(context):
+    """
+    Get the shadowed state of an OpenGL context, creating it the first time
+    :param context: the context, e.g., pyglet.gl.current_context. If None,
+    STATE is returned.
+    :type context: pyglet.gl.Context
+    :return: the state
+    :rtype: pyglet_helper.util.GlState
+    """
+    if context is None:
+        return STATE
+    entry = _CONTEXTS.get(id(context))
+    if entry is None:
+        key = id(context)
+        entry = (GlState(), weakref.ref(
+            context, lambda ref, key=key: _CONTEXTS.pop(key, None)))
+        _CONTEXTS[key] = entry
+    return entry[0]
+
+
+def current_state():
+    """
+    Get the shadowed state of the current OpenGL context
+    :return: the state, or STATE if no context is current
+    :rtype: pyglet_helper.util.GlState
+    """
+    return state_for(getattr(gl, 'current_context', None))
@@ -2,14 +2,15 @@
 transformations and describes linear algebra operations
 """
 from __future__ import division, print_function
-try:
-    import pyglet.gl as gl
-except Exception as error_msg:
-    gl = None
+from pyglet_helper._lazy import LazyModule
 from numpy import matrix, identity, nditer
 from numpy.linalg import inv
 from math import sqrt, acos, asin, pi
 
+# pyglet's OpenGL bindings are only imported by the methods that use them, so
+# that the linear algebra can be used without them.
+gl = LazyModule('pyglet.gl')
+
 
 class Vector(object):
     """
@@ -0,0 +1,253 @@
+""" pyglet_helper.util.mipmap contains functions for computing the mip levels
+of 2D and 3D textures on the CPU, and for caching them on disk, so that they
+can be uploaded with the texture instead of being generated by OpenGL
+"""
+import os.path
+
+from numpy import arange, asarray, float32, kaiser, load, ndarray, savez, \
+    sinc, ubyte
+
+# The filters mip_chain() can reduce levels with
+MIP_FILTERS = ('box', 'kaiser')
+
+# The number of texels of the larger level on each side of a texel of the
+# smaller level which the kaiser filter reads, and the shape of its window
+KAISER_TAPS = 3
+KAISER_BETA = 4.0
+
+
+def kaiser_weights(taps=KAISER_TAPS, beta=KAISER_BETA):
+    """
+    Compute the weights of a Kaiser-windowed sinc filter which halves the
+    resolution of a signal
+    :param taps: the number of input samples on each side of an output sample
+    :type taps: int
+    :param beta: the shape of the Kaiser window
+    :type beta: float
+    :return: the 2*taps weights, which sum to 1
+    :rtype: numpy.ndarray
+    """
+    # Each output sample is centred between two input samples.
+    offsets = arange(2 * taps) - taps + 0.5
+    weights = sinc(offsets / 2.0) * kaiser(2 * taps, beta)
+    return weights / weights.sum()
+
+
+def _reduce_axis(level, axis, weights, start=0, stop=None):
+    """
+    Halve the size of an array along one axis
+    :param level: the array to reduce
+    :type level: numpy.ndarray
+    :param axis: the axis to reduce along
+    :type axis: int
+    :param weights: the weights of the filter, or None for a box filter
+    :type weights: numpy.ndarray
+    :param start: the first texel of the reduced array to compute
+    :type start: int
+    :param stop: the texel after the last one to compute, by default the
+    end of the reduced array
+    :type stop: int
+    :return: the reduced array, as floats
+    :rtype: numpy.ndarray
+    """
+    size = level.shape[axis]
+    if size <= 1:
+        return level
+    if stop is None:
+        stop = size // 2
+    level = level.swapaxes(0, axis)
+    if weights is None:
+        # The trailing texel of an odd size is dropped, as OpenGL does.
+        reduced = (asarray(level[2 * start:2 * stop:2], float32) +
+                   level[2 * start + 1:2 * stop:2]) * 0.5
+    else:
+        taps = len(weights) // 2
+        # Texels beyond the edge repeat the edge texel.
+        indices = arange(start, stop)[:, None] * 2 + \
+            arange(-taps + 1, taps + 1)
+        indices = indices.clip(0, size - 1)
+        reduced = level[indices[:, 0]] * weights[0]
+        for tap in range(1, len(weights)):
+            reduced += level[indices[:, tap]] * weights[tap]
+    return reduced.swapaxes(0, axis)
+
+
+def mip_chain(data, mip_filter='box'):
+    """
+    Compute the mip levels of a texture, each half the size of the one
+    before it along every axis, down to a single texel
+    :param data: the texture's data: (height, width, channels) for a 2D
+    texture, or (depth, height, width, channels) for a 3D texture
+    :type data: numpy.ndarray
+    :param mip_filter: 'box' to average each 2x2 (or 2x2x2) block of texels,
+    or 'kaiser' for a sharper Kaiser-windowed sinc filter
+    :type mip_filter: str
+    :return: the levels after the base level, largest first, with the same
+    type as data
+    :rtype: list of numpy.ndarray
+    """
+    if mip_filter not in MIP_FILTERS:
+        raise ValueError("Unknown mip filter %r, expected one of %s" %
+                         (mip_filter, ", ".join(MIP_FILTERS)))
+    weights = kaiser_weights() if mip_filter == 'kaiser' else None
+    data = asarray(data)
+    axes = range(data.ndim - 1)
+    levels = []
+    # Each level is reduced from the previous one in floating point, and only
+    # rounded when it is stored.
+    level = data.astype(float32)
+    while max(level.shape[:-1]) > 1:
+        for axis in axes:
+            level = _reduce_axis(level, axis, weights)
+        levels.append(_store_level(level, data.dtype))
+    return levels
+
+
+def _store_level(level, dtype):
+    """
+    Convert a level computed in floating point to the type of the texture
+    :param level: the level
+    :type level: numpy.ndarray
+    :param dtype: the type of the texture's data
+    :type dtype: numpy.dtype
+    :return: the level, with the texture's type
+    :rtype: numpy.ndarray
+    """
+    if dtype == ubyte:
+        return level.round().clip(0, 255).astype(ubyte)
+    return level.astype(dtype)
+
+
+def mip_regions(region, shape, count):
+    """
+    Get the part of each mip level of a 2D texture which may change when a
+    region of its base level changes, with either filter
+    :param region: the region of the base level, as (x, y, width, height)
+    in texels
+    :type region: tuple of int
+    :param shape: the shape of the texture's data
+    :type shape: tuple of int
+    :param count: the number of levels after the base level
+    :type count: int
+    :return: the region of each level after the base level, largest first
+    :rtype: list of tuple of int
+    """
+    x_offset, y_offset, width, height = region
+    spans = [[y_offset, y_offset + height, shape[0]],
+             [x_offset, x_offset + width, shape[1]]]
+    regions = []
+    for _ in range(count):
+        for span in spans:
+            start, stop, size = span
+            if size > 1:
+                # The texels whose filter reads any texel of the span
+                span[:] = [max(0, (start - KAISER_TAPS + 1) // 2),
+                           min(size // 2, (stop + KAISER_TAPS) // 2),
+                           size // 2]
+        (top, bottom, _), (left, right, _) = spans
+        regions.append((left, top, right - left, bottom - top))
+    return regions
+
+
+def update_mip_chain(levels, data, region, mip_filter='box'):
+    """ Recompute the part of the mip levels of a 2D texture which depends on
+    a region of its data, after the region changed. Each level is reduced
+    from the stored level before it, so the texels may differ from those of
+    mip_chain() by the rounding of the levels in between.
+
+    :param levels: the levels after the base level, updated in place
+    :type levels: list of numpy.ndarray
+    :param data: the texture's data, with shape (height, width, channels)
+    :type data: numpy.ndarray
+    :param region: the region of the data which changed, as (x, y, width,
+    height) in texels
+    :type region: tuple of int
+    :param mip_filter: the filter the levels were computed with
+    :type mip_filter: str
+    """
+    weights = kaiser_weights() if mip_filter == 'kaiser' else None
+    previous = asarray(data)
+    for level, (x_offset, y_offset, width, height) in zip(
+            levels, mip_regions(region, previous.shape, len(levels))):
+        rows = _reduce_axis(previous, 0, weights, y_offset,
+                            y_offset + height)
+        texels = _reduce_axis(rows, 1, weights, x_offset, x_offset + width)
+        level[y_offset:y_offset + height, x_offset:x_offset + width] = \
+            _store_level(texels, level.dtype)
+        previous = level
+
+
+def mip_cache_path(fileid, mip_filter='box'):
+    """
+    Get the name of the file a texture's mip levels are cached in
+    :param fileid: the filename of the texture's image
+    :type fileid: str
+    :param mip_filter: the filter the levels are computed with
+    :type mip_filter: str
+    :return: the filename of the cache, next to the image
+    :rtype: str
+    """
+    root, extension = os.path.splitext(fileid)
+    if extension.lower() != '.tga':
+        root = fileid
+    return '%s.%s.mips.npz' % (root, mip_filter)
+
+
+def cached_mip_chain(fileid, data, mip_filter='box'):
+    """
+    Read the mip levels of a texture from the cache next to its image,
+    computing and caching them if the cache is missing or older than the
+    image. If the cache cannot be written, the levels are still returned.
+    :param fileid: the filename of the texture's image
+    :type fileid: str
+    :param data: the texture's data
+    :type data: numpy.ndarray
+    :param mip_filter: the filter the levels are computed with
+    :type mip_filter: str
+    :return: the levels after the base level, largest first
+    :rtype: list of numpy.ndarray
+    """
+    path = mip_cache_path(fileid, mip_filter)
+    image = fileid if os.path.exists(fileid) else fileid + '.tga'
+    try:
+        if os.path.getmtime(path) >= os.path.getmtime(image):
+            with load(path) as cache:
+                levels = [cache['level%d' % i]
+                          for i in range(len(cache.files))]
+            if is_mip_chain(levels, data.shape):
+                return levels
+    except (IOError, OSError, KeyError, ValueError):
+        # The cache is missing, unreadable or stale.
+        pass
+    levels = mip_chain(data, mip_filter)
+    try:
+        with open(path, 'wb') as cache_file:
+            savez(cache_file, **dict(('level%d' % i, level)
+                                     for i, level in enumerate(levels)))
+    except (IOError, OSError):
+        pass
+    return levels
+
+
+def is_mip_chain(levels, shape, layered=False):
+    """
+    Check that a list of arrays holds every mip level of a texture
+    :param levels: the levels after the base level
+    :type levels: list of numpy.ndarray
+    :param shape: the shape of the texture's data
+    :type shape: tuple of int
+    :param layered: if True, the first dimension of shape is the number of
+    layers of an array texture, which every level has
+    :type layered: bool
+    :return: True if the levels have the shapes OpenGL expects
+    :rtype: bool
+    """
+    layers = list(shape[:1]) if layered else []
+    dimensions = list(shape[len(layers):-1])
+    for level in levels:
+        if not isinstance(level, ndarray) or max(dimensions) <= 1:
+            return False
+        dimensions = [max(1, dimension // 2) for dimension in dimensions]
+        if list(level.shape) != layers + dimensions + [shape[-1]]:
+            return False
+    return max(dimensions) <= 1
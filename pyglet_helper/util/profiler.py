@@ -0,0 +1,247 @@
+""" pyglet_helper.util.profiler contains a profiler which times the render()
+and init_model() methods of every renderable object, and the major steps
+inside them, and reports the result as collapsed stacks for flame graphs.
+
+    with Profiler() as profiler:
+        scene.draw(objects)
+    profiler.export_collapsed("scene.folded")
+
+The methods are only wrapped while the profiler is installed, so there is no
+overhead when it is not.
+"""
+from collections import defaultdict
+from importlib import import_module
+import time
+
+CLOCK = getattr(time, 'perf_counter', time.time)
+
+# The methods timed for each class that defines them, named after the class
+# of the object they are called on
+METHODS = ['render', 'init_model']
+
+# The steps inside the render methods which are timed, and the methods that
+# implement them, as (module, class, method)
+STEPS = {'transform': [('pyglet_helper.objects.primitive', 'Primitive',
+                        'model_world_transform')],
+         'color': [('pyglet_helper.util.rgba', 'Rgb', 'gl_set'),
+                   ('pyglet_helper.util.rgba', 'Rgba', 'gl_set')],
+         'draw': [('pyglet_helper.util.display_list', 'DisplayList',
+                   'gl_render')]}
+
+# The methods timed as the root of each stack
+FRAMES = [('pyglet_helper.objects.renderable', 'View', 'draw')]
+
+
+def _subclasses(cls):
+    """
+    Find every subclass of a class
+    :param cls: the base class
+    :type cls: type
+    :return: the class and all of its subclasses
+    :rtype: list of type
+    """
+    classes = [cls]
+    for subclass in cls.__subclasses__():
+        classes.extend(_subclasses(subclass))
+    return classes
+
+
+class Profiler(object):
+    """
+    Times the render() and init_model() methods of every Renderable, and the
+    transform, color and draw steps inside them. Use it as a context manager
+    (or call install() and uninstall()) to profile the code inside it.
+    """
+    # The profiler currently installed, if any
+    active = None
+
+    def __init__(self, clock=CLOCK):
+        """
+        :param clock: a function returning the current time, in seconds
+        :type clock: callable
+        """
+        self.clock = clock
+        # The number of calls, by stack
+        self.calls = defaultdict(int)
+        # The time spent in each stack, including the stacks above it
+        self.total_times = defaultdict(float)
+        # The time spent in each stack, excluding the stacks above it
+        self.self_times = defaultdict(float)
+        # Functions called with the stack and elapsed time of each timed call
+        self.callbacks = []
+        self._stack = []
+        # The time spent in the calls made by each entry in the stack
+        self._child_times = [0.0]
+        self._replaced = []
+
+    def add_callback(self, callback):
+        """ Register a function to be called after each timed call.
+
+        :param callback: a function taking the stack, as a tuple of names
+        from the outermost call, and the time taken, in seconds
+        :type callback: callable
+        """
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        """ Unregister a function registered with add_callback().
+
+        :param callback: the function
+        :type callback: callable
+        """
+        self.callbacks.remove(callback)
+
+    def _enter(self, name):
+        """ Push a call onto the stack.
+
+        :param name: the name of the call
+        :type name: str
+        :return: the time the call started
+        :rtype: float
+        """
+        self._stack.append(name)
+        self._child_times.append(0.0)
+        return self.clock()
+
+    def _exit(self, start):
+        """ Pop a call off the stack and record its time.
+
+        :param start: the time the call started
+        :type start: float
+        """
+        elapsed = self.clock() - start
+        stack = tuple(self._stack)
+        self._stack.pop()
+        child_time = self._child_times.pop()
+        self._child_times[-1] += elapsed
+        self.calls[stack] += 1
+        self.total_times[stack] += elapsed
+        self.self_times[stack] += elapsed - child_time
+        for callback in self.callbacks:
+            callback(stack, elapsed)
+
+    def wrap_method(self, function, method):
+        """ Wrap a method so that each call is named after the class of the
+        object it is called on, e.g., Sphere.render.
+
+        :param function: the method to wrap
+        :type function: callable
+        :param method: the name of the method
+        :type method: str
+        :return: the wrapped method
+        :rtype: callable
+        """
+        def timed(obj, *args, **kwargs):
+            start = self._enter(type(obj).__name__ + '.' + method)
+            try:
+                return function(obj, *args, **kwargs)
+            finally:
+                self._exit(start)
+        timed.__name__ = function.__name__
+        timed.__doc__ = function.__doc__
+        return timed
+
+    def wrap_step(self, function, name):
+        """ Wrap a function so that each call is named name.
+
+        :param function: the function to wrap
+        :type function: callable
+        :param name: the name of the step, e.g., draw
+        :type name: str
+        :return: the wrapped function
+        :rtype: callable
+        """
+        def timed(*args, **kwargs):
+            start = self._enter(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._exit(start)
+        timed.__name__ = function.__name__
+        timed.__doc__ = function.__doc__
+        return timed
+
+    def _replace(self, cls, method, wrapped):
+        """ Replace a method of a class, remembering the original.
+
+        :param cls: the class
+        :type cls: type
+        :param method: the name of the method
+        :type method: str
+        :param wrapped: the replacement
+        :type wrapped: callable
+        """
+        self._replaced.append((cls, method, cls.__dict__[method]))
+        setattr(cls, method, wrapped)
+
+    def install(self):
+        """ Wrap the timed methods of every Renderable subclass.
+        """
+        if Profiler.active is not None:
+            raise ValueError("Another profiler is already installed")
+        Profiler.active = self
+        from pyglet_helper.objects import Renderable
+        for cls in _subclasses(Renderable):
+            for method in METHODS:
+                if method in cls.__dict__:
+                    self._replace(cls, method, self.wrap_method(
+                        cls.__dict__[method], method))
+        for module, class_name, method in FRAMES:
+            cls = getattr(import_module(module), class_name)
+            self._replace(cls, method, self.wrap_method(cls.__dict__[method],
+                                                        method))
+        for name, methods in STEPS.items():
+            for module, class_name, method in methods:
+                cls = getattr(import_module(module), class_name)
+                self._replace(cls, method, self.wrap_step(
+                    cls.__dict__[method], name))
+
+    def uninstall(self):
+        """ Restore the methods wrapped by install().
+        """
+        while self._replaced:
+            cls, method, original = self._replaced.pop()
+            setattr(cls, method, original)
+        if Profiler.active is self:
+            Profiler.active = None
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, _type, value, traceback):
+        self.uninstall()
+
+    def clear(self):
+        """ Forget all of the recorded times.
+        """
+        self.calls.clear()
+        self.total_times.clear()
+        self.self_times.clear()
+
+    def collapsed(self):
+        """
+        Convert the recorded times to the collapsed stack format read by
+        flamegraph.pl, speedscope and similar tools: one line per stack, with
+        the names separated by semicolons followed by the time spent in it,
+        excluding its children, in microseconds.
+        :return: the collapsed stacks
+        :rtype: str
+        """
+        lines = []
+        for stack in sorted(self.self_times):
+            lines.append('%s %d' % (';'.join(stack),
+                                    round(self.self_times[stack] * 1e6)))
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def export_collapsed(self, fileid):
+        """ Write the recorded times to a file in the collapsed stack format.
+
+        :param fileid: the filename, or a file opened for writing
+        :type fileid: str or file
+        """
+        if isinstance(fileid, str):
+            with open(fileid, 'w') as stack_file:
+                stack_file.write(self.collapsed())
+        else:
+            fileid.write(self.collapsed())
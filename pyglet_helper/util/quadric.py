@@ -8,6 +8,9 @@ except ImportError:
     gl = None
 from enum import Enum
 
+from pyglet_helper.util.gl_resources import current_resources
+from pyglet_helper.util.render_stats import COUNTERS
+
 
 class DrawingStyle(Enum):
     """
@@ -42,6 +45,9 @@ class Quadric(object):
     """
     def __init__(self):
         self.quadric = gl.glu.gluNewQuadric()
+        self._resources = current_resources()
+        self._resource = self._resources.track(self, 'quadric', self.quadric,
+                                               gl.glu.gluDeleteQuadric)
         gl.glu.gluQuadricDrawStyle(self.quadric, gl.glu.GLU_FILL)
         gl.glu.gluQuadricNormals(self.quadric, gl.glu.GLU_SMOOTH)
         gl.glu.gluQuadricOrientation(self.quadric, gl.glu.GLU_OUTSIDE)
@@ -49,8 +55,18 @@ class Quadric(object):
         self._normal_style = 1
         self._orientation = 1
 
-    def __del__(self):
-        gl.glu.gluDeleteQuadric(self.quadric)
+    def gl_free(self):
+        """ Delete the GLU quadric. The quadric must not be rendered
+        afterwards.
+        """
+        self._resources.release(self._resource)
+        self._resource = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.gl_free()
 
     @property
     def drawing_style(self):
@@ -132,6 +148,8 @@ class Quadric(object):
         :type stacks: int
         """
         gl.glu.gluSphere(self.quadric, radius, slices, stacks)
+        # The stacks at the poles are triangle fans, the others quad strips.
+        COUNTERS.add_triangles(2 * slices * (stacks - 1))
 
     def render_cylinder(self, base_radius, height, slices, stacks,
                         top_radius=None):
@@ -158,6 +176,7 @@ class Quadric(object):
         else:
             gl.glu.gluCylinder(self.quadric, base_radius, top_radius,
                                height, slices, stacks)
+        COUNTERS.add_triangles(2 * slices * stacks)
         gl.glRotatef(-90, 0, 1, 0)
 
     def render_disk(self, radius, slices, rings, rotation):
@@ -175,4 +194,6 @@ class Quadric(object):
         # rotate the disk so that it is drawn along the VPython axis convention
         gl.glRotatef(90, 0, gl.GLfloat(rotation), 0)
         gl.glu.gluDisk(self.quadric, 0.0, radius, slices, rings)
+        # The innermost ring is a triangle fan, the others quad strips.
+        COUNTERS.add_triangles(slices * (2 * rings - 1))
         gl.glRotatef(-90, 0, gl.GLfloat(rotation), 0)
@@ -0,0 +1,324 @@
+""" pyglet_helper.util.render_stats contains objects for measuring what each
+rendered frame costs: the objects drawn, the OpenGL work they caused and the
+time spent in each stage of the frame
+"""
+from collections import deque
+import json
+import time
+
+from numpy import percentile
+
+CLOCK = getattr(time, 'perf_counter', time.time)
+
+# The stages of a frame, in the order they run. setup covers the work before
+# the objects are drawn: View.setup(), if it is called first, and building
+# the Scene in View.draw().
+STAGES = ('setup', 'opaque', 'sort', 'translucent')
+
+# The percentiles reported by FrameTimeHistogram
+QUANTILES = (50, 95, 99)
+
+
+class RenderCounters(object):
+    """
+    Running totals of the work done by the drawing code. The totals are
+    never reset; the View takes a snapshot() at the start of each frame and
+    reports the difference at the end of it. COUNTERS counts the work of
+    every View, and adds it to the counters of the View drawing, if any.
+    """
+    def __init__(self):
+        # The number of display lists (or other batches of geometry) called
+        self.draw_calls = 0
+        # The number of display lists compiled
+        self.lists_compiled = 0
+        # The number of model to world transforms computed
+        self.transforms = 0
+        # The number of triangles drawn, by level of detail
+        self.triangles = {}
+        # The triangles emitted into the display list being compiled, if any
+        self._compiling = None
+        # The counters of the View being drawn, which the counts are added
+        # to as well
+        self.view_counters = None
+
+    def begin_compile(self):
+        """ Start counting the triangles emitted into a display list.
+        """
+        self._compiling = 0
+
+    def end_compile(self):
+        """ Stop counting the triangles emitted into a display list.
+
+        :return: the number of triangles in the list
+        :rtype: int
+        """
+        triangles = self._compiling or 0
+        self._compiling = None
+        self.lists_compiled += 1
+        if self.view_counters is not None:
+            self.view_counters.lists_compiled += 1
+        return triangles
+
+    def add_triangles(self, count, lod=0):
+        """ Count triangles sent to OpenGL. Inside a display list they are
+        only drawn when the list is called, so they are added to the list
+        instead.
+
+        :param count: the number of triangles
+        :type count: int
+        :param lod: the level of detail they are drawn at
+        :type lod: int
+        """
+        if self._compiling is not None:
+            self._compiling += count
+        else:
+            self.triangles[lod] = self.triangles.get(lod, 0) + count
+            if self.view_counters is not None:
+                self.view_counters.add_triangles(count, lod)
+
+    def draw(self, triangles, lod=0):
+        """ Count a call to a display list.
+
+        :param triangles: the number of triangles in the list
+        :type triangles: int
+        :param lod: the level of detail of the list
+        :type lod: int
+        """
+        self.draw_calls += 1
+        self.triangles[lod] = self.triangles.get(lod, 0) + triangles
+        if self.view_counters is not None:
+            self.view_counters.draw(triangles, lod)
+
+    def transform(self):
+        """ Count a model to world transform.
+        """
+        self.transforms += 1
+        if self.view_counters is not None:
+            self.view_counters.transform()
+
+    def snapshot(self):
+        """
+        Copy the current totals
+        :return: the totals
+        :rtype: dict
+        """
+        return {'draw_calls': self.draw_calls,
+                'lists_compiled': self.lists_compiled,
+                'transforms': self.transforms,
+                'triangles': dict(self.triangles)}
+
+
+class FrameStats(object):
+    """
+    The statistics for a single rendered frame.
+    """
+    def __init__(self, objects_submitted=0, objects_culled=0, draw_calls=0,
+                 triangles=None, lists_compiled=0, state_changes=0,
+                 state_changes_skipped=0, transforms=0, stage_times=None):
+        """
+        :param objects_submitted: The number of objects passed to View.draw()
+        :type objects_submitted: int
+        :param objects_culled: The number of objects that drew nothing
+        :type objects_culled: int
+        :param draw_calls: The number of display lists called
+        :type draw_calls: int
+        :param triangles: The number of triangles drawn, by level of detail
+        :type triangles: dict
+        :param lists_compiled: The number of display lists compiled
+        :type lists_compiled: int
+        :param state_changes: The number of OpenGL state changes issued
+        :type state_changes: int
+        :param state_changes_skipped: The number of redundant state changes
+        dropped
+        :type state_changes_skipped: int
+        :param transforms: The number of model to world transforms computed
+        :type transforms: int
+        :param stage_times: The wall time spent in each stage, in seconds
+        :type stage_times: dict
+        """
+        self.objects_submitted = objects_submitted
+        self.objects_culled = objects_culled
+        self.draw_calls = draw_calls
+        self.triangles = triangles or {}
+        self.lists_compiled = lists_compiled
+        self.state_changes = state_changes
+        self.state_changes_skipped = state_changes_skipped
+        self.transforms = transforms
+        self.stage_times = dict.fromkeys(STAGES, 0.0)
+        if stage_times:
+            self.stage_times.update(stage_times)
+
+    @classmethod
+    def between(cls, before, after, **kwargs):
+        """ Build the statistics for the work done between two snapshots of
+        a RenderCounters.
+
+        :param before: the snapshot taken at the start of the frame
+        :type before: dict
+        :param after: the snapshot taken at the end of the frame
+        :type after: dict
+        :return: the statistics
+        :rtype: pyglet_helper.util.FrameStats
+        """
+        triangles = {}
+        for lod, count in after['triangles'].items():
+            count -= before['triangles'].get(lod, 0)
+            if count:
+                triangles[lod] = count
+        return cls(draw_calls=after['draw_calls'] - before['draw_calls'],
+                   lists_compiled=(after['lists_compiled'] -
+                                   before['lists_compiled']),
+                   transforms=after['transforms'] - before['transforms'],
+                   triangles=triangles, **kwargs)
+
+    @property
+    def frame_time(self):
+        """
+        Get the wall time taken by the whole frame
+        :return: the time, in seconds
+        :rtype: float
+        """
+        return sum(self.stage_times.values())
+
+    @property
+    def total_triangles(self):
+        """
+        Get the number of triangles drawn at every level of detail
+        :return: the number of triangles
+        :rtype: int
+        """
+        return sum(self.triangles.values())
+
+    def as_dict(self):
+        """
+        Convert the statistics to plain Python types
+        :return: the statistics
+        :rtype: dict
+        """
+        return {'objects_submitted': self.objects_submitted,
+                'objects_culled': self.objects_culled,
+                'draw_calls': self.draw_calls,
+                'triangles': dict((str(lod), count) for lod, count in
+                                  self.triangles.items()),
+                'lists_compiled': self.lists_compiled,
+                'state_changes': self.state_changes,
+                'state_changes_skipped': self.state_changes_skipped,
+                'transforms': self.transforms,
+                'stage_times': dict(self.stage_times),
+                'frame_time': self.frame_time}
+
+    def to_json(self):
+        """
+        Convert the statistics to JSON
+        :return: the JSON document
+        :rtype: str
+        """
+        return json.dumps(self.as_dict(), sort_keys=True)
+
+    def to_prometheus(self, prefix='pyglet_helper'):
+        """
+        Convert the statistics to the Prometheus text exposition format
+        :param prefix: prepended to the name of every metric
+        :type prefix: str
+        :return: the metrics, one per line
+        :rtype: str
+        """
+        lines = []
+        for name in ('objects_submitted', 'objects_culled', 'draw_calls',
+                     'lists_compiled', 'state_changes',
+                     'state_changes_skipped', 'transforms'):
+            lines.append('# TYPE %s_frame_%s gauge' % (prefix, name))
+            lines.append('%s_frame_%s %d' % (prefix, name,
+                                             getattr(self, name)))
+        lines.append('# TYPE %s_frame_triangles gauge' % prefix)
+        for lod in sorted(self.triangles):
+            lines.append('%s_frame_triangles{lod="%s"} %d' %
+                         (prefix, lod, self.triangles[lod]))
+        lines.append('# TYPE %s_frame_stage_seconds gauge' % prefix)
+        for stage in STAGES:
+            lines.append('%s_frame_stage_seconds{stage="%s"} %r' %
+                         (prefix, stage, self.stage_times[stage]))
+        return '\n'.join(lines) + '\n'
+
+
+class FrameTimeHistogram(object):
+    """
+    The times of the most recent frames, for reporting percentiles.
+    """
+    def __init__(self, size=300):
+        """
+        :param size: The number of frames kept
+        :type size: int
+        """
+        self.size = size
+        self.times = deque(maxlen=size)
+        # The number of frames added, including those no longer kept
+        self.count = 0
+
+    def __len__(self):
+        return len(self.times)
+
+    def add(self, frame_time):
+        """ Record the time of a frame, forgetting the oldest one if the
+        histogram is full.
+
+        :param frame_time: the time taken by the frame, in seconds
+        :type frame_time: float
+        """
+        self.times.append(frame_time)
+        self.count += 1
+
+    def percentile(self, quantile):
+        """
+        Get a percentile of the kept frame times
+        :param quantile: the percentile, between 0 and 100
+        :type quantile: float
+        :return: the frame time, in seconds, or 0.0 if there are no frames
+        :rtype: float
+        """
+        if not self.times:
+            return 0.0
+        return float(percentile(list(self.times), quantile))
+
+    def summary(self):
+        """
+        Get the percentiles, mean and maximum of the kept frame times
+        :return: the summary, with times in seconds
+        :rtype: dict
+        """
+        result = dict(('p%d' % quantile, self.percentile(quantile))
+                      for quantile in QUANTILES)
+        result['count'] = self.count
+        result['mean'] = (sum(self.times) / len(self.times)) if self.times \
+            else 0.0
+        result['max'] = max(self.times) if self.times else 0.0
+        return result
+
+    def to_json(self):
+        """
+        Convert the summary to JSON
+        :return: the JSON document
+        :rtype: str
+        """
+        return json.dumps(self.summary(), sort_keys=True)
+
+    def to_prometheus(self, prefix='pyglet_helper'):
+        """
+        Convert the summary to the Prometheus text exposition format
+        :param prefix: prepended to the name of the metric
+        :type prefix: str
+        :return: the metric, one sample per line
+        :rtype: str
+        """
+        name = prefix + '_frame_seconds'
+        lines = ['# TYPE %s summary' % name]
+        for quantile in QUANTILES:
+            lines.append('%s{quantile="%s"} %r' % (
+                name, quantile / 100.0, self.percentile(quantile)))
+        lines.append('%s_sum %r' % (name, float(sum(self.times))))
+        lines.append('%s_count %d' % (name, len(self.times)))
+        return '\n'.join(lines) + '\n'
+
+
+# The work done by the drawing code, across every View
+COUNTERS = RenderCounters()
@@ -5,12 +5,16 @@ try:
     import pyglet.gl as gl
 except Exception as error_msg:
     gl = None
+from pyglet_helper.util.gl_state import current_state
 
 
 class Rgba(object):
     """
     Defines a color to be used by OpenGl, including RGB and opacity.
     """
+    # Changing any of these attributes invalidates the cached OpenGL payload.
+    CHANNELS = ('red', 'green', 'blue', 'opacity')
+
     def __init__(self, red=1.0, green=1.0, blue=1.0, opacity=1.0, color=None):
         """
         :param red: The red value of the color, value between 0 and 1
@@ -24,6 +28,9 @@ class Rgba(object):
         :param c: A list of values to copy into a new color
         :type c: list
         """
+        self._frozen = False
+        # The color packed into a ctypes array, ready for glMaterialfv
+        self._payload = None
         if color is not None:
             if len(color) == 4:
                 for i in range(4):
@@ -60,10 +67,36 @@ class Rgba(object):
         else:
             raise ValueError("no such component")
 
+    def __setattr__(self, name, value):
+        if name in self.CHANNELS:
+            if self._frozen:
+                raise ValueError("cannot change a shared color, copy it "
+                                 "first")
+            object.__setattr__(self, '_payload', None)
+        object.__setattr__(self, name, value)
+
     def __str__(self):
         return "color: r" + str(self.red) + " g" + str(self.green) + " b" + \
                str(self.blue) + " o"+str(self.opacity)
 
+    @property
+    def frozen(self):
+        """
+        True if the color is shared and can no longer be changed
+        :rtype: bool
+        """
+        return self._frozen
+
+    def freeze(self):
+        """ Make the color immutable, so that it can be shared between
+        objects.
+
+        :return: this color
+        :rtype: pyglet_helper.util.Rgba
+        """
+        self._frozen = True
+        return self
+
     def desaturate(self):
         """ Return a desaturated version of the color
 
@@ -88,17 +121,25 @@ class Rgba(object):
         """
         Set this color to the current material in OpenGL.
         """
-        color = (gl.GLfloat * 4)(*[self.red, self.green, self.blue,
-                                   self.opacity])
-        gl.glMaterialfv(gl.GL_FRONT_AND_BACK, gl.GL_AMBIENT_AND_DIFFUSE, color)
-        gl.glMaterialfv(gl.GL_FRONT_AND_BACK, gl.GL_SPECULAR, color)
-        gl.glMaterialf(gl.GL_FRONT_AND_BACK, gl.GL_SHININESS, 50)
+        color = self._payload
+        if color is None:
+            color = (gl.GLfloat * 4)(self.red, self.green, self.blue,
+                                     self.opacity)
+            self._payload = color
+        state = current_state()
+        state.material_v(gl.GL_FRONT_AND_BACK, gl.GL_AMBIENT_AND_DIFFUSE,
+                         color)
+        state.material_v(gl.GL_FRONT_AND_BACK, gl.GL_SPECULAR, color)
+        state.material(gl.GL_FRONT_AND_BACK, gl.GL_SHININESS, 50)
 
 
 class Rgb(object):
     """
     Define an RGB color to be used by OpenGl
     """
+    # Changing any of these attributes invalidates the cached OpenGL payload.
+    CHANNELS = ('red', 'green', 'blue')
+
     def __init__(self, red=1.0, green=1.0, blue=1.0, color=None):
         """
         :param red: The red value of the color, value between 0 and 1
@@ -110,6 +151,11 @@ class Rgb(object):
         :param color: A list of values to copy into a new color
         :type color: list
         """
+        self._frozen = False
+        # The color packed into a ctypes array, ready for glMaterialfv, and
+        # the opacity it was packed with
+        self._payload = None
+        self._payload_opacity = None
         if color is not None:
             if len(color) == 3:
                 for i in range(3):
@@ -121,10 +167,36 @@ class Rgb(object):
             self.green = green
             self.blue = blue
 
+    def __setattr__(self, name, value):
+        if name in self.CHANNELS:
+            if self._frozen:
+                raise ValueError("cannot change a shared color, copy it "
+                                 "first")
+            object.__setattr__(self, '_payload', None)
+        object.__setattr__(self, name, value)
+
     def __str__(self):
         return "color: r" + str(self.red) + " g" + str(self.green) \
                + " b" + str(self.blue)
 
+    @property
+    def frozen(self):
+        """
+        True if the color is shared and can no longer be changed
+        :rtype: bool
+        """
+        return self._frozen
+
+    def freeze(self):
+        """ Make the color immutable, so that it can be shared between
+        objects.
+
+        :return: this color
+        :rtype: pyglet_helper.util.Rgb
+        """
+        self._frozen = True
+        return self
+
     def __getitem__(self, item):
         if item == 0:
             return self.red
@@ -270,7 +342,13 @@ class Rgb(object):
         :param opacity: the opacity value of the color
         :type opacity: float
         """
-        color = (gl.GLfloat * 4)(*[self.red, self.green, self.blue, opacity])
-        gl.glMaterialfv(gl.GL_FRONT_AND_BACK, gl.GL_AMBIENT_AND_DIFFUSE, color)
-        gl.glMaterialfv(gl.GL_FRONT_AND_BACK, gl.GL_SPECULAR, color)
-        gl.glMaterialf(gl.GL_FRONT_AND_BACK, gl.GL_SHININESS, 50)
+        color = self._payload
+        if color is None or self._payload_opacity != opacity:
+            color = (gl.GLfloat * 4)(self.red, self.green, self.blue, opacity)
+            self._payload = color
+            self._payload_opacity = opacity
+        state = current_state()
+        state.material_v(gl.GL_FRONT_AND_BACK, gl.GL_AMBIENT_AND_DIFFUSE,
+                         color)
+        state.material_v(gl.GL_FRONT_AND_BACK, gl.GL_SPECULAR, color)
+        state.material(gl.GL_FRONT_AND_BACK, gl.GL_SHININESS, 50)
@@ -0,0 +1,112 @@
+""" pyglet_helper.util.shader_permutations contains an object for building
+variants of a shader program specialised by compile-time #defines for the
+number of lights in the scene, so that the shaders do not branch on uniforms
+at run time
+"""
+from collections import OrderedDict
+
+from pyglet_helper.util.shader_program import ShaderProgram
+from pyglet_helper.util.shader_source import insert_defines
+
+# The most lights the library shaders support
+MAX_LIGHTS = 8
+
+
+def permutation_defines(light_count=None):
+    """
+    Get the macros that select a permutation
+    :param light_count: the number of lights, or None to count them at run
+    time from the light_count uniform
+    :type light_count: int
+    :return: the values of the macros, by name
+    :rtype: dict
+    """
+    defines = {}
+    if light_count is not None:
+        defines['LIGHT_COUNT'] = min(int(light_count), MAX_LIGHTS)
+    return defines
+
+
+class PermutationCache(object):
+    """
+    Builds and keeps the permutations of shader programs, freeing the least
+    recently used once there are more than a given number
+    """
+    def __init__(self, size=64):
+        """
+        :param size: The most permutations kept
+        :type size: int
+        """
+        self.size = size
+        # The permutations, by program and macros, least recently used first
+        self._permutations = OrderedDict()
+        # The number of requests for a permutation which was already built
+        self.hits = 0
+        # The number of permutations built
+        self.misses = 0
+        # The number of permutations freed to stay within the size
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._permutations)
+
+    def get(self, program, defines):
+        """
+        Get a permutation of a program, building it if it is not cached
+        :param program: the program to specialise
+        :type program: pyglet_helper.util.ShaderProgram
+        :param defines: the values of the macros, by name, e.g., from
+        permutation_defines()
+        :type defines: dict
+        :return: the permutation; the program itself if there are no macros
+        :rtype: pyglet_helper.util.ShaderProgram
+        """
+        if not defines:
+            return program
+        key = (program.source, tuple(sorted(defines.items())))
+        permutation = self._permutations.pop(key, None)
+        if permutation is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            stages = dict((stage, insert_defines(source, defines))
+                          for stage, source in program.stages.items())
+            # The macros make the source unique, so that the permutation's
+            # binary is saved separately from the program's.
+            header = ''.join('// %s=%s\n' % item for item in key[1])
+            permutation = ShaderProgram(header + (program.source or ''),
+                                        cache=program.cache, stages=stages)
+            permutation.base = program
+        self._permutations[key] = permutation
+        while len(self._permutations) > self.size:
+            _, evicted = self._permutations.popitem(last=False)
+            self.evictions += 1
+            if evicted.program > 0:
+                evicted.gl_free()
+        return permutation
+
+    def clear(self):
+        """ Free every realized permutation, and forget all of them.
+        """
+        for permutation in self._permutations.values():
+            if permutation.program > 0:
+                permutation.gl_free()
+        self._permutations.clear()
+
+    @property
+    def stats(self):
+        """
+        Get the cache's counters
+        :return: the number of permutations, the size and the hit, miss and
+        eviction counters
+        :rtype: dict
+        """
+        return {'permutations': len(self._permutations),
+                'size': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions}
+
+
+# The permutations of every program in the process
+PERMUTATIONS = PermutationCache()
@@ -1,21 +1,74 @@
 """ pyglet_helper.util.shader_program contains objects for creating programs to
 describe how the light treats the object
 """
+from ctypes import byref, c_char, c_char_p, c_int, c_uint, \
+    create_string_buffer
+import hashlib
+import os
+import struct
 try:
     import pyglet.gl as gl
 except ImportError:
     gl = None
+from numpy import nditer
+
+from pyglet_helper.util.gl_resources import current_resources
+from pyglet_helper.util.shader_source import parse_sections, stage_sources
+
+# GL_COMPLETION_STATUS_KHR, from KHR_parallel_shader_compile, which pyglet
+# does not define
+COMPLETION_STATUS = 0x91B1
+
+
+def source_hash(source):
+    """
+    Compute the key a shader program's source is cached under
+    :param source: the program's complete source
+    :type source: str
+    :return: the hex digest of the source
+    :rtype: str
+    """
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
 
 
 class ShaderProgram(object):
     """
     An interface for storing and executing shader programs
     """
-    def __init__(self, source=None):
+    def __init__(self, source=None, cache=None, stages=None):
+        """
+        :param source: The program's source
+        :type source: str
+        :param cache: The cache the program is shared through, which also
+        stores its linked binary, if the driver allows it
+        :type cache: pyglet_helper.util.ProgramCache
+        :param stages: The source of each stage, by name, if it has already
+        been assembled, e.g., by a ShaderLibrary
+        :type stages: dict
+        """
         self._source = None
+        self._stages = None
         self.source = source
-        self.program = 0
-        self.uniforms = {'': 0}
+        self._stages = stages
+        # -1 until the program is realized; 0 if it failed to link
+        self.program = -1
+        # The locations of the program's uniforms, by name
+        self.uniforms = {}
+        # True once the active uniforms have been read from the linked
+        # program, after which names missing from uniforms are not active
+        self.uniforms_registered = False
+        # The last value set for each uniform location
+        self._uniform_values = {}
+        # The number of glUniform calls issued and skipped as redundant
+        self.uniform_uploads = 0
+        self.uniform_skips = 0
+        self.cache = cache
+        self._linking = False
+        self._ready = False
+        # The token the program object is deleted with, and the manager of
+        # its share group
+        self._resource = 0
+        self._resources = None
 
     @property
     def source(self):
@@ -34,26 +87,174 @@ class ShaderProgram(object):
         :type source: str
         """
         self._source = source
+        self._stages = None
+
+    @property
+    def stages(self):
+        """
+        Get the source of each stage of the program, splitting the program's
+        source into sections the first time it is needed
+        :return: the vertex and fragment sources, by name
+        :rtype: dict
+        """
+        if self._stages is None:
+            self._stages = stage_sources(parse_sections(self._source or ''))
+        return self._stages
 
     def uniform_location(self, name):
         """
-        Get the location of the shader by name in the view.
-        :param view: the view to inspect
-        :type view: str
-        :param name: the View to examine
-        :type name: pyglet_helper.objects.view
-        :return:
+        Get the location of a uniform of the program
+        :param name: the name of the uniform
+        :type name: str
+        :return: the location, or -1 if the program has no such uniform
+        :rtype: int
         """
         if self.program <= 0 or not gl.glext_arb.GL_ARB_shader_objects:
             return -1
-        cache = self.uniforms[name]
-        if cache == 0:
-            cache = 2 + gl.glext_arb.glGetUniformLocationARB(self.program, name)
-        return cache - 2
+        if name not in self.uniforms:
+            if self.uniforms_registered:
+                return -1
+            self.uniforms[name] = gl.glext_arb.glGetUniformLocationARB(
+                self.program, name)
+        return self.uniforms[name]
+
+    def register_uniforms(self):
+        """ Read the locations of every active uniform from the linked
+        program, so that looking them up never calls OpenGL. The elements of
+        an array uniform, e.g., light_pos[0], are also registered under the
+        array's name.
+        """
+        self.uniforms = {}
+        self._uniform_values = {}
+        count = gl.glext_arb.glGetObjectParameterivARB(
+            self.program, gl.GL_OBJECT_ACTIVE_UNIFORMS_ARB)
+        max_length = gl.glext_arb.glGetObjectParameterivARB(
+            self.program, gl.GL_OBJECT_ACTIVE_UNIFORM_MAX_LENGTH_ARB)
+        name = create_string_buffer(max_length + 1)
+        length = c_int(0)
+        size = c_int(0)
+        uniform_type = c_uint(0)
+        for index in range(count):
+            gl.glext_arb.glGetActiveUniformARB(
+                self.program, index, max_length + 1, byref(length),
+                byref(size), byref(uniform_type), name)
+            uniform = name.value.decode('utf-8')
+            location = gl.glext_arb.glGetUniformLocationARB(self.program,
+                                                            uniform)
+            self.uniforms[uniform] = location
+            if uniform.endswith('[0]'):
+                self.uniforms[uniform[:-3]] = location
+        self.uniforms_registered = True
+
+    def _uniform_changes(self, location, value):
+        """
+        Update the shadowed value of a uniform
+        :param location: the uniform's location
+        :type location: int
+        :param value: its new value
+        :type value: tuple
+        :return: True if the glUniform call must be issued
+        :rtype: bool
+        """
+        if location < 0:
+            return False
+        if self._uniform_values.get(location) == value:
+            self.uniform_skips += 1
+            return False
+        self._uniform_values[location] = value
+        self.uniform_uploads += 1
+        return True
+
+    def set_uniform(self, location, *values):
+        """ Set a float uniform, or a vec2, vec3 or vec4, unless it already
+        has the value. The program must be in use.
+
+        :param location: the uniform's location, from uniform_location()
+        :type location: int
+        :param values: the one to four components of the value
+        :type values: float
+        """
+        values = tuple(float(value) for value in values)
+        if self._uniform_changes(location, values):
+            [gl.glext_arb.glUniform1fARB, gl.glext_arb.glUniform2fARB,
+             gl.glext_arb.glUniform3fARB, gl.glext_arb.glUniform4fARB][
+                 len(values) - 1](location, *values)
+
+    def set_uniform_int(self, location, value):
+        """ Set an int or sampler uniform, unless it already has the value.
+        The program must be in use.
+
+        :param location: the uniform's location, from uniform_location()
+        :type location: int
+        :param value: the value
+        :type value: int
+        """
+        if self._uniform_changes(location, int(value)):
+            gl.glext_arb.glUniform1iARB(location, int(value))
+
+    def set_uniform_array(self, location, values):
+        """ Set an array of vec4 uniforms, e.g., light_pos, unless it already
+        has the values. The program must be in use.
+
+        :param location: the location of the array, from uniform_location()
+        :type location: int
+        :param values: the elements of the array, each with four components
+        :type values: list of tuple
+        """
+        values = tuple(float(component) for value in values
+                       for component in value)
+        if self._uniform_changes(location, values):
+            gl.glext_arb.glUniform4fvARB(location, len(values) // 4,
+                                         (gl.GLfloat * len(values))(*values))
+
+    def set_uniform_matrix(self, location, in_tmatrix):
+        """ Set a mat4 uniform, unless it already has the value. The program
+        must be in use.
+
+        :param location: the uniform's location, from uniform_location()
+        :type location: int
+        :param in_tmatrix: the matrix
+        :type in_tmatrix: pyglet_helper.util.Tmatrix
+        """
+        values = tuple(float(value) for value in nditer(in_tmatrix.matrix))
+        if self._uniform_changes(location, values):
+            gl.glext_arb.glUniformMatrix4fvARB(location, 1, False,
+                                               (gl.GLfloat * 16)(*values))
+
+    @property
+    def ready(self):
+        """
+        Check whether the program is linked and can be used
+        :return: True once the program has been realized successfully
+        :rtype: bool
+        """
+        return self._ready
+
+    @property
+    def linking(self):
+        """
+        Check whether the program has been compiled and linked, but the
+        result of linking has not been checked yet
+        :return: True while the link is pending
+        :rtype: bool
+        """
+        return self._linking
 
     def realize(self, view):
         """
-        Render the shader program
+        Compile and link the shader program, waiting for the driver to
+        finish
+        :param view: the view to render the shader program in
+        :type view: pyglet_helper.objects.View
+        """
+        self.begin_realize(view)
+        self.poll()
+
+    def begin_realize(self, view):
+        """ Start compiling and linking the shader program. With
+        KHR_parallel_shader_compile, the driver does so in the background
+        until poll() finds it done.
+
         :param view: the view to render the shader program in
         :type view: pyglet_helper.objects.View
         """
@@ -66,12 +267,82 @@ class ShaderProgram(object):
         if not gl.glext_arb.GL_ARB_shader_objects:
             return
 
-        self.program = gl.glext_arb.glCreateProgramObjectARB()
+        self._set_program(gl.glext_arb.glCreateProgramObjectARB())
+
+        # A binary saved by an earlier run skips compiling and linking.
+        if self.cache is not None and self.cache.load_binary(self):
+            self.register_uniforms()
+            self._ready = True
+            return
 
-        self.compile(gl.GL_VERTEX_SHADER_ARB)
-        self.compile(gl.GL_FRAGMENT_SHADER_ARB)
+        self.compile(gl.GL_VERTEX_SHADER_ARB, self.stages['vertex'])
+        self.compile(gl.GL_FRAGMENT_SHADER_ARB, self.stages['fragment'])
 
         gl.glext_arb.glLinkProgramARB(self.program)
+        self._linking = True
+
+    def _set_program(self, name):
+        """ Make a program object the program's, and track it.
+
+        :param name: the program object's name
+        :type name: int
+        """
+        self.program = name
+        self._resources = current_resources()
+        # The function deleting the program is looked up now, so that it can
+        # still be called once the module has been torn down at exit.
+        self._resource = self._resources.track(
+            self, 'shader program', self.program,
+            gl.glext_arb.glDeleteObjectARB)
+
+    def link_stages(self):
+        """
+        Compile and link the program's stages into a new program object,
+        without changing the program itself. It only makes OpenGL calls, so
+        it may run on a worker thread whose context shares objects with the
+        view's; adopt() then finishes realizing the program on the render
+        thread.
+        :return: the program object's name
+        :rtype: int
+        """
+        name = gl.glext_arb.glCreateProgramObjectARB()
+        self.compile(gl.GL_VERTEX_SHADER_ARB, self.stages['vertex'], name)
+        self.compile(gl.GL_FRAGMENT_SHADER_ARB, self.stages['fragment'],
+                     name)
+        gl.glext_arb.glLinkProgramARB(name)
+        return name
+
+    def adopt(self, name):
+        """ Finish realizing the program with a program object linked by
+        link_stages(). If the program was realized meanwhile, the object is
+        deleted instead.
+
+        :param name: the program object's name
+        :type name: int
+        """
+        if self.program != -1:
+            gl.glext_arb.glDeleteObjectARB(name)
+            return
+        self._set_program(name)
+        self._linking = True
+        self.poll()
+
+    def poll(self, parallel=False):
+        """
+        Finish realizing the program once the driver has linked it
+        :param parallel: if True, only check the link status once
+        KHR_parallel_shader_compile reports that linking is complete, so
+        that poll() never waits for the driver
+        :type parallel: bool
+        :return: True if the program is no longer linking
+        :rtype: bool
+        """
+        if not self._linking:
+            return True
+        if parallel and not gl.glext_arb.glGetObjectParameterivARB(
+                self.program, COMPLETION_STATUS):
+            return False
+        self._linking = False
 
         # Check if linking succeeded
         link_ok = gl.glext_arb.glGetObjectParameterivARB\
@@ -94,23 +365,36 @@ class ShaderProgram(object):
             # GL errors.  We set program to 0 instead of -1 so that binding it
             # will revert to the fixed function pipeline, and realize() won't
             # be called again.
-            gl.glext_arb.glDeleteObjectARB(self.program)
+            self._resources.release(self._resource)
+            self._resource = 0
             self.program = 0
-            return
+            return True
+
+        self.register_uniforms()
+        if self.cache is not None:
+            self.cache.save_binary(self)
+        self._ready = True
+        return True
 
-    def compile(self, shader_type):
+    def compile(self, shader_type, source, program=None):
         """
         Compiles and attaches the current shader
-        :param view: the view to render the shader program to
-        :type view: pyglet_helper.objects.View
         :param shader_type: the shader type, e.g., GL_VERTEX_SHADER,
         GL_GEOMETRY_SHADER
         :type shader_type: valid opengl shader type
+        :param source: the source of the shader
+        :type source: str
+        :param program: the program object to attach the shader to. Defaults
+        to the program's own.
+        :type program: int
         """
+        if program is None:
+            program = self.program
         shader = gl.glext_arb.glCreateShaderObjectARB(shader_type)
-        gl.glext_arb.glShaderSourceARB(shader, 1)
+        text = c_char_p(source.encode('utf-8'))
+        gl.glext_arb.glShaderSourceARB(shader, 1, byref(text), None)
         gl.glext_arb.glCompileShaderARB(shader)
-        gl.glext_arb.glAttachObjectARB(self.program, shader)
+        gl.glext_arb.glAttachObjectARB(program, shader)
         gl.glext_arb.glDeleteObjectARB(shader)
 
     def get(self):
@@ -123,27 +407,215 @@ class ShaderProgram(object):
 
     def gl_free(self):
         """
-        Remove the current program from memory
+        Remove the current program from memory. It is realized again the next
+        time it is used.
         """
-        gl.glext_arb.glDeleteObjectARB(self.program)
+        if self._resource:
+            self._resources.release(self._resource)
+        self._resource = 0
+        self.program = -1
+        self.uniforms = {}
+        self.uniforms_registered = False
+        self._uniform_values = {}
+        self._linking = False
+        self._ready = False
+
+
+class ProgramCache(object):
+    """
+    Shares one ShaderProgram between every material with the same source,
+    and, where the driver supports GL_ARB_get_program_binary, saves linked
+    programs to disk so that later runs load them instead of compiling.
+    """
+    # The extension needed to save and load program binaries
+    BINARY_EXTENSION = 'GL_ARB_get_program_binary'
+
+    def __init__(self, binary_path=None):
+        """
+        :param binary_path: The directory linked programs are saved to. If
+        None, binaries are not saved.
+        :type binary_path: str
+        """
+        self.binary_path = binary_path
+        # The programs, by the hash of their source
+        self.programs = {}
+        # The number of requests for a program which was already cached
+        self.hits = 0
+        # The number of programs created
+        self.misses = 0
+        # The number of programs loaded from, and saved to, binaries
+        self.binaries_loaded = 0
+        self.binaries_saved = 0
+
+    def __len__(self):
+        return len(self.programs)
+
+    def get(self, source, stages=None):
+        """
+        Get the program for a source, creating it if it is not cached
+        :param source: the program's complete source
+        :type source: str
+        :param stages: the source of each stage, if it has already been
+        assembled
+        :type stages: dict
+        :return: the program, shared with every other user of the source
+        :rtype: pyglet_helper.util.ShaderProgram
+        """
+        key = source_hash(source)
+        program = self.programs.get(key)
+        if program is None:
+            self.misses += 1
+            program = ShaderProgram(source, cache=self, stages=stages)
+            self.programs[key] = program
+        else:
+            self.hits += 1
+        return program
+
+    def supports_binaries(self):
+        """
+        Check whether program binaries can be saved and loaded
+        :return: True if a binary path is set and the driver supports it
+        :rtype: bool
+        """
+        if self.binary_path is None:
+            return False
+        try:
+            return bool(gl.gl_info.have_extension(self.BINARY_EXTENSION))
+        except AttributeError:
+            return False
+
+    def binary_file(self, program):
+        """
+        Get the file a program's binary is saved to. Binaries only work with
+        the driver that made them, so the driver is part of the name.
+        :param program: the program
+        :type program: pyglet_helper.util.ShaderProgram
+        :return: the filename
+        :rtype: str
+        """
+        info = gl.gl_info
+        driver = '\n'.join([info.get_vendor(), info.get_renderer(),
+                            info.get_version()])
+        return os.path.join(self.binary_path,
+                            source_hash(driver + '\n' + program.source) +
+                            '.bin')
+
+    def load_binary(self, program):
+        """
+        Load a program's binary saved by an earlier run
+        :param program: the program, created but not compiled
+        :type program: pyglet_helper.util.ShaderProgram
+        :return: True if the binary was loaded and linked successfully
+        :rtype: bool
+        """
+        if not self.supports_binaries():
+            return False
+        try:
+            with open(self.binary_file(program), 'rb') as binary_file:
+                contents = binary_file.read()
+        except (IOError, OSError):
+            return False
+        if len(contents) <= 4:
+            return False
+        binary_format = struct.unpack('<I', contents[:4])[0]
+        binary = contents[4:]
+        gl.glProgramBinary(program.program, binary_format,
+                           (c_char * len(binary)).from_buffer_copy(binary),
+                           len(binary))
+        # The driver rejects binaries made by another version of itself.
+        if not gl.glext_arb.glGetObjectParameterivARB(
+                program.program, gl.GL_OBJECT_LINK_STATUS_ARB):
+            return False
+        self.binaries_loaded += 1
+        return True
+
+    def save_binary(self, program):
+        """
+        Save a linked program's binary, so that later runs can load it
+        :param program: the linked program
+        :type program: pyglet_helper.util.ShaderProgram
+        """
+        if not self.supports_binaries():
+            return
+        length = c_int(0)
+        gl.glGetProgramiv(program.program, gl.GL_PROGRAM_BINARY_LENGTH,
+                          byref(length))
+        if length.value <= 0:
+            return
+        binary = (c_char * length.value)()
+        written = c_int(0)
+        binary_format = c_uint(0)
+        gl.glGetProgramBinary(program.program, length.value, byref(written),
+                              byref(binary_format), binary)
+        try:
+            if not os.path.isdir(self.binary_path):
+                os.makedirs(self.binary_path)
+            with open(self.binary_file(program), 'wb') as binary_file:
+                binary_file.write(struct.pack('<I', binary_format.value))
+                binary_file.write(binary.raw[:written.value])
+        except (IOError, OSError):
+            return
+        self.binaries_saved += 1
+
+    def clear(self):
+        """ Free every realized program, and forget all of the programs.
+        """
+        for program in self.programs.values():
+            if program.program > 0:
+                program.gl_free()
+        self.programs.clear()
+
+    @property
+    def stats(self):
+        """
+        Get the cache's counters
+        :return: the number of programs, the hit and miss counters and the
+        number of binaries loaded and saved
+        :rtype: dict
+        """
+        return {'programs': len(self.programs),
+                'hits': self.hits,
+                'misses': self.misses,
+                'binaries_loaded': self.binaries_loaded,
+                'binaries_saved': self.binaries_saved}
+
+
+# The programs of every material in the process
+PROGRAMS = ProgramCache()
 
 
 class UseShaderProgram(object):
     """
-    A Class to handle the initialization of ShaderPrograms
+    Binds a ShaderProgram while objects are drawn with it, going back to the
+    fixed function pipeline afterwards
+
+        with UseShaderProgram(view, program):
+            program.set_uniform_matrix(location, matrix)
+            model.gl_render()
+
+    A program which is not ready is not waited for; nothing is bound, and
+    invoked is False.
     """
     def __init__(self, view, program=None):
-
+        """
+        :param view: the view being drawn
+        :type view: pyglet_helper.objects.View
+        :param program: the program, or None for the fixed function pipeline
+        :type program: pyglet_helper.util.ShaderProgram
+        """
         self.view = view
         self.m_ok = None
         self.program = program
         self.old_program = None
         self.init()
 
+    def __enter__(self):
+        return self
+
     def __exit__(self, _type, value, traceback):
-        if self.old_program < 0 or not self.view.glext.ARB_shader_objects:
+        if self.old_program < 0:
             return
-        gl.glUseProgramObjectARB(self.old_program)
+        gl.glext_arb.glUseProgramObjectARB(self.old_program)
 
     @property
     def invoked(self):
@@ -156,20 +628,19 @@ class UseShaderProgram(object):
 
     def init(self):
         """
-        Initialize the shader program
+        Bind the shader program, if it is ready
         :return: Nothing
         """
         self.m_ok = False
-        if not self.program or not self.view.glext.ARB_shader_objects or not \
-                self.view.enable_shaders:
+        if not self.program or not self.program.ready or \
+                not gl.glext_arb.GL_ARB_shader_objects or \
+                not self.view.enable_shaders:
             self.old_program = -1
             return
 
-        self.program.realize(self.view)
-
         # For now, nested shader invocations aren't supported.
         # old_program = v.glext.glGetHandleARB( GL_PROGRAM_OBJECT_ARB )
         self.old_program = 0
 
-        self.view.glext.glUseProgramObjectARB(self.program.program)
-        self.m_ok = (self.program.program != 0)
+        gl.glext_arb.glUseProgramObjectARB(self.program.program)
+        self.m_ok = True
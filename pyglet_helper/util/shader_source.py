@@ -0,0 +1,148 @@
+""" pyglet_helper.util.shader_source contains functions for splitting shader
+sources into their [vertex], [varying] and [fragment] sections, and an object
+holding a parsed shader library which assembles the source of each stage of
+a material's program
+"""
+import re
+
+# The sections a shader source may contain
+SECTIONS = ('vertex', 'varying', 'fragment')
+
+# The sections each stage of a program is assembled from, in order. The
+# varying section comes first, since it holds the #version directive.
+STAGE_SECTIONS = {'vertex': ('varying', 'vertex'),
+                  'fragment': ('varying', 'fragment')}
+
+_SECTION_HEADER = re.compile(r'^[ \t]*\[(%s)\][ \t]*$' % '|'.join(SECTIONS),
+                             re.MULTILINE)
+_VERSION = re.compile(r'^[ \t]*#[ \t]*version[^\n]*\n', re.MULTILINE)
+_EXTENSION = re.compile(r'^[ \t]*#[ \t]*extension[^\n]*(\n|$)', re.MULTILINE)
+
+
+def parse_sections(text):
+    """
+    Split a shader source into its sections. Text before the first section
+    header is ignored, and a section which appears more than once is joined
+    together in order.
+    :param text: the source, e.g., the contents of library.txt
+    :type text: str
+    :return: the text of each section present, by name
+    :rtype: dict
+    """
+    sections = {}
+    parts = _SECTION_HEADER.split(text)
+    # parts alternates between section names and their text, after the
+    # text before the first header.
+    for name, body in zip(parts[1::2], parts[2::2]):
+        sections[name] = sections.get(name, '') + body.strip('\n') + '\n'
+    return sections
+
+
+def stage_sources(sections, *more_sections):
+    """
+    Assemble the source of each stage of a program
+    :param sections: the sections of the library, from parse_sections()
+    :type sections: dict
+    :param more_sections: the sections of the material, appended to the
+    library's
+    :type more_sections: dict
+    :return: the source of each stage, by name
+    :rtype: dict
+    """
+    stages = {}
+    for stage, names in STAGE_SECTIONS.items():
+        parts = []
+        for name in names:
+            for source in (sections,) + more_sections:
+                if name in source:
+                    parts.append(source[name])
+        stages[stage] = hoist_extensions(''.join(parts))
+    return stages
+
+
+def _after_version(source, directives):
+    """
+    Add directives to a stage's source, after its #version directive if it
+    has one, since that must come first
+    :param source: the stage's source
+    :type source: str
+    :param directives: the directives, one per line
+    :type directives: str
+    :return: the source with the directives added
+    :rtype: str
+    """
+    match = _VERSION.search(source)
+    if match is None:
+        return directives + source
+    return source[:match.end()] + directives + source[match.end():]
+
+
+def hoist_extensions(source):
+    """
+    Move the #extension directives of a stage's source to just after its
+    #version directive, since they must come before any declaration, and
+    the sections of a material come after those of the library
+    :param source: the stage's source
+    :type source: str
+    :return: the source with its extensions enabled first
+    :rtype: str
+    """
+    extensions = []
+    for match in _EXTENSION.finditer(source):
+        directive = match.group(0).strip() + '\n'
+        if directive not in extensions:
+            extensions.append(directive)
+    if not extensions:
+        return source
+    return _after_version(_EXTENSION.sub('', source), ''.join(extensions))
+
+
+def insert_defines(source, defines):
+    """
+    Add #define directives to a stage's source, after its #version directive
+    if it has one, since that must come first
+    :param source: the stage's source
+    :type source: str
+    :param defines: the values of the macros, by name
+    :type defines: dict
+    :return: the source with the macros defined
+    :rtype: str
+    """
+    return _after_version(source, ''.join(
+        '#define %s %s\n' % (name, defines[name]) for name in sorted(defines)))
+
+
+class ShaderLibrary(object):
+    """
+    A shader library parsed into sections once, which assembles material
+    programs from it without searching or re-parsing its text
+    """
+    def __init__(self, text):
+        """
+        :param text: the library's source
+        :type text: str
+        """
+        self.text = text
+        self.sections = parse_sections(text)
+        # The assembled programs, by the material source they came from
+        self._assembled = {}
+
+    def __contains__(self, name):
+        return name in self.sections
+
+    def assemble(self, material_source):
+        """
+        Combine the library with a material's source
+        :param material_source: the material's sections, e.g., its
+        [fragment] material_main()
+        :type material_source: str
+        :return: the program's complete source, and the source of each of
+        its stages, by name
+        :rtype: tuple
+        """
+        if material_source not in self._assembled:
+            sections = parse_sections(material_source)
+            self._assembled[material_source] = (
+                self.text + material_source,
+                stage_sources(self.sections, sections))
+        return self._assembled[material_source]
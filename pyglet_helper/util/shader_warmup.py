@@ -0,0 +1,215 @@
+""" pyglet_helper.util.shader_warmup contains an object for compiling shader
+programs ahead of time, without stalling the frames drawn meanwhile
+
+    warmup = ShaderWarmup()
+    warmup.start(scene)
+    # then, once per frame:
+    warmup.poll()
+
+Until a material's program is ready, Material.active_program() draws it
+with the unshaded program instead. Each View queues the permutations of the
+programs it draws with to a warmup of its own.
+"""
+from collections import deque
+import threading
+try:
+    import pyglet.gl as gl
+except ImportError:
+    gl = None
+
+from pyglet_helper.util.shader_program import PROGRAMS
+
+# The extensions which let the driver compile and link in the background
+PARALLEL_EXTENSIONS = ('GL_KHR_parallel_shader_compile',
+                       'GL_ARB_parallel_shader_compile')
+
+# The names the extensions give the function setting the number of compiler
+# threads, which pyglet does not wrap
+MAX_COMPILER_THREADS_FUNCTIONS = ('glMaxShaderCompilerThreadsKHR',
+                                  'glMaxShaderCompilerThreadsARB')
+
+# Passed to glMaxShaderCompilerThreadsKHR to let the driver choose
+ALL_COMPILER_THREADS = 0xFFFFFFFF
+
+
+def set_compiler_threads(count=ALL_COMPILER_THREADS):
+    """
+    Set the number of threads the driver compiles shaders with, loading
+    glMaxShaderCompilerThreadsKHR, or its ARB alias, from the driver
+    :param count: the number of threads
+    :type count: int
+    :return: False if the driver does not provide the function
+    :rtype: bool
+    """
+    for name in MAX_COMPILER_THREADS_FUNCTIONS:
+        try:
+            function = gl.lib.link_GL(name, None, [gl.GLuint])
+            function(count)
+            return True
+        except gl.lib.MissingFunctionException:
+            continue
+    return False
+
+
+class ShaderWarmup(object):
+    """
+    Compiles and links a set of shader programs while frames are drawn. The
+    programs are compiled by the driver's own threads where it supports
+    KHR_parallel_shader_compile, otherwise by a worker thread with a context
+    sharing objects with the view's, otherwise a few at a time by poll().
+    """
+    def __init__(self, programs=None, context_factory=None, per_poll=1):
+        """
+        :param programs: The programs to compile. Defaults to every program
+        in PROGRAMS, i.e., those of every material created so far.
+        :type programs: list of pyglet_helper.util.ShaderProgram
+        :param context_factory: A function returning an OpenGL context which
+        shares objects with the view's, e.g., a pyglet Config's
+        create_context(share=window.context). It is called, and the context
+        made current, on the worker thread.
+        :type context_factory: callable
+        :param per_poll: Without a background compiler, the number of
+        programs compiled by each call to poll()
+        :type per_poll: int
+        """
+        if programs is None:
+            programs = list(PROGRAMS.programs.values())
+        self.programs = list(programs)
+        self.context_factory = context_factory
+        self.per_poll = per_poll
+        # How the programs are being compiled: 'parallel', 'thread' or
+        # 'incremental', or None before start()
+        self.mode = None
+        self.view = None
+        # The programs not known to be ready yet
+        self._pending = deque()
+        # The programs linked by the worker thread, with their program
+        # objects, not yet adopted by the render thread
+        self._finished = deque()
+        # The programs added while the worker thread runs, which poll()
+        # compiles a few at a time instead
+        self._added = deque()
+        self._thread = None
+
+    def supports_parallel(self):
+        """
+        Check whether the driver can compile in the background
+        :return: True if one of PARALLEL_EXTENSIONS is supported. start()
+        still falls back to another mode if the driver's functions cannot be
+        loaded.
+        :rtype: bool
+        """
+        try:
+            return any(gl.gl_info.have_extension(extension)
+                       for extension in PARALLEL_EXTENSIONS)
+        except AttributeError:
+            return False
+
+    def start(self, view):
+        """ Start compiling the programs. The view's context must be current.
+
+        :param view: the view the programs are drawn in
+        :type view: pyglet_helper.objects.View
+        """
+        self.view = view
+        self._pending = deque(program for program in self.programs
+                              if program.program == -1)
+        if self.supports_parallel() and set_compiler_threads():
+            self.mode = 'parallel'
+            for program in self._pending:
+                program.begin_realize(view)
+        elif self.context_factory is not None:
+            self.mode = 'thread'
+            if not view.enable_shaders:
+                self._pending.clear()
+            # The sources are split into stages here, so that the worker
+            # only reads them.
+            for program in self._pending:
+                _ = program.stages
+            self._thread = threading.Thread(target=self._compile_all,
+                                            args=(list(self._pending),))
+            self._thread.daemon = True
+            self._thread.start()
+        else:
+            self.mode = 'incremental'
+
+    def add(self, program):
+        """ Compile another program, e.g., a permutation needed by the scene.
+        A program which was already added, or realized, is ignored.
+
+        :param program: the program
+        :type program: pyglet_helper.util.ShaderProgram
+        """
+        if program in self.programs:
+            return
+        self.programs.append(program)
+        if self.mode is None or program.program != -1:
+            return
+        self._pending.append(program)
+        if self.mode == 'parallel':
+            program.begin_realize(self.view)
+        elif self.mode == 'thread':
+            self._added.append(program)
+
+    def _compile_all(self, programs):
+        """ Compile and link programs in a context of the worker thread. The
+        worker only makes OpenGL calls; the program objects are handed to
+        poll(), which finishes realizing them on the render thread, so that
+        the resource managers, PROGRAMS and the binary cache are only used by
+        the render thread.
+
+        :param programs: the programs to compile
+        :type programs: list of pyglet_helper.util.ShaderProgram
+        """
+        context = self.context_factory()
+        context.set_current()
+        for program in programs:
+            name = program.link_stages()
+            # Make the program object visible to the view's context before it
+            # is handed over.
+            gl.glFinish()
+            self._finished.append((program, name))
+
+    def poll(self):
+        """
+        Check on the programs being compiled, without waiting for any of
+        them, and make those that are done ready to use
+        :return: True once every program is done
+        :rtype: bool
+        """
+        if self.mode == 'parallel':
+            for _ in range(len(self._pending)):
+                program = self._pending.popleft()
+                if not program.poll(parallel=True):
+                    self._pending.append(program)
+        elif self.mode == 'thread':
+            while self._finished:
+                program, name = self._finished.popleft()
+                program.adopt(name)
+                self._pending.remove(program)
+            for _ in range(min(self.per_poll, len(self._added))):
+                program = self._added.popleft()
+                program.realize(self.view)
+                self._pending.remove(program)
+        elif self.mode == 'incremental':
+            for _ in range(min(self.per_poll, len(self._pending))):
+                self._pending.popleft().realize(self.view)
+        return self.done
+
+    @property
+    def done(self):
+        """
+        Check whether every program is done
+        :return: True if no programs are still being compiled
+        :rtype: bool
+        """
+        return self.mode is not None and not self._pending
+
+    @property
+    def remaining(self):
+        """
+        Get the number of programs still being compiled
+        :return: the number of programs
+        :rtype: int
+        """
+        return len(self._pending)
@@ -1,23 +1,259 @@
 """ pyglet_helper.util.texture contains objects for describing textures to
-apply to objects
+apply to objects, and for managing the graphics memory they use
 """
 from __future__ import print_function
+from collections import OrderedDict
+from ctypes import byref, c_ubyte, c_uint
+from functools import partial
 try:
-    from pyglet.gl import glBindTexture, glDeleteTextures, GL_TEXTURE_2D
-except Exception as error_msg:
-    print("Pyglet import error: "+str(error_msg))
+    import pyglet.gl as gl
+except ImportError:
+    gl = None
+from numpy import ascontiguousarray, frombuffer
+
+from pyglet_helper.util.gl_resources import current_resources
+from pyglet_helper.util.mipmap import is_mip_chain, mip_regions
+
+# Above this many damaged regions, a texture's regions are merged into their
+# bounding box, so that a texture painted in many small strokes is not
+# updated with many small uploads.
+MAX_DAMAGE_REGIONS = 16
+
+
+def _delete_texture(delete_textures, handle):
+    """ Delete an OpenGL texture.
+
+    :param delete_textures: glDeleteTextures, looked up when the texture was
+    created, so that it can still be called once the module has been torn
+    down at exit
+    :type delete_textures: callable
+    :param handle: the texture's name
+    :type handle: int
+    """
+    delete_textures(1, byref(c_uint(handle)))
+
+
+def mip_level_sizes(shape, mipmap=True):
+    """
+    Compute the size, in bytes, of each level of a texture
+    :param shape: the shape of the texture's data: (height, width, channels)
+    for a 2D texture, or (depth, height, width, channels) for a 3D texture
+    :type shape: tuple of int
+    :param mipmap: if False, only the base level is counted
+    :type mipmap: bool
+    :return: the size of each level, largest first
+    :rtype: list of int
+    """
+    dimensions = list(shape[:-1])
+    channels = shape[-1]
+    sizes = []
+    while True:
+        size = channels
+        for dimension in dimensions:
+            size *= dimension
+        sizes.append(size)
+        if not mipmap or max(dimensions) <= 1:
+            return sizes
+        dimensions = [max(1, dimension // 2) for dimension in dimensions]
+
+
+class TextureManager(object):
+    """
+    Uploads textures when they are first activated, keeps track of the
+    graphics memory they use, and frees the least recently used textures
+    when the total goes over a budget. Evicted textures are uploaded again
+    the next time they are activated.
+    """
+    def __init__(self, budget=None):
+        """
+        :param budget: The most graphics memory, in bytes, the textures may
+        use. If None, textures are never evicted.
+        :type budget: int
+        """
+        self.budget = budget
+        # The resident textures and their sizes, least recently used first
+        self._resident = OrderedDict()
+        # The number of times a texture was uploaded
+        self.uploads = 0
+        # The number of textures freed to stay within the budget
+        self.evictions = 0
+        # The number of activations of resident textures
+        self.hits = 0
+        # The number of activations which required an upload
+        self.misses = 0
+        # The number of times damaged regions of a texture were uploaded
+        self.updates = 0
+        # The number of bytes of texture data sent to OpenGL
+        self.bytes_uploaded = 0
+
+    @property
+    def resident_bytes(self):
+        """
+        Get the graphics memory used by the resident textures
+        :return: the size, in bytes
+        :rtype: int
+        """
+        return sum(self._resident.values())
+
+    def is_resident(self, texture):
+        """
+        Check whether a texture is uploaded
+        :param texture: the texture
+        :type texture: pyglet_helper.util.Texture
+        :return: True if the texture is in graphics memory
+        :rtype: bool
+        """
+        return texture in self._resident
+
+    def activate(self, texture):
+        """ Make sure a texture is uploaded and up to date, and mark it as the
+        most recently used.
+
+        :param texture: the texture
+        :type texture: pyglet_helper.util.Texture
+        """
+        if texture in self._resident:
+            self.hits += 1
+            size = self._resident.pop(texture)
+            if texture.damaged:
+                self.make_room(texture.nbytes, keep=texture)
+                self.bytes_uploaded += texture.gl_init()
+                size = texture.nbytes
+                self.uploads += 1
+            elif texture.damaged_regions:
+                self.bytes_uploaded += texture.gl_update()
+                self.updates += 1
+            self._resident[texture] = size
+            return
+        self.misses += 1
+        self.make_room(texture.nbytes, keep=texture)
+        self.bytes_uploaded += texture.gl_init()
+        self.uploads += 1
+        self._resident[texture] = texture.nbytes
+
+    def make_room(self, size, keep=None):
+        """ Evict the least recently used textures until size more bytes fit
+        within the budget, or no other texture is left.
+
+        :param size: the number of bytes needed
+        :type size: int
+        :param keep: a texture which must not be evicted
+        :type keep: pyglet_helper.util.Texture
+        """
+        if self.budget is None:
+            return
+        for texture in list(self._resident):
+            if self.resident_bytes + size <= self.budget:
+                return
+            if texture is not keep:
+                self.evict(texture)
+
+    def evict(self, texture):
+        """ Free a texture's graphics memory. It will be uploaded again the
+        next time it is activated.
+
+        :param texture: the texture
+        :type texture: pyglet_helper.util.Texture
+        """
+        texture.gl_free()
+        self.evictions += 1
+
+    def forget(self, texture):
+        """ Stop tracking a texture, after its graphics memory was freed.
+
+        :param texture: the texture
+        :type texture: pyglet_helper.util.Texture
+        """
+        self._resident.pop(texture, None)
+
+    def clear(self):
+        """ Free every resident texture, e.g., before the OpenGL context is
+        destroyed.
+        """
+        for texture in list(self._resident):
+            texture.gl_free()
+
+    @property
+    def stats(self):
+        """
+        Get the residency statistics
+        :return: the number and size of the resident textures, the budget,
+        and the upload, partial update, eviction, hit, miss and uploaded byte
+        counters
+        :rtype: dict
+        """
+        return {'resident_textures': len(self._resident),
+                'resident_bytes': self.resident_bytes,
+                'budget': self.budget,
+                'uploads': self.uploads,
+                'updates': self.updates,
+                'evictions': self.evictions,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bytes_uploaded': self.bytes_uploaded}
+
 
 class Texture(object):
     """
     A class to assist in managing OpenGL texture resources.
     """
-    def __init__(self, damaged=False, handle=0, opacity=False):
+    # The texture's pixels, as an array of unsigned bytes with shape
+    # (height, width, channels) or (depth, height, width, channels).
+    # Subclasses with data override this.
+    data = None
+    # The texture's mip levels after the base level, largest first, if they
+    # are computed ahead of time; otherwise OpenGL generates them.
+    mip_levels = None
+    # True for array textures, whose data has a layer per texture rather
+    # than a third dimension
+    layered = False
+
+    def __init__(self, damaged=False, handle=0, opacity=False,
+                 interpolate=True, mipmap=True, manager=None,
+                 pixel_buffers=False):
+        """
+        :param damaged: If True, the texture's data changed since it was
+        uploaded
+        :type damaged: bool
+        :param handle: The OpenGL name of the texture, if it is uploaded
+        :type handle: int
+        :param opacity: If True, the texture has an alpha channel
+        :type opacity: bool
+        :param interpolate: If True, the texture is filtered linearly,
+        otherwise the nearest texel is used
+        :type interpolate: bool
+        :param mipmap: If True, mip levels are generated when the texture is
+        uploaded
+        :type mipmap: bool
+        :param manager: The manager which uploads the texture and accounts for
+        its memory. Defaults to TEXTURES.
+        :type manager: pyglet_helper.util.TextureManager
+        :param pixel_buffers: If True, damaged regions are uploaded through a
+        pair of pixel buffer objects, used in turn, so that copying the data
+        for one update does not wait for OpenGL to finish the previous one
+        :type pixel_buffers: bool
+        """
         self._have_opacity = None
         self.damaged = damaged
         self.handle = handle
         # A unique identifier for the texture, to be obtained from
         # glGenTextures().
+        # The token the texture is deleted with, if it generated its name,
+        # and the manager of its share group
+        self._resource = 0
+        self._resources = None
         self._opacity = opacity
+        self.interpolate = interpolate
+        self.mipmap = mipmap
+        self.manager = manager
+        # The regions, as (x, y, width, height) in texels, changed since the
+        # texture was uploaded
+        self.damaged_regions = []
+        self.pixel_buffers = pixel_buffers
+        # The OpenGL names of the pixel buffer objects, and the one to use
+        # next
+        self._buffers = []
+        self._next_buffer = 0
 
     @property
     def opacity(self):
@@ -37,6 +273,58 @@ class Texture(object):
         """
         self._have_opacity = opacity
 
+    @property
+    def loaded(self):
+        """
+        Check whether the texture has data. Subclasses which load their data
+        when it is first used answer without loading it.
+        :return: True if the texture's data is loaded
+        :rtype: bool
+        """
+        return self.data is not None
+
+    @property
+    def texture_manager(self):
+        """
+        Get the manager responsible for this texture
+        :return: the manager
+        :rtype: pyglet_helper.util.TextureManager
+        """
+        return self.manager or TEXTURES
+
+    @property
+    def target(self):
+        """
+        Get the OpenGL target the texture is bound to
+        :return: GL_TEXTURE_3D for volume data, otherwise GL_TEXTURE_2D
+        :rtype: int
+        """
+        if self.data is not None and len(self.data.shape) == 4:
+            return gl.GL_TEXTURE_3D
+        return gl.GL_TEXTURE_2D
+
+    @property
+    def pixel_format(self):
+        """
+        Get the OpenGL format of the texture's data
+        :return: GL_LUMINANCE, GL_LUMINANCE_ALPHA, GL_RGB or GL_RGBA
+        :rtype: int
+        """
+        return [gl.GL_LUMINANCE, gl.GL_LUMINANCE_ALPHA, gl.GL_RGB,
+                gl.GL_RGBA][self.data.shape[-1] - 1]
+
+    @property
+    def nbytes(self):
+        """
+        Get the graphics memory used by the texture once it is uploaded,
+        including its mip levels
+        :return: the size, in bytes
+        :rtype: int
+        """
+        if self.data is None:
+            return 0
+        return sum(mip_level_sizes(self.data.shape, self.mipmap))
+
     def gl_activate(self):
         """
         Make this texture active.  This function constitutes use under the
@@ -44,26 +332,239 @@ class Texture(object):
             continuous graphics memory penalty.  Precondition: an OpenGL
             context must be active.
         """
-        if self.damaged:
+        if self.data is not None:
+            self.texture_manager.activate(self)
+        elif self.damaged:
             self.damaged = False
         if not self.handle:
             return
 
-        glBindTexture(GL_TEXTURE_2D, self.handle)
+        gl.glBindTexture(self.target, self.handle)
+
+    def gl_init(self):
+        """ Upload the texture's data, creating the OpenGL texture if it
+        does not exist yet. Called by the texture manager; use gl_activate()
+        instead.
+
+        :return: the number of bytes uploaded
+        :rtype: int
+        """
+        data = ascontiguousarray(self.data)
+        target = self.target
+        if not self.handle:
+            handle = gl.GLuint()
+            gl.glGenTextures(1, byref(handle))
+            self.handle = handle.value
+            self._resources = current_resources()
+            self._resource = self._resources.track(
+                self, 'texture', self.handle,
+                partial(_delete_texture, gl.glDeleteTextures))
+        gl.glBindTexture(target, self.handle)
+        if self.interpolate:
+            mag_filter = gl.GL_LINEAR
+        else:
+            mag_filter = gl.GL_NEAREST
+        if self.mipmap:
+            min_filter = gl.GL_LINEAR_MIPMAP_LINEAR
+        else:
+            min_filter = mag_filter
+        gl.glTexParameteri(target, gl.GL_TEXTURE_MAG_FILTER, mag_filter)
+        gl.glTexParameteri(target, gl.GL_TEXTURE_MIN_FILTER, min_filter)
+        # Rows of texels are packed, whatever their width.
+        gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 1)
+        levels = [data]
+        mip_levels = self.mip_levels if self.mipmap else None
+        if mip_levels is not None and is_mip_chain(mip_levels, data.shape,
+                                                   self.layered):
+            levels.extend(ascontiguousarray(level) for level in mip_levels)
+        pixel_format = self.pixel_format
+        for number, level in enumerate(levels):
+            if len(level.shape) == 4:
+                # A 3D texture, or the layers of an array texture
+                depth, height, width = level.shape[:3]
+                gl.glTexImage3D(target, number, pixel_format, width, height,
+                                depth, 0, pixel_format, gl.GL_UNSIGNED_BYTE,
+                                level.ctypes.data)
+            else:
+                height, width = level.shape[:2]
+                gl.glTexImage2D(target, number, pixel_format, width, height,
+                                0, pixel_format, gl.GL_UNSIGNED_BYTE,
+                                level.ctypes.data)
+        if self.mipmap and len(levels) == 1:
+            gl.glGenerateMipmap(target)
+        self.damaged = False
+        self.damaged_regions = []
+        return sum(level.nbytes for level in levels)
+
+    def gl_update(self):
+        """ Upload the damaged regions of the texture's data, and of its mip
+        levels if they were computed on the CPU. Called by the texture
+        manager; use gl_activate() instead.
+
+        :return: the number of bytes uploaded
+        :rtype: int
+        """
+        data = self.data
+        target = self.target
+        gl.glBindTexture(target, self.handle)
+        gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 1)
+        mip_levels = self.mip_levels if self.mipmap else None
+        if mip_levels is not None and not is_mip_chain(mip_levels,
+                                                       data.shape):
+            mip_levels = None
+        uploaded = 0
+        for region in self.damaged_regions:
+            x_offset, y_offset, width, height = region
+            # If the buffer cannot be mapped, the region is uploaded directly
+            # instead.
+            if not self.pixel_buffers or not self._upload_buffered(
+                    data, x_offset, y_offset, width, height):
+                self._upload_direct(data, x_offset, y_offset, width, height)
+            uploaded += width * height * data.shape[-1]
+            if mip_levels is None:
+                continue
+            # The levels were updated along with the data.
+            regions = mip_regions(region, data.shape, len(mip_levels))
+            for number, (level, level_region) in enumerate(
+                    zip(mip_levels, regions), 1):
+                self._upload_direct(level, *level_region, level=number)
+                uploaded += level_region[2] * level_region[3] * \
+                    level.shape[-1]
+        gl.glPixelStorei(gl.GL_UNPACK_ROW_LENGTH, 0)
+        gl.glPixelStorei(gl.GL_UNPACK_SKIP_PIXELS, 0)
+        gl.glPixelStorei(gl.GL_UNPACK_SKIP_ROWS, 0)
+        if self.mipmap and mip_levels is None:
+            gl.glGenerateMipmap(target)
+        self.damaged_regions = []
+        return uploaded
+
+    def _upload_direct(self, data, x_offset, y_offset, width, height,
+                       level=0):
+        """ Upload a region of the texture from the texture's data.
+
+        :param data: the texture's data, or that of the mip level
+        :type data: numpy.ndarray
+        :param x_offset: the first column of the region
+        :type x_offset: int
+        :param y_offset: the first row of the region
+        :type y_offset: int
+        :param width: the number of columns in the region
+        :type width: int
+        :param height: the number of rows in the region
+        :type height: int
+        :param level: the mip level to upload to
+        :type level: int
+        """
+        if data.flags.c_contiguous:
+            # Point OpenGL at the region within the whole array, rather than
+            # copying the region out of it.
+            gl.glPixelStorei(gl.GL_UNPACK_ROW_LENGTH, data.shape[1])
+            gl.glPixelStorei(gl.GL_UNPACK_SKIP_PIXELS, x_offset)
+            gl.glPixelStorei(gl.GL_UNPACK_SKIP_ROWS, y_offset)
+            gl.glTexSubImage2D(self.target, level, x_offset, y_offset,
+                               width, height, self.pixel_format,
+                               gl.GL_UNSIGNED_BYTE, data.ctypes.data)
+        else:
+            region = ascontiguousarray(
+                data[y_offset:y_offset + height, x_offset:x_offset + width])
+            gl.glTexSubImage2D(self.target, level, x_offset, y_offset,
+                               width, height, self.pixel_format,
+                               gl.GL_UNSIGNED_BYTE, region.ctypes.data)
+
+    def _upload_buffered(self, data, x_offset, y_offset, width, height):
+        """
+        Upload a region of the texture through the next pixel buffer
+        object. The buffer's storage is replaced before it is written to, so
+        that OpenGL can keep reading the old storage for an earlier upload.
+
+        :param data: the texture's data
+        :type data: numpy.ndarray
+        :param x_offset: the first column of the region
+        :type x_offset: int
+        :param y_offset: the first row of the region
+        :type y_offset: int
+        :param width: the number of columns in the region
+        :type width: int
+        :param height: the number of rows in the region
+        :type height: int
+        :return: False if the buffer could not be mapped, or its contents
+        were lost before it was unmapped, so nothing was uploaded
+        :rtype: bool
+        """
+        if not self._buffers:
+            buffers = (gl.GLuint * 2)()
+            gl.glGenBuffers(2, buffers)
+            self._buffers = list(buffers)
+        size = width * height * data.shape[-1]
+        gl.glBindBuffer(gl.GL_PIXEL_UNPACK_BUFFER,
+                        self._buffers[self._next_buffer])
+        self._next_buffer = 1 - self._next_buffer
+        gl.glBufferData(gl.GL_PIXEL_UNPACK_BUFFER, size, None,
+                        gl.GL_STREAM_DRAW)
+        address = gl.glMapBuffer(gl.GL_PIXEL_UNPACK_BUFFER, gl.GL_WRITE_ONLY)
+        written = False
+        if address:
+            mapped = frombuffer((c_ubyte * size).from_address(address),
+                                data.dtype)
+            mapped.reshape((height, width, data.shape[-1]))[...] = \
+                data[y_offset:y_offset + height, x_offset:x_offset + width]
+            written = gl.glUnmapBuffer(gl.GL_PIXEL_UNPACK_BUFFER)
+        if written:
+            # With a buffer bound, the pointer is an offset into it.
+            gl.glTexSubImage2D(self.target, 0, x_offset, y_offset, width,
+                               height, self.pixel_format, gl.GL_UNSIGNED_BYTE,
+                               0)
+        gl.glBindBuffer(gl.GL_PIXEL_UNPACK_BUFFER, 0)
+        return bool(written)
 
     def gl_free(self):
         """
-        Returns e.g. GL_TEXTURE_2D - the thing to be enabled to make this
-            texture work with the fixed function pipeline.
+        Delete the OpenGL texture, freeing its graphics memory. The texture
+        will be uploaded again if it is activated.
         """
-        print("Deleting texture number " + self.handle)
-        glDeleteTextures(1, self.handle)
-        # Mutable subclasses must call this function whenever their texture
-        # data
+        if self._resource:
+            self._resources.release(self._resource)
+            self._resource = 0
+        elif self.handle:
+            # A name passed to the constructor is not tracked.
+            _delete_texture(gl.glDeleteTextures, self.handle)
+        self.handle = 0
+        if self._buffers:
+            gl.glDeleteBuffers(2, (gl.GLuint * 2)(*self._buffers))
+            self._buffers = []
+        self.texture_manager.forget(self)
 
-    def damage(self):
+    def damage(self, region=None):
         """
         Damage the texture, indicating that it needs to be re-uploaded to
         OpenGL
+
+        :param region: the part of the texture that changed, as (x, y, width,
+        height) in texels. If None, or if the texture is not 2D, the whole
+        texture is uploaded again.
+        :type region: tuple of int
         """
-        self.damaged = True
+        if region is None or self.data is None or len(self.data.shape) != 3:
+            self.damaged = True
+            return
+        height, width = self.data.shape[:2]
+        x_offset, y_offset, region_width, region_height = region
+        # Clip the region to the texture.
+        right = min(width, x_offset + region_width)
+        bottom = min(height, y_offset + region_height)
+        x_offset = max(0, x_offset)
+        y_offset = max(0, y_offset)
+        if right <= x_offset or bottom <= y_offset:
+            return
+        self.damaged_regions.append((x_offset, y_offset, right - x_offset,
+                                     bottom - y_offset))
+        if len(self.damaged_regions) > MAX_DAMAGE_REGIONS:
+            left = min(r[0] for r in self.damaged_regions)
+            top = min(r[1] for r in self.damaged_regions)
+            right = max(r[0] + r[2] for r in self.damaged_regions)
+            bottom = max(r[1] + r[3] for r in self.damaged_regions)
+            self.damaged_regions = [(left, top, right - left, bottom - top)]
+
+
+# The manager of the textures which do not have their own
+TEXTURES = TextureManager()
@@ -0,0 +1,172 @@
+""" pyglet_helper.util.texture_array contains an object for packing 2D
+textures of the same size and format into the layers of one array texture,
+so that materials using different textures can be drawn without binding a
+texture between them
+"""
+try:
+    import pyglet.gl as gl
+except ImportError:
+    gl = None
+from numpy import stack
+
+from pyglet_helper.util.texture import Texture, mip_level_sizes
+
+
+class TextureArray(Texture):
+    """
+    A 2D array texture holding the data of several 2D textures, one per
+    layer. Shaders sample it with a sampler2DArray and the layer of the
+    texture they want.
+    """
+    layered = True
+
+    def __init__(self, textures=(), interpolate=True, mipmap=True,
+                 manager=None):
+        """
+        :param textures: The textures to pack, in layer order
+        :type textures: list of pyglet_helper.util.Texture
+        :param interpolate: If True, the texture is linearly interpolated
+        :type interpolate: bool
+        :param mipmap: If True, the texture has mip levels
+        :type mipmap: bool
+        :param manager: The manager which uploads the texture and accounts for
+        its memory. Defaults to TEXTURES.
+        :type manager: pyglet_helper.util.TextureManager
+        """
+        super(TextureArray, self).__init__(interpolate=interpolate,
+                                           mipmap=mipmap, manager=manager)
+        # The packed textures, in layer order
+        self.textures = []
+        # The shape of the data of every layer
+        self.layer_shape = None
+        self._layers = {}
+        self._data = None
+        for texture in textures:
+            self.add(texture)
+
+    def __len__(self):
+        return len(self.textures)
+
+    def __contains__(self, texture):
+        return texture in self._layers
+
+    def fits(self, texture):
+        """
+        Check whether a texture can be packed into the array: its data must
+        be 2D, with the same shape as the array's layers
+        :param texture: the texture
+        :type texture: pyglet_helper.util.Texture
+        :return: True if the texture can be packed
+        :rtype: bool
+        """
+        data = texture.data
+        if data is None or len(data.shape) != 3:
+            return False
+        return self.layer_shape is None or data.shape == self.layer_shape
+
+    def add(self, texture):
+        """ Pack a texture into the next free layer. A texture already in the
+        array keeps its layer.
+
+        :param texture: the texture to pack
+        :type texture: pyglet_helper.util.Texture
+        :return: the layer holding the texture
+        :rtype: int
+        """
+        if texture in self._layers:
+            return self._layers[texture]
+        data = texture.data
+        if data is None or len(data.shape) != 3:
+            raise ValueError("Only textures with 2D data can be packed into "
+                             "a texture array")
+        if self.layer_shape is None:
+            self.layer_shape = data.shape
+        elif data.shape != self.layer_shape:
+            raise ValueError("Cannot pack a texture with shape %s into a "
+                             "texture array with layers of shape %s" %
+                             (data.shape, self.layer_shape))
+        self._layers[texture] = len(self.textures)
+        self.textures.append(texture)
+        self.update()
+        return self._layers[texture]
+
+    def layer(self, texture):
+        """
+        Get the layer holding a texture
+        :param texture: a texture packed into the array
+        :type texture: pyglet_helper.util.Texture
+        :return: the layer
+        :rtype: int
+        """
+        try:
+            return self._layers[texture]
+        except KeyError:
+            raise ValueError("The texture is not in the texture array")
+
+    def update(self):
+        """ Copy the data of the packed textures again, after any of them
+        changed. The array is uploaded again the next time it is used.
+        """
+        self._data = None
+        self.damage()
+
+    @property
+    def data(self):
+        """
+        Get the data of every layer, copying it from the packed textures the
+        first time it is used
+        :return: the data, with shape (layers, height, width, channels)
+        :rtype: numpy.ndarray
+        """
+        if self._data is None and self.textures:
+            self._data = stack([texture.data for texture in self.textures])
+        return self._data
+
+    @property
+    def loaded(self):
+        """
+        Check whether the layers have been copied into the array's data,
+        without copying them
+        :return: True if the array's data is loaded
+        :rtype: bool
+        """
+        return self._data is not None
+
+    @property
+    def mip_levels(self):
+        """
+        Get the array's mip levels after the base level, if every packed
+        texture has precomputed levels
+        :return: the levels, each with every layer, or None if OpenGL should
+        generate them
+        :rtype: list of numpy.ndarray
+        """
+        if not self.textures:
+            return None
+        levels = [texture.mip_levels for texture in self.textures]
+        if any(level is None for level in levels):
+            return None
+        return [stack(layers) for layers in zip(*levels)]
+
+    @property
+    def target(self):
+        """
+        Get the OpenGL target the texture is bound to
+        :return: GL_TEXTURE_2D_ARRAY
+        :rtype: int
+        """
+        return gl.GL_TEXTURE_2D_ARRAY
+
+    @property
+    def nbytes(self):
+        """
+        Get the graphics memory used by the texture once it is uploaded,
+        including its mip levels. Unlike a 3D texture, the number of layers
+        is the same at every level.
+        :return: the size, in bytes
+        :rtype: int
+        """
+        if self.layer_shape is None:
+            return 0
+        return len(self.textures) * sum(mip_level_sizes(self.layer_shape,
+                                                        self.mipmap))